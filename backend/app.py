@@ -1,23 +1,25 @@
 import os
 import sys
-import subprocess
-import requests
 import time
+import uuid
 
-from flask import Flask
+from flask import Flask, g, request
 from flask_cors import CORS
 from backend.routes.upload_routes import upload_bp
 from backend.routes.health_routes import health_bp
 from backend.routes.analyze_domain import analyze_bp
+from backend.routes.job_routes import jobs_bp
+from backend.services.job_queue import start_job_workers
+from backend.services.warmup import start_warmup
+from backend.config.settings import MAX_UPLOAD_MB
+from backend.utils.metrics import (
+    configure_logging,
+    request_id_var,
+    route_var,
+    domain_var,
+    HTTP_REQUEST_SECONDS
+)
 
-def ensure_ollama():
-    try:
-        requests.get("http://localhost:11434")
-    except:
-        subprocess.Popen(["ollama", "serve"])
-        time.sleep(3)
-
-ensure_ollama()
 # Add project root to Python path so we can import 'backend' module
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
@@ -27,10 +29,40 @@ def create_app():
 
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     app.config["UPLOAD_FOLDER"] = os.path.join(BASE_DIR, "data", "uploads")
-    app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB
+    # Batch uploads carry many PDFs per request
+    app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_MB * 1024 * 1024
     app.register_blueprint(health_bp, url_prefix="/api")
     app.register_blueprint(upload_bp, url_prefix="/api")
     app.register_blueprint(analyze_bp, url_prefix="/api")
+    app.register_blueprint(jobs_bp, url_prefix="/api")
+
+    configure_logging()
+
+    @app.before_request
+    def start_request():
+        # Reuse the caller's id when given so logs can be joined upstream
+        request_id_var.set(request.headers.get("X-Request-ID") or uuid.uuid4().hex[:12])
+        route_var.set(request.url_rule.rule if request.url_rule else "unmatched")
+        domain_var.set("none")
+        g.started_at = time.perf_counter()
+
+    @app.after_request
+    def finish_request(response):
+        response.headers["X-Request-ID"] = request_id_var.get()
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - g.get("started_at", time.perf_counter()),
+            route=route_var.get(),
+            method=request.method,
+            status=response.status_code
+        )
+        return response
+
+    # Resume any jobs interrupted by a previous crash
+    start_job_workers()
+
+    # Load the embedder, index and Ollama model in the background;
+    # /api/ready reports when they are done
+    start_warmup()
 
     return app
 
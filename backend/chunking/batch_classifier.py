@@ -1,17 +1,21 @@
 from backend.prompts.batch_classification_prompt import BATCH_CLASSIFICATION_PROMPT
 from backend.llm.mistral_client import call_llm
+from backend.config.schemas import BATCH_CLASSIFICATION_SCHEMA
 from backend.utils.json_extractor import extract_json
 from backend.chunking.batch_builder import build_sentence_block
 from backend.chunking.sentence_splitter import split_into_sentences
-from backend.config.subdomains import ALLOWED_SUBDOMAINS
+from backend.config.subdomains import ALLOWED_SUBDOMAINS, VALID_DOMAINS
+from backend.config.settings import SENTENCE_CLASSIFIER, CLASSIFIER_CONFIDENCE_THRESHOLD
 
-def batch_classify(policy_text: str):
-    sentences = split_into_sentences(policy_text)
+# 🔥 LIMIT BATCH SIZE (very important for speed + stability)
+MAX_SENTENCES_PER_BATCH = 8
 
-    # 🔥 LIMIT BATCH SIZE (very important for speed + stability)
-    MAX_SENTENCES_PER_BATCH = 8
-    sentences = sentences[:MAX_SENTENCES_PER_BATCH]
 
+def llm_classify(sentences: list[str]) -> list[dict]:
+    """
+    Classify one batch (at most MAX_SENTENCES_PER_BATCH sentences) with the LLM.
+    Sentence ids in the result are 1-based positions within this batch.
+    """
     sentence_block = build_sentence_block(sentences)
 
     prompt = BATCH_CLASSIFICATION_PROMPT.format(
@@ -19,32 +23,95 @@ def batch_classify(policy_text: str):
         subdomains="\n".join(ALLOWED_SUBDOMAINS)
     )
 
-    raw_response = call_llm(prompt)
+    raw_response = call_llm(prompt, schema=BATCH_CLASSIFICATION_SCHEMA)
 
     print("\n==== RAW LLM OUTPUT ====\n")
     print(raw_response)
     print("\n========================\n")
 
-    data = extract_json(raw_response)
+    data = extract_json(raw_response, expect=list)
 
     # 🔒 SAFETY: if LLM output is broken, don’t crash
     if not isinstance(data, list):
         print("⚠️ Invalid batch classification output")
-        return sentences, []
-
-    # ✅ VALIDATE DOMAINS (THIS IS THE PART YOU ASKED ABOUT)
-    VALID_DOMAINS = {
-        "Information Security Management System (ISMS)",
-        "Data Privacy and Security",
-        "Patch Management",
-        "Risk Management",
-    }
+        return []
 
+    # ✅ VALIDATE DOMAINS
     cleaned = []
     for item in data:
-        if item.get("domain") in VALID_DOMAINS:
+        if not isinstance(item, dict):
+            continue
+        sentence_id = item.get("sentence_id")
+        if item.get("domain") in VALID_DOMAINS and isinstance(sentence_id, int) \
+                and 1 <= sentence_id <= len(sentences):
             cleaned.append(item)
         else:
             print("⚠️ Dropping invalid domain:", item)
 
-    return sentences, cleaned
+    return cleaned
+
+
+def _llm_classify_indices(sentences: list[str], indices: list[int]) -> list[dict]:
+    """
+    Run the LLM over the given sentence indices in batches and map the
+    batch-local ids back to 1-based ids in the full sentence list.
+    """
+    results = []
+
+    for start in range(0, len(indices), MAX_SENTENCES_PER_BATCH):
+        batch = indices[start:start + MAX_SENTENCES_PER_BATCH]
+
+        for item in llm_classify([sentences[i] for i in batch]):
+            item["sentence_id"] = batch[item["sentence_id"] - 1] + 1
+            results.append(item)
+
+    return results
+
+
+def batch_classify(policy_text: str, mode: str = None):
+    """
+    Classify every sentence of a policy into a domain and subdomain.
+
+    Args:
+        policy_text: Policy text to classify
+        mode: "hybrid" (embedding centroids, LLM only for sentences below
+              CLASSIFIER_CONFIDENCE_THRESHOLD) or "llm"; defaults to
+              SENTENCE_CLASSIFIER
+
+    Returns:
+        (sentences, classifications) where classifications reference
+        sentences by 1-based 'sentence_id'
+    """
+    sentences = split_into_sentences(policy_text)
+    mode = mode or SENTENCE_CLASSIFIER
+
+    if mode == "llm":
+        return sentences, _llm_classify_indices(sentences, list(range(len(sentences))))
+
+    from backend.chunking.embedding_classifier import classify_sentences
+
+    try:
+        predictions = classify_sentences(sentences)
+    except FileNotFoundError as e:
+        print(f"⚠️ Embedding classifier unavailable, classifying with the LLM: {e}")
+        return sentences, _llm_classify_indices(sentences, list(range(len(sentences))))
+
+    confident = [p for p in predictions if p["confidence"] >= CLASSIFIER_CONFIDENCE_THRESHOLD]
+    uncertain = [p["sentence_id"] - 1 for p in predictions if p["confidence"] < CLASSIFIER_CONFIDENCE_THRESHOLD]
+
+    print(
+        f"Embedding classifier: {len(confident)} confident, "
+        f"{len(uncertain)} sent to LLM (threshold {CLASSIFIER_CONFIDENCE_THRESHOLD})"
+    )
+
+    resolved = {item["sentence_id"]: item for item in _llm_classify_indices(sentences, uncertain)}
+
+    # Keep the embedding prediction for anything the LLM failed to classify
+    classifications = confident + [
+        resolved.get(p["sentence_id"], p)
+        for p in predictions
+        if p["confidence"] < CLASSIFIER_CONFIDENCE_THRESHOLD
+    ]
+    classifications.sort(key=lambda item: item["sentence_id"])
+
+    return sentences, classifications
@@ -1,36 +1,116 @@
-import json
-import re
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from backend.config.prompts import DOMAIN_CHUNKING_PROMPT
+from backend.config.schemas import DOMAIN_CHUNKING_SCHEMA
+from backend.config.settings import CHUNKING_MODE, CHUNK_WINDOW_TOKENS, LLM_CONCURRENCY
 from backend.llm.mistral_client import call_llm
+from backend.chunking.sentence_splitter import split_into_sentences
+from backend.utils.token_utils import estimate_tokens
+from backend.utils.json_extractor import extract_json
+from backend.utils.metrics import submit_with_context
 
+_log_lock = threading.Lock()
 
-def extract_json(text: str):
-    """Extract JSON object from LLM output safely."""
 
-    # 1️⃣ Remove markdown code fences
-    text = re.sub(r"```json", "", text)
-    text = re.sub(r"```", "", text)
+def _classify_text(policy_text: str) -> dict:
+    """
+    One LLM chunking call.
 
-    # 2️⃣ Extract JSON block
-    match = re.search(r"\{.*\}", text, re.DOTALL)
-    if not match:
-        return None
+    Returns:
+        Dict of domain → {"text": [...], "subdomains": [...]}, possibly empty
+    """
+    prompt = DOMAIN_CHUNKING_PROMPT.format(policy_text=policy_text)
+    response = call_llm(prompt, schema=DOMAIN_CHUNKING_SCHEMA)
 
-    json_str = match.group().strip()
+    # 1️⃣ KEEP RAW OUTPUT (audit/debug)
+    with _log_lock:
+        os.makedirs("logs", exist_ok=True)
+        with open("logs/domain_chunking_raw.log", "a", encoding="utf-8") as f:
+            f.write("\n==== RAW LLM OUTPUT ====\n")
+            f.write(response)
+            f.write("\n=======================\n")
 
-    try:
-        return json.loads(json_str)
-    except json.JSONDecodeError as e:
-        print("JSON parsing error:", e)
-        print("Problematic JSON:", json_str[:500])
-        return None
+    # 2️⃣ PARSE JSON
+    data = extract_json(response, expect=dict)
+    if not isinstance(data, dict):
+        return {}
 
+    return data
 
-def chunk_by_domain(policy_text: str) -> list:
+
+def build_windows(sentences: list[str], max_tokens: int) -> list[str]:
+    """
+    Pack consecutive sentences into windows of at most max_tokens
+    (a single over-long sentence becomes its own window).
+    """
+    windows = []
+    current = []
+    current_tokens = 0
+
+    for sentence in sentences:
+        tokens = estimate_tokens(sentence)
+
+        if current and current_tokens + tokens > max_tokens:
+            windows.append("\n".join(current))
+            current = []
+            current_tokens = 0
+
+        current.append(sentence)
+        current_tokens += tokens
+
+    if current:
+        windows.append("\n".join(current))
+
+    return windows
+
+
+def merge_window_results(window_results: list[dict]) -> dict:
+    """
+    Reduce step: concatenate each domain's text and subdomains across
+    windows, keeping document order and dropping duplicate subdomains.
+    """
+    merged = {}
+
+    for data in window_results:
+        for domain, obj in data.items():
+            if not isinstance(obj, dict):
+                continue
+
+            target = merged.setdefault(domain, {"text": [], "subdomains": []})
+            target["text"].extend(obj.get("text", []) or [])
+
+            for subdomain in obj.get("subdomains", []) or []:
+                if subdomain not in target["subdomains"]:
+                    target["subdomains"].append(subdomain)
+
+    return merged
+
+
+def _classify_windowed(policy_text: str, max_tokens: int, concurrency: int) -> dict:
+    """Map step: classify token-bounded windows concurrently, in document order."""
+    windows = build_windows(split_into_sentences(policy_text), max_tokens)
+    print(f"Chunking {len(windows)} windows with concurrency {concurrency}")
+
+    if len(windows) <= 1:
+        return _classify_text(policy_text)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [submit_with_context(pool, _classify_text, w) for w in windows]
+        window_results = [f.result() for f in futures]
+
+    return merge_window_results(window_results)
+
+
+def chunk_by_domain(policy_text: str, mode: str = None) -> list:
     """
     Chunk policy text by domain.
 
+    Args:
+        policy_text: Cleaned policy text
+        mode: "single", "windowed" or "auto" (defaults to CHUNKING_MODE);
+              "auto" uses windows once the text exceeds CHUNK_WINDOW_TOKENS
+
     Returns a LIST of objects in this format:
     {
       "domain": "ISMS",
@@ -39,18 +119,16 @@ def chunk_by_domain(policy_text: str) -> list:
     }
     """
 
-    prompt = DOMAIN_CHUNKING_PROMPT.format(policy_text=policy_text)
-    response = call_llm(prompt)
+    mode = mode or CHUNKING_MODE
 
-    # 1️⃣ KEEP RAW OUTPUT (audit/debug)
-    os.makedirs("logs", exist_ok=True)
-    with open("logs/domain_chunking_raw.log", "a", encoding="utf-8") as f:
-        f.write("\n==== RAW LLM OUTPUT ====\n")
-        f.write(response)
-        f.write("\n=======================\n")
+    if mode == "auto":
+        mode = "windowed" if estimate_tokens(policy_text) > CHUNK_WINDOW_TOKENS else "single"
+
+    if mode == "windowed":
+        data = _classify_windowed(policy_text, CHUNK_WINDOW_TOKENS, LLM_CONCURRENCY)
+    else:
+        data = _classify_text(policy_text)
 
-    # 2️⃣ PARSE JSON
-    data = extract_json(response)
     if not data:
         return []
 
@@ -0,0 +1,122 @@
+import hashlib
+import threading
+import numpy as np
+from pathlib import Path
+
+from backend.config.settings import CENTROIDS_PATH
+from backend.config.subdomains import CORPUS_DOMAIN_LABELS, corpus_subdomain_label
+from backend.embeddings.embedding_model import load_embedding_model
+
+_centroids = None
+_lock = threading.Lock()
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _corpus_fingerprint(ids: list, metadatas: list) -> str:
+    digest = hashlib.sha256()
+    for doc_id, meta in sorted(zip(ids, metadatas), key=lambda pair: pair[0]):
+        digest.update(doc_id.encode("utf-8"))
+        digest.update(str((meta or {}).get("content_hash")).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def build_centroids(collection, path: Path = CENTROIDS_PATH) -> dict:
+    """
+    Compute one normalized centroid per subdomain from the ingested
+    corpus embeddings and save them to path. Run by nist_ingest.py
+    whenever it rebuilds the indexes.
+    """
+    stored = collection.get(include=["embeddings", "metadatas"])
+    ids = stored.get("ids", [])
+    metadatas = stored.get("metadatas", [])
+    embeddings = np.asarray(stored.get("embeddings"), dtype=np.float32)
+
+    grouped = {}
+    for row, meta in enumerate(metadatas):
+        subdomain = corpus_subdomain_label((meta or {}).get("subdomain"))
+        domain = CORPUS_DOMAIN_LABELS.get((meta or {}).get("domain"))
+        if subdomain and domain:
+            grouped.setdefault((domain, subdomain), []).append(row)
+
+    keys = sorted(grouped)
+    matrix = np.stack([
+        _normalize_rows(embeddings[grouped[key]]).mean(axis=0)
+        for key in keys
+    ])
+
+    centroids = {
+        "fingerprint": _corpus_fingerprint(ids, metadatas),
+        "domains": np.array([k[0] for k in keys]),
+        "subdomains": np.array([k[1] for k in keys]),
+        "matrix": _normalize_rows(matrix).astype(np.float32)
+    }
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, **centroids)
+    print(f"✅ Built {len(keys)} subdomain centroids from {len(ids)} records")
+
+    return centroids
+
+
+def load_centroids() -> dict:
+    """
+    Load the centroids saved by nist_ingest.py. Nothing is read from the
+    retrieval engine at runtime.
+
+    Raises:
+        FileNotFoundError: when CENTROIDS_PATH has not been built yet
+    """
+    global _centroids
+
+    if _centroids is None:
+        with _lock:
+            if _centroids is None:
+                if not CENTROIDS_PATH.exists():
+                    raise FileNotFoundError(
+                        f"No subdomain centroids at {CENTROIDS_PATH}; run backend/ingest/nist_ingest.py"
+                    )
+
+                with np.load(CENTROIDS_PATH) as saved:
+                    _centroids = {key: saved[key] for key in saved.files}
+
+    return _centroids
+
+
+def classify_sentences(sentences: list[str]) -> list[dict]:
+    """
+    Classify sentences against the subdomain centroids with a single
+    matrix multiply.
+
+    Returns:
+        One dict per sentence with 'sentence_id' (1-based), 'domain',
+        'subdomain' and 'confidence' (cosine similarity to the centroid)
+    """
+    if not sentences:
+        return []
+
+    centroids = load_centroids()
+    embedder = load_embedding_model()
+
+    vectors = np.asarray(
+        embedder.encode(sentences, normalize_embeddings=True),
+        dtype=np.float32
+    )
+
+    scores = vectors @ centroids["matrix"].T
+    best = scores.argmax(axis=1)
+    confidence = scores[np.arange(len(sentences)), best]
+
+    return [
+        {
+            "sentence_id": i + 1,
+            "domain": str(centroids["domains"][best[i]]),
+            "subdomain": str(centroids["subdomains"][best[i]]),
+            "confidence": float(confidence[i])
+        }
+        for i in range(len(sentences))
+    ]
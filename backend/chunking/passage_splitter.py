@@ -0,0 +1,81 @@
+import re
+
+from backend.utils.token_utils import estimate_tokens, CHARS_PER_TOKEN
+
+# Sentence ends, line breaks and the "____" rules between corpus sections
+_BOUNDARY_RE = re.compile(r"(?<=[.!?;:])\s+|\s*\n+\s*|\s*_{3,}\s*")
+
+
+def _sentence_spans(text: str) -> list:
+    """(start, end) offsets of the sentences in text, whitespace excluded."""
+    spans = []
+    position = 0
+
+    for match in _BOUNDARY_RE.finditer(text):
+        if match.start() > position:
+            spans.append((position, match.start()))
+        position = match.end()
+
+    if position < len(text):
+        spans.append((position, len(text)))
+
+    return [(s, e) for s, e in spans if text[s:e].strip()]
+
+
+def _split_long_span(text: str, start: int, end: int, max_tokens: int) -> list:
+    """Cut a single over-long sentence at whitespace into pieces that fit."""
+    pieces = []
+    max_chars = max_tokens * CHARS_PER_TOKEN
+
+    while end - start > max_chars:
+        cut = text.rfind(" ", start, start + max_chars)
+        if cut <= start:
+            cut = start + max_chars
+        pieces.append((start, cut))
+        start = cut
+        while start < end and text[start].isspace():
+            start += 1
+
+    if start < end:
+        pieces.append((start, end))
+
+    return pieces
+
+
+def split_into_passages(text: str, max_tokens: int = 128, overlap_sentences: int = 0) -> list:
+    """
+    Split a corpus document into token-bounded passages along sentence
+    boundaries. Offsets index into the original text, so a passage is
+    always text[start:end].
+
+    Args:
+        text: Document text
+        max_tokens: Upper bound per passage (estimate_tokens)
+        overlap_sentences: Sentences repeated at the start of the next passage
+
+    Returns:
+        List of {"text", "start", "end"} in document order
+    """
+    spans = []
+    for start, end in _sentence_spans(text or ""):
+        if estimate_tokens(text[start:end]) > max_tokens:
+            spans.extend(_split_long_span(text, start, end, max_tokens))
+        else:
+            spans.append((start, end))
+
+    passages = []
+    i = 0
+
+    while i < len(spans):
+        j = i + 1
+        while j < len(spans) and estimate_tokens(text[spans[i][0]:spans[j][1]]) <= max_tokens:
+            j += 1
+
+        start, end = spans[i][0], spans[j - 1][1]
+        passages.append({"text": text[start:end], "start": start, "end": end})
+
+        if j >= len(spans):
+            break
+        i = max(i + 1, j - overlap_sentences)
+
+    return passages
@@ -55,10 +55,7 @@ Allowed Subdomains (use exact wording):
 - System And Services Acquisition Policy
 - Vulnerability Scanning
 
-Policy Text:
-{policy_text}
-
-At the end, return the result as JSON in the following format:
+Return the result as JSON in the following format:
 {{
   "ISMS": {{
     "text": [],
@@ -77,26 +74,16 @@ At the end, return the result as JSON in the following format:
     "subdomains": []
   }}
 }}
+
+Policy Text:
+{policy_text}
 """
 
 GAP_ANALYSIS_PROMPT = """
 You are a cybersecurity compliance auditor specializing in NIST framework alignment.
 
 Your task is to analyze an organization's security policy and compare it against the
-relevant NIST controls provided.
-
-Domain: {domain}
-Subdomain: {subdomain}
-
-Organization Policy:
-\"\"\"
-{organization_policy}
-\"\"\"
-
-Relevant NIST Policy Extracts:
-\"\"\"
-{nist_chunks}
-\"\"\"
+relevant NIST controls provided at the end of this message.
 
 Audit Guidelines:
 
@@ -120,12 +107,13 @@ Output Rules:
 - Do NOT include explanations outside JSON.
 - If no gaps are found, return an empty "gap_analysis" list.
 - If "gap_analysis" is empty, the roadmap sections should contain empty lists.
+- Set "domain" and "subdomain" to the Domain and Subdomain given below.
 
 Output format:
 
 {{
-  "domain": "{domain}",
-  "subdomain": "{subdomain}",
+  "domain": "Domain",
+  "subdomain": "Subdomain",
   "gap_analysis": [
     {{
       "gap_id": "GAP-001",
@@ -169,4 +157,52 @@ Output format:
     ]
   }}
 }}
-"""
\ No newline at end of file
+
+Domain: {domain}
+Subdomain: {subdomain}
+
+Organization Policy:
+\"\"\"
+{organization_policy}
+\"\"\"
+
+Relevant NIST Policy Extracts:
+\"\"\"
+{nist_chunks}
+\"\"\"
+"""
+NIST_DIGEST_PROMPT = """
+You are a cybersecurity compliance analyst.
+
+Condense the following NIST/CIS policy extract into a short list of the
+concrete, checkable requirements it states.
+
+Source: {source}
+Domain: {domain}
+Subdomain: {subdomain}
+
+Policy Extract:
+\"\"\"
+{text}
+\"\"\"
+
+Rules:
+
+- Each requirement is one short imperative sentence (e.g. "Encrypt backups at rest").
+- Keep control identifiers, standards, time limits and frequencies that appear in the text.
+- Leave out purpose statements, references, definitions and boilerplate.
+- Do NOT add requirements that are not in the text.
+- Return at most {max_requirements} requirements, most important first.
+
+Output Rules:
+
+- Return ONLY valid JSON.
+
+Output format:
+
+{{
+  "requirements": [
+    "Concrete requirement"
+  ]
+}}
+"""
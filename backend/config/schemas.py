@@ -0,0 +1,119 @@
+"""
+JSON schemas for structured LLM output.
+
+Passed to Ollama as `format` (or compiled to a grammar for llama.cpp) so
+the model can only emit JSON of the expected shape. They mirror the
+output formats described in the prompts.
+"""
+from backend.config.subdomains import ALLOWED_SUBDOMAINS, VALID_DOMAINS
+
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+
+def _roadmap_items():
+    return {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "action": {"type": "string"},
+                "timeline": {"type": "string"},
+                "priority": {"type": "string", "enum": ["Critical", "High", "Medium", "Low"]},
+                "resources": {"type": "string"}
+            },
+            "required": ["action", "timeline", "priority"]
+        }
+    }
+
+
+GAP_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "domain": {"type": "string"},
+        "subdomain": {"type": "string"},
+        "gap_analysis": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "gap_id": {"type": "string"},
+                    "description": {"type": "string"},
+                    "nist_reference": {"type": "string"},
+                    "severity": {"type": "string", "enum": ["High", "Medium", "Low"]},
+                    "impact": {"type": "string"}
+                },
+                "required": ["gap_id", "description", "nist_reference", "severity", "impact"]
+            }
+        },
+        "revised_policy": {
+            "type": "object",
+            "properties": {
+                "introduction": {"type": "string"},
+                "statements": _STRING_LIST,
+                "compliance_notes": {"type": "string"}
+            },
+            "required": ["introduction", "statements", "compliance_notes"]
+        },
+        "implementation_roadmap": {
+            "type": "object",
+            "properties": {
+                "short_term": _roadmap_items(),
+                "mid_term": _roadmap_items(),
+                "long_term": _roadmap_items()
+            },
+            "required": ["short_term", "mid_term", "long_term"]
+        }
+    },
+    "required": ["domain", "subdomain", "gap_analysis", "revised_policy", "implementation_roadmap"]
+}
+
+
+# Keys match the domain names in DOMAIN_CHUNKING_PROMPT
+CHUNKING_DOMAINS = [
+    "ISMS",
+    "Data Privacy and Security",
+    "Patch Management",
+    "Risk Management"
+]
+
+DOMAIN_CHUNKING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        domain: {
+            "type": "object",
+            "properties": {
+                "text": _STRING_LIST,
+                "subdomains": {
+                    "type": "array",
+                    "items": {"type": "string", "enum": ALLOWED_SUBDOMAINS}
+                }
+            },
+            "required": ["text", "subdomains"]
+        }
+        for domain in CHUNKING_DOMAINS
+    },
+    "required": CHUNKING_DOMAINS
+}
+
+
+BATCH_CLASSIFICATION_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "sentence_id": {"type": "integer"},
+            "domain": {"type": "string", "enum": VALID_DOMAINS},
+            "subdomain": {"type": "string", "enum": ALLOWED_SUBDOMAINS}
+        },
+        "required": ["sentence_id", "domain", "subdomain"]
+    }
+}
+
+
+NIST_DIGEST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "requirements": _STRING_LIST
+    },
+    "required": ["requirements"]
+}
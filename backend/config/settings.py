@@ -0,0 +1,148 @@
+import os
+from pathlib import Path
+
+# -------- Paths --------
+BASE_DIR = Path(__file__).resolve().parents[2]
+DB_DIR = BASE_DIR / "backend" / "db"
+
+# -------- Gap analysis result cache --------
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") == "1"
+RESULT_CACHE_PATH = Path(os.getenv("RESULT_CACHE_PATH", DB_DIR / "cache" / "gap_analysis.sqlite"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "2000"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# -------- PDF extraction / OCR --------
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+PDF_TEXT_WINDOW_SIZE = int(os.getenv("PDF_TEXT_WINDOW_SIZE", "16"))
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+OCR_WINDOW_SIZE = int(os.getenv("OCR_WINDOW_SIZE", "2"))
+# Pages whose text layer has fewer characters than this are OCR'd
+PAGE_MIN_TEXT_CHARS = int(os.getenv("PAGE_MIN_TEXT_CHARS", "40"))
+
+# -------- Background jobs --------
+JOB_DB_PATH = Path(os.getenv("JOB_DB_PATH", DB_DIR / "jobs.sqlite"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Runs per job: covers crashes and transient errors (Ollama down, timeouts)
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Seconds before the first retry of a transient failure, doubled per attempt
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "10"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+
+# -------- LLM concurrency --------
+# Keep in line with the Ollama server's OLLAMA_NUM_PARALLEL
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", os.getenv("OLLAMA_NUM_PARALLEL", "4")))
+
+# -------- Domain chunking --------
+# "single" sends the whole policy in one prompt, "windowed" always uses
+# map-reduce windows, "auto" switches to windows for long policies.
+CHUNKING_MODE = os.getenv("CHUNKING_MODE", "auto")
+# The model echoes every sentence back, so a window must fit in num_predict
+CHUNK_WINDOW_TOKENS = int(os.getenv("CHUNK_WINDOW_TOKENS", "600"))
+
+# -------- Sentence classification --------
+# "hybrid" classifies with embedding centroids and sends only
+# low-confidence sentences to the LLM; "llm" uses the LLM for everything.
+SENTENCE_CLASSIFIER = os.getenv("SENTENCE_CLASSIFIER", "hybrid")
+CLASSIFIER_CONFIDENCE_THRESHOLD = float(os.getenv("CLASSIFIER_CONFIDENCE_THRESHOLD", "0.35"))
+CENTROIDS_PATH = Path(os.getenv("CENTROIDS_PATH", DB_DIR / "centroids.npz"))
+
+# -------- Retrieval --------
+# "chroma" queries the Chroma collection, "mmap" the in-process
+# memory-mapped index written by nist_ingest.py
+RETRIEVAL_ENGINE = os.getenv("RETRIEVAL_ENGINE", "chroma")
+VECTOR_INDEX_DIR = Path(os.getenv("VECTOR_INDEX_DIR", DB_DIR / "vector_index"))
+# NIST records per gap-analysis prompt
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "3"))
+# Fuse dense results with the BM25 index (written next to the vector
+# index) by reciprocal rank fusion
+RETRIEVAL_HYBRID = os.getenv("RETRIEVAL_HYBRID", "1") == "1"
+# Candidates taken from each ranking (and per sentence in multi-vector
+# mode) before fusion/aggregation
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+BM25_K1 = float(os.getenv("BM25_K1", "1.5"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# "multi" embeds every sentence of the query text and aggregates the
+# per-sentence matches per control; "single" embeds the whole text,
+# of which MiniLM only reads the first 256 word pieces
+RETRIEVAL_QUERY_MODE = os.getenv("RETRIEVAL_QUERY_MODE", "multi")
+# Rank multi-vector matches by "sum_top_n" or "max" (best sentence)
+MULTI_VECTOR_AGGREGATION = os.getenv("MULTI_VECTOR_AGGREGATION", "sum_top_n")
+MULTI_VECTOR_TOP_N = int(os.getenv("MULTI_VECTOR_TOP_N", "3"))
+MULTI_VECTOR_MAX_SENTENCES = int(os.getenv("MULTI_VECTOR_MAX_SENTENCES", "256"))
+# "passage" matches and returns token-bounded passages of the corpus
+# documents, "parent" matches passages but returns their deduplicated
+# parent documents, "document" matches whole documents
+RETRIEVAL_GRANULARITY = os.getenv("RETRIEVAL_GRANULARITY", "passage")
+PASSAGE_INDEX_DIR = Path(os.getenv("PASSAGE_INDEX_DIR", VECTOR_INDEX_DIR / "passages"))
+# MiniLM reads at most 256 word pieces; stay well inside that
+PASSAGE_MAX_TOKENS = int(os.getenv("PASSAGE_MAX_TOKENS", "128"))
+PASSAGE_OVERLAP_SENTENCES = int(os.getenv("PASSAGE_OVERLAP_SENTENCES", "1"))
+
+# -------- NIST digests --------
+# "digest" puts the precomputed requirement list of each NIST record into
+# the gap-analysis prompt (raw text where no digest exists yet), "raw"
+# always uses the raw text. Digests are built by ingest/build_nist_digests.py.
+NIST_PROMPT_MODE = os.getenv("NIST_PROMPT_MODE", "digest")
+NIST_DIGEST_PATH = Path(os.getenv("NIST_DIGEST_PATH", DB_DIR / "nist_digests.jsonl"))
+NIST_DIGEST_MAX_REQUIREMENTS = int(os.getenv("NIST_DIGEST_MAX_REQUIREMENTS", "8"))
+
+# -------- Embedding cache --------
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "1") == "1"
+EMBEDDING_CACHE_MEMORY_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "20000"))
+# Leave empty to keep the cache in memory only
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", str(DB_DIR / "cache" / "embeddings.sqlite"))
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")
+
+# -------- Embedding backend --------
+# "torch" (SentenceTransformer), "onnx" (fp32 ONNX Runtime) or
+# "onnx-int8" (dynamically quantized ONNX Runtime)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = Path(os.getenv("ONNX_MODEL_DIR", BASE_DIR / "backend" / "embeddings" / "models" / "all-MiniLM-L6-v2-onnx"))
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))
+
+# -------- Ollama client --------
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+OLLAMA_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "300"))
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_MAX_RETRIES = int(os.getenv("OLLAMA_MAX_RETRIES", "3"))
+OLLAMA_HEALTH_INTERVAL = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "15"))
+OLLAMA_START_TIMEOUT = float(os.getenv("OLLAMA_START_TIMEOUT", "30"))
+
+# -------- LLM backend --------
+# "ollama" talks to the Ollama server, "llama_cpp" runs a GGUF model in-process
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama")
+LLAMA_MODEL_PATH = Path(os.getenv("LLAMA_MODEL_PATH", BASE_DIR / "models" / "Mistral-7B-Instruct-v0.3-Q5_K_M.gguf"))
+LLAMA_N_CTX = int(os.getenv("LLAMA_N_CTX", "8192"))
+LLAMA_N_THREADS = int(os.getenv("LLAMA_N_THREADS", str(os.cpu_count() or 4)))
+
+# -------- Prompt budget --------
+# Upper bound on gap-analysis prompt tokens (0 disables trimming). Keep
+# budget + num_predict within the model's context window.
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+# Backends without a local tokenizer (Ollama) are budgeted with the
+# chars/4 estimate, inflated by this share: it undercounts Mistral tokens
+# on control identifiers and lists
+PROMPT_TOKEN_MARGIN = float(os.getenv("PROMPT_TOKEN_MARGIN", "0.25"))
+# Share of the variable budget reserved for the policy text; unused
+# space on either side goes to the other
+PROMPT_POLICY_SHARE = float(os.getenv("PROMPT_POLICY_SHARE", "0.5"))
+
+# -------- Structured output --------
+# Constrain LLM output to the JSON schemas in config/schemas.py
+# (Ollama `format`, llama.cpp grammar). Needs Ollama >= 0.5.
+STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "1") == "1"
+
+# -------- Batch upload --------
+# Documents extracted in parallel (one process each); LLM chunking of the
+# extracted documents shares LLM_CONCURRENCY with every other caller
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", str(os.cpu_count() or 1)))
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "200"))
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "256"))
+# Cap on the total uncompressed size of the zip members in one batch
+BATCH_MAX_UNCOMPRESSED_MB = int(os.getenv("BATCH_MAX_UNCOMPRESSED_MB", "2048"))
+
+# -------- Document store --------
+# Content-addressed uploads (blobs/) and per-stage artifacts (artifacts/)
+DOCUMENT_STORE_DIR = Path(os.getenv("DOCUMENT_STORE_DIR", DB_DIR / "documents"))
@@ -34,3 +34,32 @@ ALLOWED_SUBDOMAINS = [
     "System And Services Acquisition Policy",
     "Vulnerability Scanning",
 ]
+
+# Domain labels used by sentence classification
+VALID_DOMAINS = [
+    "Information Security Management System (ISMS)",
+    "Data Privacy and Security",
+    "Patch Management",
+    "Risk Management",
+]
+
+# Corpus (cis_policy_chunks_clean.json) domain → classification domain
+CORPUS_DOMAIN_LABELS = {
+    "ISMS": "Information Security Management System (ISMS)",
+    "Data Privacy & Security": "Data Privacy and Security",
+    "Patch Management": "Patch Management",
+    "Risk Management": "Risk Management",
+}
+
+_SUBDOMAIN_LOOKUP = {s.lower(): s for s in ALLOWED_SUBDOMAINS}
+
+
+def corpus_subdomain_label(subdomain: str):
+    """
+    Map a corpus subdomain slug (e.g. 'Encryption-Standard') to its entry
+    in ALLOWED_SUBDOMAINS ('Encryption'). Returns None when unknown.
+    """
+    name = (subdomain or "").replace("-", " ").strip().lower()
+    if name.endswith(" standard"):
+        name = name[:-len(" standard")]
+    return _SUBDOMAIN_LOOKUP.get(name)
@@ -1,14 +1,6 @@
-import json
-import re
 from backend.config.prompts import DOMAIN_INFERENCE_PROMPT
 from backend.llm.mistral_client import call_llm
-
-
-def extract_json(text: str) -> dict | None:
-    match = re.search(r"\{.*\}", text, re.DOTALL)
-    if not match:
-        return None
-    return json.loads(match.group())
+from backend.utils.json_extractor import extract_json
 
 
 def infer_domain_and_subdomain(policy_text: str) -> dict:
@@ -16,7 +8,7 @@ def infer_domain_and_subdomain(policy_text: str) -> dict:
 
     response = call_llm(prompt)
 
-    data = extract_json(response)
+    data = extract_json(response, expect=dict)
 
     if not data:
         return {
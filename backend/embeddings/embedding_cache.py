@@ -0,0 +1,177 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+# Arguments that change how encode runs but not what it returns
+_NON_SEMANTIC_KWARGS = {"batch_size", "show_progress_bar", "device"}
+
+
+class PersistentVectorStore:
+    """
+    SQLite table of text-hash → vector blob, stored as float16 or float32.
+    """
+
+    def __init__(self, path: Path, dtype: str = "float16"):
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectors ("
+                " key TEXT PRIMARY KEY,"
+                " dtype TEXT NOT NULL,"
+                " vector BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get_many(self, keys: list) -> dict:
+        found = {}
+
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, dtype, vector FROM vectors WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+
+                for key, dtype, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=dtype).astype(np.float32)
+
+        return found
+
+    def put_many(self, items: dict):
+        rows = [
+            (key, self.dtype.name, np.asarray(vector, dtype=self.dtype).tobytes())
+            for key, vector in items.items()
+        ]
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (key, dtype, vector) VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+
+class CachedEmbedder:
+    """
+    Two-tier cache in front of a SentenceTransformer-style model.
+
+    Tier 1 is an in-process LRU, tier 2 an optional PersistentVectorStore.
+    encode() keeps the model's contract (str → 1-D array, list → 2-D array)
+    and only sends cache misses to the model, in a single batch.
+    """
+
+    def __init__(self, model, model_id: str, max_entries: int = 20000, store: PersistentVectorStore = None):
+        self.model = model
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.store = store
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name):
+        # Everything else (tokenizer, max_seq_length, ...) comes from the model
+        return getattr(self.model, name)
+
+    def _key(self, text: str, options: str) -> str:
+        payload = f"{self.model_id}\0{options}\0{text}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def encode(self, sentences, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        options = json.dumps(
+            {k: v for k, v in kwargs.items() if k not in _NON_SEMANTIC_KWARGS},
+            sort_keys=True,
+            default=str
+        )
+        keys = [self._key(text, options) for text in texts]
+        vectors = {}
+
+        # Tier 1: in-process LRU
+        with self._lock:
+            for key in keys:
+                if key in self._memory and key not in vectors:
+                    self._memory.move_to_end(key)
+                    vectors[key] = self._memory[key]
+            self.memory_hits += sum(1 for key in keys if key in vectors)
+
+        # Tier 2: persistent store, one batched lookup
+        remaining = list(dict.fromkeys(k for k in keys if k not in vectors))
+        if remaining and self.store is not None:
+            stored = self.store.get_many(remaining)
+            vectors.update(stored)
+            with self._lock:
+                for key, vector in stored.items():
+                    self._remember(key, vector)
+                self.store_hits += sum(1 for key in keys if key in stored)
+
+        # Misses: one model call for all unique missing texts
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+
+        if missing:
+            computed = np.asarray(
+                self.model.encode(list(missing.values()), **kwargs),
+                dtype=np.float32
+            )
+            fresh = dict(zip(missing.keys(), computed))
+            vectors.update(fresh)
+
+            with self._lock:
+                for key, vector in fresh.items():
+                    self._remember(key, vector)
+                self.misses += sum(1 for key in keys if key in fresh)
+
+            if self.store is not None:
+                self.store.put_many(fresh)
+
+        if single:
+            return vectors[keys[0]]
+
+        if not keys:
+            return np.empty((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        return np.stack([vectors[key] for key in keys])
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.store_hits + self.misses
+        return {
+            "model_id": self.model_id,
+            "memory_entries": len(self._memory),
+            "store_entries": len(self.store) if self.store is not None else None,
+            "memory_hits": self.memory_hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.store_hits) / lookups if lookups else 0.0
+        }
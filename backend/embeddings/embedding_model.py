@@ -1,13 +1,104 @@
+import threading
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
+from backend.config.settings import (
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_MEMORY_ENTRIES,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_DTYPE,
+    EMBEDDING_BACKEND,
+    ONNX_MODEL_DIR
+)
+from backend.embeddings.embedding_cache import CachedEmbedder, PersistentVectorStore
+from backend.utils.metrics import span
 
 _embedder = None
+_cached = None
+_lock = threading.Lock()
 BASE_DIR = Path(__file__).resolve().parents[2]
 MODEL_PATH = BASE_DIR / "backend" / "embeddings" / "models" / "all-MiniLM-L6-v2"
+MODEL_ID = MODEL_PATH.name
+
+
+def load_backend_model(backend: str = None):
+    """
+    Load the uncached embedder for the given backend
+    ("torch", "onnx" or "onnx-int8"; defaults to EMBEDDING_BACKEND).
+    """
+    backend = backend or EMBEDDING_BACKEND
+
+    # Imported here so importing this module stays cheap
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(str(MODEL_PATH))
+
+    if backend in ("onnx", "onnx-int8"):
+        from backend.embeddings.onnx_backend import (
+            OnnxEmbedder,
+            export_onnx,
+            FP32_FILE,
+            INT8_FILE
+        )
+
+        quantized = backend == "onnx-int8"
+        if not (ONNX_MODEL_DIR / (INT8_FILE if quantized else FP32_FILE)).exists():
+            export_onnx(MODEL_PATH, ONNX_MODEL_DIR, quantize=quantized)
+
+        return OnnxEmbedder(ONNX_MODEL_DIR, quantized=quantized)
+
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+
+
+class TimedEmbedder:
+    """Records every encode() call as the "embedding" pipeline stage."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def encode(self, sentences, **kwargs):
+        with span("embedding"):
+            return self.model.encode(sentences, **kwargs)
+
+
 def load_embedding_model():
-    global _embedder
+    """
+    Return the shared embedder. With EMBEDDING_CACHE_ENABLED it is wrapped
+    in a CachedEmbedder, which keeps the same encode() contract.
+
+    The warm-up thread and the first request may both get here; the lock
+    makes sure the model is only loaded once.
+    """
+    global _embedder, _cached
 
     if _embedder is None:
-        _embedder = SentenceTransformer(str(MODEL_PATH))
+        with _lock:
+            if _embedder is None:
+                model = load_backend_model()
+
+                if EMBEDDING_CACHE_ENABLED:
+                    store = PersistentVectorStore(
+                        Path(EMBEDDING_CACHE_PATH), dtype=EMBEDDING_CACHE_DTYPE
+                    ) if EMBEDDING_CACHE_PATH else None
+
+                    model = CachedEmbedder(
+                        model,
+                        # Backends differ slightly numerically, so cache them apart
+                        model_id=f"{MODEL_ID}:{EMBEDDING_BACKEND}",
+                        max_entries=EMBEDDING_CACHE_MEMORY_ENTRIES,
+                        store=store
+                    )
+                    _cached = model
+
+                _embedder = TimedEmbedder(model)
+
+    return _embedder
+
 
-    return _embedder
\ No newline at end of file
+def embedding_cache_stats():
+    """Hit rates of the embedding cache, or None if it is not active yet."""
+    if _cached is not None:
+        return _cached.stats()
+    return None
@@ -0,0 +1,185 @@
+"""
+ONNX Runtime backend for the MiniLM sentence embedder.
+
+Export the local model once (optionally with dynamic int8 quantization):
+
+    python backend/embeddings/onnx_backend.py --quantize
+
+and select it with EMBEDDING_BACKEND=onnx or EMBEDDING_BACKEND=onnx-int8.
+"""
+import sys
+import os
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root is on PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.config.settings import ONNX_MODEL_DIR, ONNX_THREADS
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model-int8.onnx"
+
+# all-MiniLM-L6-v2 truncates to 256 word pieces
+MAX_SEQ_LENGTH = 256
+
+
+def export_onnx(model_path: Path, output_dir: Path = ONNX_MODEL_DIR, quantize: bool = True) -> Path:
+    """
+    Export the local transformer to ONNX (and an int8 copy when quantize
+    is set). The tokenizer is saved alongside so inference needs no torch.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(str(model_path))
+    model = AutoModel.from_pretrained(str(model_path))
+    model.eval()
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+
+    print(f"🔄 Exporting ONNX model to {output_dir / FP32_FILE}...")
+    torch.onnx.export(
+        model,
+        (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+        str(output_dir / FP32_FILE),
+        input_names=["input_ids", "attention_mask", "token_type_ids"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "token_type_ids": {0: "batch", 1: "sequence"},
+            "last_hidden_state": {0: "batch", 1: "sequence"},
+        },
+        opset_version=14
+    )
+    tokenizer.save_pretrained(str(output_dir))
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        print(f"🔄 Quantizing to {output_dir / INT8_FILE}...")
+        quantize_dynamic(
+            str(output_dir / FP32_FILE),
+            str(output_dir / INT8_FILE),
+            weight_type=QuantType.QInt8
+        )
+
+    print("✅ ONNX export complete")
+    return output_dir
+
+
+class OnnxEmbedder:
+    """
+    Drop-in replacement for SentenceTransformer.encode backed by ONNX
+    Runtime: mean pooling over the attention mask, then L2 normalization,
+    matching all-MiniLM-L6-v2's Pooling + Normalize modules.
+    """
+
+    def __init__(self, model_dir: Path = ONNX_MODEL_DIR, quantized: bool = False):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_file = Path(model_dir) / (INT8_FILE if quantized else FP32_FILE)
+
+        options = ort.SessionOptions()
+        if ONNX_THREADS:
+            options.intra_op_num_threads = ONNX_THREADS
+
+        self.session = ort.InferenceSession(
+            str(model_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.quantized = quantized
+        self._dimension = None
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = int(self.encode(["dimension probe"]).shape[1])
+        return self._dimension
+
+    def _encode_batch(self, texts: list) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=MAX_SEQ_LENGTH,
+            return_tensors="np"
+        )
+        feeds = {
+            name: tokens[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in self.input_names and name in tokens
+        }
+
+        hidden = self.session.run(["last_hidden_state"], feeds)[0]
+
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs):
+        """
+        Same contract as SentenceTransformer.encode: a str gives a 1-D
+        vector, a list gives a 2-D array. Output is always normalized, as
+        with the torch model.
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        if not texts:
+            return np.empty((0, self._dimension or 0), dtype=np.float32)
+
+        # Sort by length so each batch pads to a similar size
+        order = np.argsort([len(t) for t in texts])
+        batches = []
+
+        for start in range(0, len(texts), batch_size):
+            batch_idx = order[start:start + batch_size]
+            batches.append((batch_idx, self._encode_batch([texts[i] for i in batch_idx])))
+
+        output = np.empty((len(texts), batches[0][1].shape[1]), dtype=np.float32)
+        for batch_idx, vectors in batches:
+            output[batch_idx] = vectors
+
+        return output[0] if single else output
+
+
+def parity_check(reference, candidate, texts: list, batch_size: int = 32) -> dict:
+    """
+    Cosine agreement between two embedders on the same texts
+    (e.g. torch vs ONNX on the NIST corpus).
+    """
+    a = np.asarray(reference.encode(texts, batch_size=batch_size, normalize_embeddings=True), dtype=np.float32)
+    b = np.asarray(candidate.encode(texts, batch_size=batch_size), dtype=np.float32)
+
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    cosine = (a * b).sum(axis=1)
+
+    return {
+        "count": len(texts),
+        "mean_cosine": float(cosine.mean()),
+        "min_cosine": float(cosine.min()),
+        "p01_cosine": float(np.percentile(cosine, 1))
+    }
+
+
+if __name__ == "__main__":
+    from backend.embeddings.embedding_model import MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Export the MiniLM embedder to ONNX")
+    parser.add_argument("--quantize", action="store_true", help="Also write a dynamic int8 model")
+    parser.add_argument("--output", type=Path, default=ONNX_MODEL_DIR)
+    args = parser.parse_args()
+
+    export_onnx(MODEL_PATH, args.output, quantize=args.quantize)
@@ -0,0 +1,168 @@
+import sys
+import os
+import json
+import time
+import threading
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Ensure project root is on PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.config.prompts import NIST_DIGEST_PROMPT
+from backend.config.schemas import NIST_DIGEST_SCHEMA
+from backend.config.settings import (
+    LLM_CONCURRENCY,
+    NIST_DIGEST_PATH,
+    NIST_DIGEST_MAX_REQUIREMENTS,
+    VECTOR_INDEX_DIR
+)
+from backend.ingest.nist_ingest import JSON_PATH, content_hash
+from backend.llm.mistral_client import call_llm
+from backend.services.nist_digests import attach_digests, digest_version, load_digests
+from backend.services.vector_index import MANIFEST_FILE
+from backend.utils.json_extractor import extract_json
+
+
+def digest_record(item: dict) -> list:
+    """Ask the LLM for the requirement list of one corpus record."""
+    prompt = NIST_DIGEST_PROMPT.format(
+        source=item.get("source") or "Unknown",
+        domain=item.get("domain") or "N/A",
+        subdomain=item.get("subdomain") or "N/A",
+        text=item["text"],
+        max_requirements=NIST_DIGEST_MAX_REQUIREMENTS
+    )
+
+    result = extract_json(call_llm(prompt, schema=NIST_DIGEST_SCHEMA), expect=dict) or {}
+
+    requirements = [
+        " ".join(str(r).split())
+        for r in result.get("requirements") or []
+        if str(r).strip()
+    ]
+    return requirements[:NIST_DIGEST_MAX_REQUIREMENTS]
+
+
+def build_digests(json_path: Path = JSON_PATH, path: Path = NIST_DIGEST_PATH,
+                  concurrency: int = LLM_CONCURRENCY, limit: int = None) -> dict:
+    """
+    Build a digest for every corpus record that has none for its current
+    content and the current digest version.
+
+    Each finished digest is appended to the JSONL checkpoint right away,
+    so an interrupted build resumes where it stopped. Failed records are
+    left out and retried on the next run.
+
+    Returns:
+        Counts of built, up-to-date and failed records
+    """
+    started = time.perf_counter()
+    version = digest_version()
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        nist_data = json.load(f)
+
+    existing = load_digests(path)
+    hashes = {item["id"]: content_hash(item) for item in nist_data}
+
+    pending = [
+        item for item in nist_data
+        if existing.get(item["id"], {}).get("content_hash") != hashes[item["id"]]
+    ]
+    up_to_date = len(nist_data) - len(pending)
+    if limit is not None:
+        pending = pending[:limit]
+
+    print(
+        f"📊 {len(nist_data)} records: {len(pending)} to digest, "
+        f"{up_to_date} up to date (version {version})"
+    )
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_lock = threading.Lock()
+    built = failed = 0
+    source_chars = digest_chars = 0
+
+    with open(path, "a", encoding="utf-8") as checkpoint, \
+            ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+
+        futures = {pool.submit(digest_record, item): item for item in pending}
+
+        for future in as_completed(futures):
+            item = futures[future]
+
+            try:
+                requirements = future.result()
+            except Exception as e:
+                print(f"❌ Digest failed for {item['id']}: {e}")
+                failed += 1
+                continue
+
+            if not requirements:
+                print(f"⚠️ Empty digest for {item['id']}, will retry next run")
+                failed += 1
+                continue
+
+            entry = {
+                "id": item["id"],
+                "content_hash": hashes[item["id"]],
+                "version": version,
+                "requirements": requirements,
+                "built_at": time.time()
+            }
+
+            with write_lock:
+                checkpoint.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                checkpoint.flush()
+
+            built += 1
+            source_chars += len(item["text"])
+            digest_chars += sum(len(r) for r in requirements)
+            print(f"  {built + failed}/{len(pending)} {item['id']}: {len(requirements)} requirements")
+
+    if source_chars:
+        print(f"📉 Digests are {source_chars / max(digest_chars, 1):.1f}x smaller than the raw text")
+
+    if (VECTOR_INDEX_DIR / MANIFEST_FILE).exists():
+        attached = attach_digests(VECTOR_INDEX_DIR, path)
+        print(f"✅ {attached} digests stored in the index metadata at {VECTOR_INDEX_DIR}")
+    else:
+        print("⚠️ No vector index yet; digests are attached by the next nist_ingest.py run")
+
+    print(f"✅ Digest build finished ({time.perf_counter() - started:.2f}s)")
+
+    return {"built": built, "up_to_date": up_to_date, "failed": failed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build compact NIST/CIS requirement digests with the LLM")
+    parser.add_argument(
+        "--json",
+        type=Path,
+        default=JSON_PATH,
+        help="Path to the corpus JSON"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=NIST_DIGEST_PATH,
+        help="JSONL checkpoint the digests are appended to"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=LLM_CONCURRENCY,
+        help="LLM calls in flight"
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="Digest at most this many records in this run"
+    )
+
+    args = parser.parse_args()
+    build_digests(json_path=args.json, path=args.output, concurrency=args.concurrency, limit=args.limit)
@@ -1,14 +1,33 @@
 import sys
 import os
 import json
-import chromadb
+import time
+import hashlib
+import argparse
 from pathlib import Path
-from chromadb import PersistentClient   
+from chromadb import PersistentClient
 
 # Ensure project root is on PYTHONPATH
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 from backend.embeddings.embedding_model import load_embedding_model
+from backend.config.settings import (
+    CENTROIDS_PATH,
+    VECTOR_INDEX_DIR,
+    PASSAGE_INDEX_DIR,
+    PASSAGE_MAX_TOKENS,
+    PASSAGE_OVERLAP_SENTENCES
+)
+from backend.chunking.embedding_classifier import build_centroids
+from backend.chunking.passage_splitter import split_into_passages
+from backend.services.vector_index import (
+    build_vector_index,
+    MANIFEST_FILE,
+    METADATA_COLUMNS,
+    PASSAGE_METADATA_COLUMNS
+)
+from backend.services.lexical_index import build_lexical_index, LEXICAL_MANIFEST_FILE
+from backend.services.nist_digests import attach_digests
 
 # -------- Paths (SAFE & CORRECT) --------
 BASE_DIR = Path(__file__).resolve().parents[2]
@@ -17,41 +36,226 @@ JSON_PATH = BASE_DIR / "backend" / "data" / "cis_policy_chunks_clean.json"
 DB_PATH = BASE_DIR / "backend" / "db" / "chroma"
 
 COLLECTION_NAME = "nist_controls"
+PASSAGE_COLLECTION_NAME = "nist_passages"
+DEFAULT_BATCH_SIZE = 64
 
-# -------- Safety check --------
-if DB_PATH.exists() and any(DB_PATH.iterdir()):
-    print("✅ ChromaDB already exists. Skipping ingestion.")
-    exit()
 
-# -------- Load JSON --------
-print("🔄 Loading JSON...")
-with open(JSON_PATH, "r", encoding="utf-8") as f:
-    nist_data = json.load(f)
+def content_hash(item: dict) -> str:
+    """Hash of everything that ends up in the index for one record."""
+    payload = json.dumps(
+        [item["text"], item.get("domain"), item.get("subdomain"), item.get("source")],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_metadata(item: dict, digest: str) -> dict:
+    return {
+        "domain": item.get("domain"),
+        "subdomain": item.get("subdomain"),
+        "source": item.get("source"),
+        "content_hash": digest
+    }
+
+
+def passage_hash(parent_digest: str) -> str:
+    """Passages change with their parent and with the splitting settings."""
+    payload = json.dumps([parent_digest, PASSAGE_MAX_TOKENS, PASSAGE_OVERLAP_SENTENCES])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_passages(item: dict, digest: str) -> list:
+    """Token-bounded passages of one record as (id, text, metadata)."""
+    passages = split_into_passages(
+        item["text"],
+        max_tokens=PASSAGE_MAX_TOKENS,
+        overlap_sentences=PASSAGE_OVERLAP_SENTENCES
+    )
+
+    return [
+        (
+            f"{item['id']}#p{n:03d}",
+            passage["text"],
+            {
+                **build_metadata(item, digest),
+                "parent_id": item["id"],
+                "start": passage["start"],
+                "end": passage["end"]
+            }
+        )
+        for n, passage in enumerate(passages)
+    ]
+
+
+def fetch_existing_hashes(collection, key: str = None) -> dict:
+    """
+    Map of id → content_hash for everything already stored, or of
+    metadata[key] → content_hash (e.g. parent_id for passages).
+    """
+    existing = collection.get(include=["metadatas"])
+    return {
+        ((meta or {}).get(key) if key else doc_id): (meta or {}).get("content_hash")
+        for doc_id, meta in zip(existing.get("ids", []), existing.get("metadatas", []))
+    }
+
 
-# -------- Load embedding model --------
-print("🔄 Loading embedding model...")
-embedder = load_embedding_model()
+def upsert_in_batches(collection, embedder, records: list, batch_size: int, label: str):
+    """Embed and upsert (id, text, metadata) records batch by batch."""
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        batch_started = time.perf_counter()
 
-# -------- Init ChromaDB --------
-print("🔄 Initializing ChromaDB...")
-client = PersistentClient(path=str(DB_PATH))
+        embeddings = embedder.encode(
+            [text for _, text, _ in batch],
+            batch_size=batch_size
+        ).tolist()
+        encoded = time.perf_counter()
 
-collection = client.get_or_create_collection(name=COLLECTION_NAME)
+        collection.upsert(
+            ids=[doc_id for doc_id, _, _ in batch],
+            documents=[text for _, text, _ in batch],
+            metadatas=[meta for _, _, meta in batch],
+            embeddings=embeddings
+        )
+        stored = time.perf_counter()
 
-# -------- Embed & store --------
-print("🔄 Creating embeddings and storing...")
-for item in nist_data:
-    embedding = embedder.encode(item["text"]).tolist()
+        print(
+            f"  {label} batch {start // batch_size + 1}: {len(batch)} records, "
+            f"encode {encoded - batch_started:.2f}s, upsert {stored - encoded:.2f}s"
+        )
+
+
+def export_index(collection, index_dir: Path, columns: list):
+    """Rebuild one memory-mapped index (RETRIEVAL_ENGINE=mmap) and its BM25 index."""
+    started = time.perf_counter()
+    manifest = build_vector_index(collection, index_dir, columns=columns)
+    print(
+        f"✅ Vector index written to {index_dir} "
+        f"({manifest['count']} x {manifest['dim']}, {time.perf_counter() - started:.2f}s)"
+    )
+
+    started = time.perf_counter()
+    lexical = build_lexical_index(index_dir)
+    print(
+        f"✅ BM25 index written to {index_dir} "
+        f"({lexical['terms']} terms, {lexical['postings']} postings, {time.perf_counter() - started:.2f}s)"
+    )
+
+
+def export_vector_index(collection, passage_collection):
+    """Rebuild the document and passage indexes and the subdomain centroids."""
+    export_index(collection, VECTOR_INDEX_DIR, columns=METADATA_COLUMNS)
+    build_centroids(collection)
+
+    # Re-attach the digests that still match the (possibly changed) records
+    attached = attach_digests(VECTOR_INDEX_DIR)
+    print(f"✅ {attached} NIST digests attached (build more with build_nist_digests.py)")
+    export_index(passage_collection, PASSAGE_INDEX_DIR, columns=PASSAGE_METADATA_COLUMNS)
+
+
+def indexes_exist() -> bool:
+    return CENTROIDS_PATH.exists() and all(
+        (index_dir / f).exists()
+        for index_dir in (VECTOR_INDEX_DIR, PASSAGE_INDEX_DIR)
+        for f in (MANIFEST_FILE, LEXICAL_MANIFEST_FILE)
+    )
 
-    collection.add(
-        ids=[item["id"]],
-        documents=[item["text"]],
-        metadatas=[{
-            "domain": item.get("domain"),
-            "subdomain": item.get("subdomain"),
-            "source": item.get("source")
-        }],
-        embeddings=[embedding]
+
+def ingest(json_path: Path = JSON_PATH, db_path: Path = DB_PATH, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Incrementally sync the NIST/CIS JSON corpus into ChromaDB.
+
+    Only new or changed records (by content hash) are embedded; records
+    that disappeared from the JSON are deleted from the collection. The
+    token-bounded passages of each record are kept in a second
+    collection and follow the same diff.
+    """
+    started = time.perf_counter()
+
+    # -------- Load JSON --------
+    print("🔄 Loading JSON...")
+    with open(json_path, "r", encoding="utf-8") as f:
+        nist_data = json.load(f)
+
+    # -------- Init ChromaDB --------
+    print("🔄 Initializing ChromaDB...")
+    client = PersistentClient(path=str(db_path))
+    collection = client.get_or_create_collection(name=COLLECTION_NAME)
+    passage_collection = client.get_or_create_collection(name=PASSAGE_COLLECTION_NAME)
+
+    # -------- Diff against stored hashes --------
+    existing = fetch_existing_hashes(collection)
+    hashes = {item["id"]: content_hash(item) for item in nist_data}
+
+    pending = [item for item in nist_data if existing.get(item["id"]) != hashes[item["id"]]]
+    removed = [doc_id for doc_id in existing if doc_id not in hashes]
+
+    existing_passages = fetch_existing_hashes(passage_collection, key="parent_id")
+    passage_hashes = {doc_id: passage_hash(digest) for doc_id, digest in hashes.items()}
+
+    stale_parents = [doc_id for doc_id in hashes if existing_passages.get(doc_id) != passage_hashes[doc_id]]
+    orphan_parents = [doc_id for doc_id in existing_passages if doc_id not in hashes]
+
+    print(
+        f"📊 {len(nist_data)} records: {len(pending)} new/changed, "
+        f"{len(removed)} removed, {len(nist_data) - len(pending)} unchanged"
+    )
+
+    if removed:
+        collection.delete(ids=removed)
+        print(f"🗑️ Deleted {len(removed)} removed records")
+
+    if stale_parents or orphan_parents:
+        passage_collection.delete(where={"parent_id": {"$in": stale_parents + orphan_parents}})
+
+    if not pending and not stale_parents:
+        if removed or orphan_parents or not indexes_exist():
+            export_vector_index(collection, passage_collection)
+        print(f"✅ NIST embeddings up to date ({time.perf_counter() - started:.2f}s)")
+        return
+
+    # -------- Load embedding model --------
+    print("🔄 Loading embedding model...")
+    embedder = load_embedding_model()
+
+    # -------- Embed & store in batches --------
+    print(f"🔄 Creating embeddings and storing (batch size {batch_size})...")
+    upsert_in_batches(
+        collection,
+        embedder,
+        [(item["id"], item["text"], build_metadata(item, hashes[item["id"]])) for item in pending],
+        batch_size,
+        label="document"
+    )
+
+    by_id = {item["id"]: item for item in nist_data}
+    passages = [
+        passage
+        for parent_id in stale_parents
+        for passage in build_passages(by_id[parent_id], passage_hashes[parent_id])
+    ]
+    print(f"🔄 Embedding {len(passages)} passages of {len(stale_parents)} records...")
+    upsert_in_batches(passage_collection, embedder, passages, batch_size, label="passage")
+
+    export_vector_index(collection, passage_collection)
+
+    print(f"✅ NIST embeddings stored successfully ({time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest NIST/CIS controls into ChromaDB")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Records per encode/upsert batch"
+    )
+    parser.add_argument(
+        "--json",
+        type=Path,
+        default=JSON_PATH,
+        help="Path to the corpus JSON"
     )
 
-print("✅ NIST embeddings stored successfully.")
+    args = parser.parse_args()
+    ingest(json_path=args.json, batch_size=args.batch_size)
@@ -0,0 +1,150 @@
+import json
+import string
+import threading
+
+from backend.config.settings import LLAMA_MODEL_PATH, LLAMA_N_CTX, LLAMA_N_THREADS
+
+
+def static_prefix(template: str) -> str:
+    """
+    The literal text of a str.format template before its first
+    placeholder, with '{{' / '}}' unescaped.
+    """
+    prefix = []
+    for literal, field, _, _ in string.Formatter().parse(template):
+        prefix.append(literal)
+        if field is not None:
+            break
+    return "".join(prefix)
+
+
+class LlamaCppBackend:
+    """
+    In-process llama.cpp backend with prompt-prefix KV-cache reuse.
+
+    The KV state after the system prompt plus the static head of each
+    registered prompt template is saved once. Before each call the state
+    sharing the longest token prefix with the new prompt is restored, and
+    llama.cpp only evaluates the remaining tokens.
+    """
+
+    name = "llama_cpp"
+
+    def __init__(self, system_prompt: str, options: dict, templates: list = None,
+                 model_path=LLAMA_MODEL_PATH):
+        from llama_cpp import Llama
+
+        self.system_prompt = system_prompt
+        self.options = options
+        self.model_id = f"llama_cpp:{model_path.name}"
+        self.llm = Llama(
+            model_path=str(model_path),
+            n_ctx=LLAMA_N_CTX,
+            n_threads=LLAMA_N_THREADS,
+            n_gpu_layers=0,
+            verbose=False
+        )
+        self._lock = threading.Lock()
+        # list of (prefix tokens, LlamaState)
+        self._states = []
+        # schema JSON → compiled LlamaGrammar
+        self._grammars = {}
+
+        for template in templates or []:
+            self.register_prefix(static_prefix(template))
+
+    def format_prompt(self, prompt: str) -> str:
+        # Mistral-Instruct has no system role; it goes inside the first [INST]
+        return f"[INST] {self.system_prompt}\n\n{prompt} [/INST]"
+
+    def _tokenize(self, text: str) -> list:
+        # special=True maps [INST] / [/INST] to their control tokens; as
+        # plain text Mistral v0.3 would see them spelled out character by
+        # character and get an off-template prompt
+        return self.llm.tokenize(text.encode("utf-8"), add_bos=True, special=True)
+
+    def count_tokens(self, text: str) -> int:
+        """Exact token count of text under the model's tokenizer."""
+        return len(self.llm.tokenize(text.encode("utf-8"), add_bos=False))
+
+    def register_prefix(self, prompt_head: str):
+        """Evaluate a static prompt head once and keep its KV state."""
+        # Drop the closing tag: what remains is the exact text every prompt
+        # built from this template starts with
+        text = self.format_prompt(prompt_head).rsplit(" [/INST]", 1)[0]
+        tokens = self._tokenize(text)
+
+        with self._lock:
+            self.llm.reset()
+            self.llm.eval(tokens)
+            self._states.append((tokens, self.llm.save_state()))
+
+        print(f"✅ Cached KV state for {len(tokens)}-token prompt prefix")
+
+    @staticmethod
+    def _common_prefix(a: list, b: list) -> int:
+        n = 0
+        for x, y in zip(a, b):
+            if x != y:
+                break
+            n += 1
+        return n
+
+    def _restore_best_state(self, tokens: list):
+        """
+        Load the saved state sharing the longest token prefix with tokens,
+        unless the live context already shares more. A mismatch in the
+        last few prefix tokens is fine: llama.cpp re-evaluates from the
+        first differing token.
+        """
+        best, best_len = None, 0
+        for prefix_tokens, state in self._states:
+            length = self._common_prefix(prefix_tokens, tokens)
+            if length > best_len:
+                best, best_len = state, length
+
+        live_tokens = self.llm.input_ids[:self.llm.n_tokens].tolist()
+        current = self._common_prefix(live_tokens, tokens)
+        if best is not None and best_len > current:
+            self.llm.load_state(best)
+
+    def _grammar(self, schema: dict):
+        """Compile a JSON schema to a GBNF grammar, once per schema."""
+        if schema is None:
+            return None
+
+        from llama_cpp import LlamaGrammar
+
+        key = json.dumps(schema, sort_keys=True)
+        if key not in self._grammars:
+            self._grammars[key] = LlamaGrammar.from_json_schema(key, verbose=False)
+        return self._grammars[key]
+
+    def _completion(self, prompt: str, stream: bool, schema: dict = None):
+        tokens = self._tokenize(self.format_prompt(prompt))
+        self._restore_best_state(tokens)
+
+        return self.llm.create_completion(
+            prompt=tokens,
+            max_tokens=self.options.get("num_predict", 900),
+            temperature=self.options.get("temperature", 0.0),
+            stop=["</s>"],
+            grammar=self._grammar(schema),
+            stream=stream
+        )
+
+    def complete(self, prompt: str, schema: dict = None) -> str:
+        with self._lock:
+            response = self._completion(prompt, stream=False, schema=schema)
+        return response["choices"][0]["text"]
+
+    def stream(self, prompt: str, schema: dict = None):
+        with self._lock:
+            for part in self._completion(prompt, stream=True, schema=schema):
+                text = part["choices"][0]["text"]
+                if text:
+                    yield text
+
+    def preload(self):
+        # Weights and prefix states are loaded in __init__
+        pass
@@ -1,50 +1,343 @@
-import ollama
+import itertools
+import random
 import subprocess
-import requests
+import threading
 import time
 
+import httpx
+import ollama
+import requests
 
-def ensure_ollama_running():
-    try:
-        requests.get("http://localhost:11434", timeout=2)
-    except:
-        subprocess.Popen(
-            ["ollama", "serve"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
+from backend.config.settings import (
+    LLM_BACKEND,
+    LLM_CONCURRENCY,
+    LLAMA_MODEL_PATH,
+    OLLAMA_HOST,
+    OLLAMA_CONNECT_TIMEOUT,
+    OLLAMA_READ_TIMEOUT,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_MAX_RETRIES,
+    OLLAMA_HEALTH_INTERVAL,
+    OLLAMA_START_TIMEOUT,
+    STRUCTURED_OUTPUT
+)
+from backend.utils.metrics import span, record_llm_stats
+
+MODEL_NAME = "mistral"
+
+SYSTEM_PROMPT = (
+    "You are a cybersecurity policy analysis assistant. "
+    "Follow the instructions strictly and return structured output."
+)
+
+LLM_OPTIONS = {
+    "temperature": 0.0,
+    "num_predict": 900
+}
+
+# Errors worth retrying: connection problems, timeouts and overloaded servers
+_TRANSIENT_ERRORS = (httpx.TransportError, ConnectionError, requests.RequestException)
+_TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+
+
+def _is_transient(error: Exception) -> bool:
+    if isinstance(error, ollama.ResponseError):
+        return error.status_code in _TRANSIENT_STATUS
+    return isinstance(error, _TRANSIENT_ERRORS)
+
+
+class OllamaClient:
+    """
+    Long-lived Ollama client.
+
+    - one pooled HTTP client for chat calls, with explicit timeouts
+    - health state cached and refreshed by a background thread, so calls
+      do not probe the server first
+    - retries with jittered exponential backoff on transient errors
+    - keep_alive on every call so the model stays loaded between requests
+    """
+
+    def __init__(self, host: str = OLLAMA_HOST):
+        self.host = host.rstrip("/")
+        self._client = ollama.Client(
+            host=self.host,
+            timeout=httpx.Timeout(OLLAMA_READ_TIMEOUT, connect=OLLAMA_CONNECT_TIMEOUT)
         )
-        time.sleep(5)
-
-
-def call_llm(prompt: str) -> str:
-    ensure_ollama_running()
-
-    response = ollama.chat(
-        model="mistral",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are a cybersecurity policy analysis assistant. "
-                    "Follow the instructions strictly and return structured output."
-                )
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
-        options={
-            "temperature": 0.0,
-            "num_predict": 900
+        self._session = requests.Session()
+        self._healthy = False
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._monitor = None
+
+    # -------- Health --------
+
+    def check_health(self) -> bool:
+        try:
+            self._session.get(self.host, timeout=OLLAMA_CONNECT_TIMEOUT).raise_for_status()
+            healthy = True
+        except requests.RequestException:
+            healthy = False
+
+        self._healthy = healthy
+        self._checked_at = time.monotonic()
+        return healthy
+
+    @property
+    def healthy(self) -> bool:
+        return self._healthy
+
+    def start_health_monitor(self):
+        if self._monitor is not None:
+            return
+
+        def monitor():
+            while True:
+                time.sleep(OLLAMA_HEALTH_INTERVAL)
+                self.check_health()
+
+        self._monitor = threading.Thread(target=monitor, name="ollama-health", daemon=True)
+        self._monitor.start()
+
+    def ensure_running(self):
+        """
+        Fast path: trust the cached health state. Otherwise probe, start
+        `ollama serve` if needed and wait until it answers.
+        """
+        if self._healthy and time.monotonic() - self._checked_at < OLLAMA_HEALTH_INTERVAL * 2:
+            return
+
+        with self._lock:
+            if self.check_health():
+                return
+
+            print("⚠️ Ollama not reachable, starting `ollama serve`...")
+            subprocess.Popen(
+                ["ollama", "serve"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+
+            deadline = time.monotonic() + OLLAMA_START_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(0.5)
+                if self.check_health():
+                    return
+
+        raise RuntimeError(f"Ollama did not become reachable at {self.host}")
+
+    # -------- Calls --------
+
+    def _with_retry(self, fn):
+        for attempt in range(OLLAMA_MAX_RETRIES + 1):
+            try:
+                return fn()
+            except Exception as e:
+                if attempt == OLLAMA_MAX_RETRIES or not _is_transient(e):
+                    raise
+
+                self._healthy = False
+                delay = random.uniform(0, min(8.0, 0.5 * 2 ** attempt))
+                print(f"⚠️ Ollama call failed ({e}); retrying in {delay:.2f}s")
+                time.sleep(delay)
+                self.ensure_running()
+
+    def chat(self, messages: list, options: dict = None, stream: bool = False, **kwargs):
+        self.ensure_running()
+
+        def call():
+            return self._client.chat(
+                model=MODEL_NAME,
+                messages=messages,
+                options=options or LLM_OPTIONS,
+                keep_alive=OLLAMA_KEEP_ALIVE,
+                stream=stream,
+                **kwargs
+            )
+
+        if not stream:
+            return self._with_retry(call)
+
+        # A streamed request only reaches the server when the iterator is
+        # first advanced, so connection errors and 5xx responses surface
+        # there. Retry up to the first part; after tokens have been handed
+        # out a retry would duplicate them.
+        def start():
+            parts = iter(call())
+            return next(parts, None), parts
+
+        first, parts = self._with_retry(start)
+        return itertools.chain([first] if first is not None else [], parts)
+
+    def preload(self):
+        """Load the model weights without generating anything."""
+        self.ensure_running()
+        self._with_retry(lambda: self._client.generate(
+            model=MODEL_NAME,
+            prompt="",
+            keep_alive=OLLAMA_KEEP_ALIVE
+        ))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> OllamaClient:
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OllamaClient()
+                _client.start_health_monitor()
+
+    return _client
+
+
+def ensure_ollama_running():
+    get_client().ensure_running()
+
+
+def build_messages(prompt: str) -> list:
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": prompt
         }
-    )
+    ]
+
+
+class OllamaBackend:
+    """LLM backend that sends chat requests to the Ollama server."""
+
+    name = "ollama"
+    model_id = f"ollama:{MODEL_NAME}"
+
+    @staticmethod
+    def _format_args(schema: dict) -> dict:
+        return {"format": schema} if schema is not None else {}
+
+    def complete(self, prompt: str, schema: dict = None) -> str:
+        response = get_client().chat(build_messages(prompt), **self._format_args(schema))
+        record_llm_stats(response)
+        return response["message"]["content"]
+
+    def stream(self, prompt: str, schema: dict = None):
+        parts = get_client().chat(build_messages(prompt), stream=True, **self._format_args(schema))
+        for part in parts:
+            content = part["message"]["content"]
+            if content:
+                yield content
+            if part.get("done"):
+                # Token counts and durations arrive with the final part
+                record_llm_stats(part)
+
+    def preload(self):
+        get_client().preload()
+
+
+_backend = None
 
-    result = response["message"]["content"]
+# Shared cap on in-flight LLM calls across all threads (chunking windows,
+# gap analysis, batch uploads); matches what the server runs in parallel
+_llm_slots = threading.BoundedSemaphore(LLM_CONCURRENCY)
+
+
+def active_model_id() -> str:
+    """Identifier of the configured backend/model, without loading it."""
+    if LLM_BACKEND == "llama_cpp":
+        return f"llama_cpp:{LLAMA_MODEL_PATH.name}"
+    return OllamaBackend.model_id
+
+
+def get_llm_backend():
+    """
+    Return the backend selected by LLM_BACKEND ("ollama" or "llama_cpp").
+    Every backend provides complete(prompt, schema), stream(prompt, schema)
+    and preload().
+    """
+    global _backend
+
+    if _backend is None:
+        with _client_lock:
+            if _backend is None:
+                if LLM_BACKEND == "llama_cpp":
+                    from backend.config.prompts import (
+                        DOMAIN_CHUNKING_PROMPT,
+                        GAP_ANALYSIS_PROMPT
+                    )
+                    from backend.prompts.batch_classification_prompt import (
+                        BATCH_CLASSIFICATION_PROMPT
+                    )
+                    from backend.llm.llama_cpp_backend import LlamaCppBackend
+
+                    _backend = LlamaCppBackend(
+                        SYSTEM_PROMPT,
+                        LLM_OPTIONS,
+                        templates=[
+                            GAP_ANALYSIS_PROMPT,
+                            DOMAIN_CHUNKING_PROMPT,
+                            BATCH_CLASSIFICATION_PROMPT
+                        ]
+                    )
+                elif LLM_BACKEND == "ollama":
+                    _backend = OllamaBackend()
+                else:
+                    raise ValueError(f"Unknown LLM_BACKEND: {LLM_BACKEND}")
+
+    return _backend
+
+
+def token_counter():
+    """
+    Exact token counter of the active backend (text → int), or None when
+    it has no local tokenizer, as with Ollama.
+    """
+    return getattr(get_llm_backend(), "count_tokens", None)
+
+
+def call_llm(prompt: str, schema: dict = None) -> str:
+    """
+    Run one completion. With a JSON schema (and STRUCTURED_OUTPUT on),
+    generation is constrained to JSON matching it.
+    """
+    if not STRUCTURED_OUTPUT:
+        schema = None
+
+    with span("llm_wait"):
+        _llm_slots.acquire()
+    try:
+        with span("llm"):
+            result = get_llm_backend().complete(prompt, schema=schema)
+    finally:
+        _llm_slots.release()
 
     # Debug output
     print("\n===== LLM OUTPUT =====")
     print(result)
     print("======================\n")
 
-    return result.strip()
\ No newline at end of file
+    return result.strip()
+
+
+def stream_llm(prompt: str, schema: dict = None):
+    """
+    Stream the completion token by token from the active backend.
+
+    Yields:
+        Content fragments as they are generated
+    """
+    if not STRUCTURED_OUTPUT:
+        schema = None
+
+    with span("llm_wait"):
+        _llm_slots.acquire()
+    try:
+        with span("llm"):
+            yield from get_llm_backend().stream(prompt, schema=schema)
+    finally:
+        _llm_slots.release()
@@ -1,13 +1,97 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+from backend.config.settings import PDF_WORKERS, OCR_DPI, OCR_WINDOW_SIZE
+
+
+def get_page_count(pdf_path: str) -> int:
+    return int(pdfinfo_from_path(pdf_path)["Pages"])
+
+
+def page_windows(pages: list[int], window_size: int) -> list[tuple[int, int]]:
+    """
+    Group 1-based page numbers into contiguous (first_page, last_page)
+    windows of at most `window_size` pages.
+    """
+    windows = []
+
+    for page in sorted(set(pages)):
+        if windows:
+            first, last = windows[-1]
+            if page == last + 1 and page - first < window_size:
+                windows[-1] = (first, page)
+                continue
+        windows.append((page, page))
+
+    return windows
+
+
+def _ocr_window(pdf_path: str, first_page: int, last_page: int, dpi: int):
+    """Render and OCR one page window inside a worker process."""
+    images = convert_from_path(
+        pdf_path,
+        dpi=dpi,
+        first_page=first_page,
+        last_page=last_page
+    )
+
+    texts = {}
+    for offset, image in enumerate(images):
+        texts[first_page + offset] = pytesseract.image_to_string(image)
+        image.close()
+
+    return texts
+
+
+def ocr_pages(pdf_path: str, pages: list[int] = None, workers: int = None,
+              window_size: int = None) -> dict[int, str]:
+    """
+    OCR the given 1-based pages (all pages by default) with a process pool.
+
+    Pages are rendered a window at a time via first_page/last_page, and at
+    most `workers` windows are in flight, so peak memory is bounded by
+    workers * window_size rendered images regardless of document length.
+
+    Returns:
+        Dict mapping page number to OCR text
+    """
+    workers = workers or PDF_WORKERS
+    window_size = window_size or OCR_WINDOW_SIZE
+
+    if pages is None:
+        pages = range(1, get_page_count(pdf_path) + 1)
+
+    windows = page_windows(list(pages), window_size)
+    results = {}
+
+    if not windows:
+        return results
+
+    if len(windows) == 1 or workers <= 1:
+        for first, last in windows:
+            results.update(_ocr_window(pdf_path, first, last, OCR_DPI))
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        queue = iter(windows)
+
+        for first, last in queue:
+            pending.add(pool.submit(_ocr_window, pdf_path, first, last, OCR_DPI))
+
+            if len(pending) >= workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results.update(future.result())
 
+        for future in pending:
+            results.update(future.result())
 
-def ocr_pdf(pdf_path: str) -> str:
-    pages = convert_from_path(pdf_path, dpi=300)
-    full_text = ""
+    return results
 
-    for i, page in enumerate(pages):
-        text = pytesseract.image_to_string(page)
-        full_text += f"\n{text}"
 
-    return full_text
+def ocr_pdf(pdf_path: str, pages: list[int] = None) -> str:
+    page_texts = ocr_pages(pdf_path, pages=pages)
+    return "\n".join(page_texts[page] for page in sorted(page_texts))
@@ -1,23 +1,96 @@
+from concurrent.futures import ProcessPoolExecutor
+
 from PyPDF2 import PdfReader
-from backend.ocr.ocr_engine import ocr_pdf
+from backend.config.settings import (
+    PDF_WORKERS,
+    PDF_TEXT_WINDOW_SIZE,
+    PAGE_MIN_TEXT_CHARS
+)
+from backend.ocr.ocr_engine import ocr_pages
+from backend.utils.metrics import span
 
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+def _extract_window(pdf_path: str, start: int, end: int) -> list[str]:
+    """Extract the text layer of pages [start, end) inside a worker process."""
+    reader = PdfReader(pdf_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def extract_page_texts(pdf_path: str, workers: int = None) -> list[str]:
     """
-    Tries normal PDF text extraction.
-    Falls back to OCR if text is empty.
+    Extract the text layer of every page, in page order.
+
+    Large documents are split into page windows and extracted in a
+    process pool; small ones are read serially to avoid pool start-up cost.
     """
+    workers = workers or PDF_WORKERS
     reader = PdfReader(pdf_path)
-    text = ""
+    page_count = len(reader.pages)
+
+    if page_count <= PDF_TEXT_WINDOW_SIZE or workers <= 1:
+        return [page.extract_text() or "" for page in reader.pages]
 
-    for page in reader.pages:
-        extracted = page.extract_text()
-        if extracted:
-            text += extracted + "\n"
+    windows = [
+        (start, min(start + PDF_TEXT_WINDOW_SIZE, page_count))
+        for start in range(0, page_count, PDF_TEXT_WINDOW_SIZE)
+    ]
 
-    # If text is too small, assume scanned PDF
-    if len(text.strip()) < 200:
-        print("⚠️ Low text detected, switching to OCR...")
-        text = ocr_pdf(pdf_path)
+    with ProcessPoolExecutor(max_workers=min(workers, len(windows))) as pool:
+        futures = [
+            pool.submit(_extract_window, pdf_path, start, end)
+            for start, end in windows
+        ]
+        return [text for future in futures for text in future.result()]
 
-    return text
+
+def has_usable_text(text: str) -> bool:
+    """A page needs OCR when its text layer is missing or nearly empty."""
+    return len("".join(text.split())) >= PAGE_MIN_TEXT_CHARS
+
+
+def extract_pages_from_pdf(pdf_path: str, workers: int = None) -> list[dict]:
+    """
+    Extract text page by page, OCR'ing only pages without a usable text layer.
+    `workers` caps the processes used for this document (default PDF_WORKERS).
+
+    Returns:
+        List of dictionaries with 'page' (1-based), 'method' ('text' or 'ocr')
+        and 'text', in page order
+    """
+    page_texts = extract_page_texts(pdf_path, workers=workers)
+
+    pages = [
+        {"page": number, "method": "text", "text": text}
+        for number, text in enumerate(page_texts, start=1)
+    ]
+
+    scanned = [p["page"] for p in pages if not has_usable_text(p["text"])]
+
+    if scanned:
+        print(f"⚠️ {len(scanned)}/{len(pages)} pages without text layer, running OCR...")
+        with span("ocr"):
+            ocr_texts = ocr_pages(pdf_path, pages=scanned, workers=workers)
+
+        for number in scanned:
+            pages[number - 1]["method"] = "ocr"
+            pages[number - 1]["text"] = ocr_texts.get(number, "")
+
+    return pages
+
+
+def summarize_extraction(pages: list[dict]) -> dict:
+    """Per-page extraction methods plus totals, for logging and API responses."""
+    return {
+        "pages": [{"page": p["page"], "method": p["method"]} for p in pages],
+        "text_pages": sum(1 for p in pages if p["method"] == "text"),
+        "ocr_pages": sum(1 for p in pages if p["method"] == "ocr")
+    }
+
+
+def extract_text_from_pdf(pdf_path: str) -> str:
+    """
+    Extracts text from every page, using the PDF text layer where present
+    and OCR only for pages that have none.
+    """
+    pages = extract_pages_from_pdf(pdf_path)
+    return "\n".join(p["text"] for p in pages if p["text"])
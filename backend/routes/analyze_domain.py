@@ -1,6 +1,11 @@
 import json
 from flask import Blueprint, request, Response
-from backend.services.gap_analysis import analyze_gap_for_domain
+from backend.config.settings import LLM_CONCURRENCY
+from backend.services.gap_analysis import (
+    analyze_gap_for_domain,
+    analyze_policy,
+    stream_gap_analysis_for_domain
+)
 
 analyze_bp = Blueprint("analyze", __name__)
 
@@ -46,3 +51,99 @@ def analyze_domain():
         mimetype="application/json",
         status=200
     )
+
+
+@analyze_bp.route("/analyze-domain/stream", methods=["POST"])
+def analyze_domain_stream():
+    """
+    Streaming GAP ANALYSIS for ONE DOMAIN.
+
+    Same payload as /analyze-domain. Each gap item is sent as soon as the
+    model finishes generating it, followed by the full result.
+
+    Query params:
+      format: "ndjson" (default) or "sse"
+    """
+
+    data = request.get_json()
+
+    domain = data.get("domain")
+    text = data.get("text")
+
+    if not domain or not text:
+        return Response("Invalid request payload", status=400)
+
+    stream_format = request.args.get("format", "ndjson")
+
+    def generate():
+        for event in stream_gap_analysis_for_domain(domain=domain, text=text):
+            if stream_format == "sse":
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+            else:
+                yield json.dumps(event) + "\n"
+
+    mimetype = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+
+    return Response(
+        generate(),
+        mimetype=mimetype,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@analyze_bp.route("/analyze-policy", methods=["POST"])
+def analyze_whole_policy():
+    """
+    GAP ANALYSIS for ALL DOMAINS of a policy in one request.
+
+    Expected JSON: the list returned by /upload-pdf, or
+    {
+      "chunks": [{"domain": "ISMS", "text": "..."}, ...],
+      "concurrency": 2          (optional)
+    }
+
+    Per-domain results are streamed as they finish.
+
+    Query params:
+      format: "ndjson" (default) or "sse"
+    """
+
+    data = request.get_json()
+
+    if isinstance(data, list):
+        chunks, concurrency = data, None
+    elif isinstance(data, dict):
+        chunks, concurrency = data.get("chunks"), data.get("concurrency")
+    else:
+        chunks, concurrency = None, None
+
+    if not chunks or not isinstance(chunks, list):
+        return Response("Invalid request payload", status=400)
+
+    if concurrency is not None:
+        if isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency < 1:
+            return Response("concurrency must be a positive integer", status=400)
+        # Never exceed what Ollama serves in parallel
+        concurrency = min(concurrency, LLM_CONCURRENCY)
+
+    stream_format = request.args.get("format", "ndjson")
+
+    def generate():
+        for result in analyze_policy(chunks, concurrency=concurrency):
+            if stream_format == "sse":
+                yield f"event: domain_result\ndata: {json.dumps(result)}\n\n"
+            else:
+                yield json.dumps({"event": "domain_result", "data": result}) + "\n"
+
+        if stream_format == "sse":
+            yield "event: done\ndata: {}\n\n"
+        else:
+            yield json.dumps({"event": "done"}) + "\n"
+
+    mimetype = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+
+    return Response(
+        generate(),
+        mimetype=mimetype,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,7 +1,37 @@
 from flask import Blueprint
+from backend.services.result_cache import get_result_cache
+from backend.embeddings.embedding_model import embedding_cache_stats
+from backend.services.warmup import readiness
+from backend.utils.metrics import render_metrics
 
 health_bp = Blueprint("health", __name__)
 
 @health_bp.route("/health", methods=["GET"])
 def health():
     return {"status": "ok"}
+
+
+@health_bp.route("/ready", methods=["GET"])
+def ready():
+    """
+    Readiness: 200 once the embedder, index and LLM are loaded, 503 before.
+    Unlike /health this reports per-component state and load times.
+    """
+    state = readiness()
+    return state, 200 if state["ready"] else 503
+
+
+@health_bp.route("/cache-stats", methods=["GET"])
+def cache_stats():
+    cache = get_result_cache()
+
+    return {
+        "gap_analysis": {"enabled": True, **cache.stats()} if cache else {"enabled": False},
+        "embeddings": embedding_cache_stats()
+    }
+
+
+@health_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus text exposition of stage timings and LLM token stats."""
+    return render_metrics(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
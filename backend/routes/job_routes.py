@@ -0,0 +1,121 @@
+import json
+import time
+import uuid
+from flask import Blueprint, request, Response
+from backend.utils.file_utils import allowed_file
+from backend.services.document_store import get_document_store
+from backend.services.job_queue import (
+    get_job_queue,
+    start_job_workers,
+    TERMINAL_STATUSES
+)
+
+jobs_bp = Blueprint("jobs", __name__)
+
+
+@jobs_bp.route("/jobs", methods=["POST"])
+def create_job():
+    """
+    Upload a PDF and queue it for background processing.
+
+    Form fields:
+      file:    the PDF
+      analyze: "true" to also run gap analysis for every domain
+
+    Returns the job id immediately; follow progress via
+    /api/jobs/<id> or /api/jobs/<id>/events.
+    """
+
+    if "file" not in request.files:
+        return Response("ERROR: No file part", status=400)
+
+    file = request.files["file"]
+
+    if file.filename == "":
+        return Response("ERROR: No selected file", status=400)
+
+    if not allowed_file(file.filename):
+        return Response("ERROR: Only PDF files are allowed", status=400)
+
+    # Content-addressed, so identical re-uploads reuse stored artifacts
+    store = get_document_store()
+    sha256 = store.put_stream(file.stream)
+
+    job_id = uuid.uuid4().hex
+    options = {
+        "analyze": request.form.get("analyze", "false").lower() == "true",
+        "filename": file.filename
+    }
+
+    get_job_queue().submit(str(store.blob_path(sha256)), options, job_id=job_id, sha256=sha256)
+    start_job_workers().notify()
+
+    return Response(
+        json.dumps({"job_id": job_id, "status": "queued", "sha256": sha256}),
+        mimetype="application/json",
+        status=202
+    )
+
+
+@jobs_bp.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = get_job_queue().get(job_id)
+
+    if job is None:
+        return Response("ERROR: Job not found", status=404)
+
+    job["events"] = get_job_queue().events(job_id)
+
+    return Response(
+        json.dumps(job, indent=2),
+        mimetype="application/json",
+        status=200
+    )
+
+
+@jobs_bp.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    """
+    Server-Sent Events stream of job stages until the job finishes.
+    """
+    queue = get_job_queue()
+
+    if queue.get(job_id) is None:
+        return Response("ERROR: Job not found", status=404)
+
+    # Browsers resend the last id on reconnect; ignore anything malformed
+    try:
+        start_id = max(0, int(request.headers.get("Last-Event-ID", 0)))
+    except ValueError:
+        start_id = 0
+
+    def stream():
+        last_id = start_id
+
+        def new_events():
+            nonlocal last_id
+            for event in queue.events(job_id, after_id=last_id):
+                last_id = event["id"]
+                yield (
+                    f"id: {event['id']}\n"
+                    f"event: {event['stage']}\n"
+                    f"data: {json.dumps(event)}\n\n"
+                )
+
+        while True:
+            yield from new_events()
+
+            job = queue.get(job_id)
+            if job["status"] in TERMINAL_STATUSES:
+                # The final event may have landed after the read above
+                yield from new_events()
+                yield f"event: end\ndata: {json.dumps({'status': job['status']})}\n\n"
+                return
+
+            time.sleep(0.5)
+
+    return Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,8 +1,11 @@
-import os
 import json
-from flask import Blueprint, request, current_app, Response
+import time
+import zipfile
+from flask import Blueprint, request, Response
 from backend.utils.file_utils import allowed_file
-from backend.services.pdf_pipeline import process_pdf
+from backend.services.pdf_pipeline import process_stored_pdf
+from backend.services.document_store import get_document_store
+from backend.services.batch_pipeline import collect_documents, process_batch
 
 upload_bp = Blueprint("upload", __name__)
 
@@ -24,14 +27,12 @@ def upload_pdf():
     if not allowed_file(file.filename):
         return Response("ERROR: Only PDF files are allowed", status=400)
 
-    upload_folder = current_app.config["UPLOAD_FOLDER"]
-    os.makedirs(upload_folder, exist_ok=True)
-
-    file_path = os.path.join(upload_folder, file.filename)
-    file.save(file_path)
+    # Stored under the SHA-256 of its bytes: concurrent uploads never
+    # collide, and identical re-uploads reuse the stored stage outputs
+    sha256 = get_document_store().put_stream(file.stream)
 
     try:
-        domain_chunks = process_pdf(file_path)
+        domain_chunks = process_stored_pdf(sha256)
     except Exception as e:
         return Response(
             f"ERROR: PDF processing failed\n{str(e)}",
@@ -43,5 +44,76 @@ def upload_pdf():
     return Response(
         json.dumps(domain_chunks, indent=2),
         mimetype="application/json",
-        status=200
+        status=200,
+        headers={"X-Document-SHA256": sha256}
+    )
+
+
+@upload_bp.route("/upload-batch", methods=["POST"])
+def upload_batch():
+    """
+    Upload several PDFs and/or zip archives of PDFs in one request.
+
+    Form fields:
+      files: one or more .pdf or .zip files (repeat the field)
+
+    Identical documents (by SHA-256) are processed once. Per-document
+    domain chunks are streamed as each document finishes.
+
+    Query params:
+      format: "ndjson" (default) or "sse"
+    """
+
+    files = request.files.getlist("files") + request.files.getlist("file")
+    files = [f for f in files if f.filename]
+
+    if not files:
+        return Response("ERROR: No files uploaded", status=400)
+
+    try:
+        documents = collect_documents(files)
+    except (ValueError, zipfile.BadZipFile) as e:
+        return Response(f"ERROR: {str(e)}", status=400)
+
+    if not documents:
+        return Response("ERROR: No PDF files found in upload", status=400)
+
+    stream_format = request.args.get("format", "ndjson")
+
+    def encode(event: str, data: dict) -> str:
+        if stream_format == "sse":
+            return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        return json.dumps({"event": event, "data": data}) + "\n"
+
+    def generate():
+        started = time.perf_counter()
+
+        yield encode("accepted", {
+            "documents": [
+                {"sha256": d["sha256"], "filename": d["filename"], "duplicates": d["duplicates"]}
+                for d in documents
+            ]
+        })
+
+        processed = failed = 0
+        for event in process_batch(documents):
+            if event["event"] == "document":
+                processed += 1
+            elif event["event"] == "error":
+                failed += 1
+            yield encode(event["event"], event["data"])
+
+        yield encode("done", {
+            "documents": len(documents),
+            "processed": processed,
+            "failed": failed,
+            "seconds": round(time.perf_counter() - started, 3)
+        })
+
+    mimetype = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+
+    return Response(
+        generate(),
+        mimetype=mimetype,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
@@ -0,0 +1,172 @@
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    FIRST_COMPLETED,
+    wait
+)
+
+from backend.config.settings import (
+    BATCH_WORKERS,
+    BATCH_MAX_FILES,
+    BATCH_MAX_UNCOMPRESSED_MB,
+    LLM_CONCURRENCY,
+    MAX_UPLOAD_MB
+)
+from backend.services.document_store import get_document_store
+from backend.services.pdf_pipeline import extract_stored_text, chunk_stored_text
+from backend.utils.file_utils import allowed_file
+from backend.utils.metrics import submit_with_context
+
+
+def _iter_uploads(files):
+    """
+    Yield (filename, bytes) for every PDF in the uploads, expanding zip
+    archives. Zip member paths are reduced to their base name. Members
+    larger than MAX_UPLOAD_MB uncompressed are rejected, as are batches
+    whose members add up to more than BATCH_MAX_UNCOMPRESSED_MB.
+    """
+    total = 0
+
+    for file in files:
+        name = file.filename or ""
+
+        if name.lower().endswith(".zip"):
+            with zipfile.ZipFile(file.stream) as archive:
+                for member in archive.infolist():
+                    base = os.path.basename(member.filename)
+                    if member.is_dir() or base.startswith("._") or not allowed_file(base):
+                        continue
+                    if member.file_size > MAX_UPLOAD_MB * 1024 * 1024:
+                        raise ValueError(f"{base} in {name} exceeds {MAX_UPLOAD_MB} MB")
+                    total += member.file_size
+                    if total > BATCH_MAX_UNCOMPRESSED_MB * 1024 * 1024:
+                        raise ValueError(
+                            f"Zip contents exceed {BATCH_MAX_UNCOMPRESSED_MB} MB uncompressed"
+                        )
+                    yield base, archive.read(member)
+
+        elif allowed_file(name):
+            yield name, file.read()
+
+
+def collect_documents(files) -> list:
+    """
+    Put uploaded PDFs (or the PDFs inside uploaded zips) into the document
+    store, deduplicated by SHA-256 of their content.
+
+    Returns:
+        List of {"sha256", "filename", "duplicates"} in upload order
+    """
+    store = get_document_store()
+    documents = {}
+
+    for filename, data in _iter_uploads(files):
+        digest = store.put_stream(io.BytesIO(data))
+
+        if digest in documents:
+            documents[digest]["duplicates"].append(filename)
+            continue
+
+        if len(documents) >= BATCH_MAX_FILES:
+            raise ValueError(f"Batch exceeds {BATCH_MAX_FILES} documents")
+
+        documents[digest] = {
+            "sha256": digest,
+            "filename": filename,
+            "duplicates": []
+        }
+
+    return list(documents.values())
+
+
+def _extract_document(sha256: str):
+    # Runs in a worker process; each document gets one process, so the
+    # per-document page pool is disabled to avoid oversubscription
+    started = time.perf_counter()
+    summary, text, cached = extract_stored_text(sha256, workers=1)
+    return summary, text, cached, time.perf_counter() - started
+
+
+def _chunk_document(sha256: str, text: str):
+    started = time.perf_counter()
+    chunks, cached = chunk_stored_text(sha256, text)
+    return chunks, cached, time.perf_counter() - started
+
+
+def process_batch(documents: list, workers: int = None, chunk_concurrency: int = None):
+    """
+    Run the upload pipeline over many stored documents. Stage artifacts
+    already in the document store are reused.
+
+    Extraction/OCR runs in a process pool of `workers` processes (default
+    BATCH_WORKERS). As each document's text is ready it is handed to a
+    thread pool for LLM chunking; the LLM calls themselves share the
+    global LLM_CONCURRENCY limit. Extraction of later documents therefore
+    overlaps with chunking of earlier ones.
+
+    Yields:
+        Event dictionaries in completion order:
+          {"event": "extracted", "data": {...}}  text ready for a document
+          {"event": "document", "data": {...}}   domain chunks for a document
+          {"event": "error", "data": {...}}      a document failed
+    """
+    workers = max(1, min(workers or BATCH_WORKERS, len(documents) or 1))
+    chunk_concurrency = chunk_concurrency or LLM_CONCURRENCY
+
+    processes = ProcessPoolExecutor(max_workers=workers)
+    threads = ThreadPoolExecutor(max_workers=chunk_concurrency)
+    cancelled = False
+
+    try:
+        pending = {}
+        for doc in documents:
+            pending[processes.submit(_extract_document, doc["sha256"])] = ("extract", doc, None)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                stage, doc, extraction = pending.pop(future)
+                info = {"sha256": doc["sha256"], "filename": doc["filename"]}
+
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"❌ Batch {stage} failed for {doc['filename']}: {e}")
+                    yield {"event": "error", "data": {**info, "stage": stage, "error": str(e)}}
+                    continue
+
+                if stage == "extract":
+                    summary, text, cached, seconds = result
+                    extraction = {"summary": summary, "cached": cached, "seconds": round(seconds, 3)}
+                    yield {"event": "extracted", "data": {**info, **extraction}}
+
+                    chunk_future = submit_with_context(threads, _chunk_document, doc["sha256"], text)
+                    pending[chunk_future] = ("chunk", doc, extraction)
+                else:
+                    chunks, cached, seconds = result
+                    yield {"event": "document", "data": {
+                        **info,
+                        "duplicates": doc["duplicates"],
+                        "extraction_seconds": extraction["seconds"],
+                        "chunking_seconds": round(seconds, 3),
+                        "extraction_cached": extraction["cached"],
+                        "chunks_cached": cached,
+                        "extraction": extraction["summary"],
+                        "domain_chunks": chunks
+                    }}
+
+    except GeneratorExit:
+        # Client went away: drop queued work and return without waiting
+        # for the documents still in flight
+        print("⚠️ Batch cancelled, dropping queued documents")
+        cancelled = True
+        raise
+
+    finally:
+        processes.shutdown(wait=not cancelled, cancel_futures=cancelled)
+        threads.shutdown(wait=not cancelled, cancel_futures=cancelled)
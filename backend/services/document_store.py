@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+from backend.config.settings import DOCUMENT_STORE_DIR
+
+# Bump a stage's number whenever its code changes in a way that changes
+# its output; that stage and every stage after it are recomputed.
+STAGE_CODE_VERSIONS = {
+    "raw_text": 1,
+    "cleaned_text": 1,
+    "sentences": 1,
+    "chunks": 1
+}
+
+STAGE_ORDER = ["raw_text", "cleaned_text", "sentences", "chunks"]
+
+# Stage each stage is computed from
+STAGE_INPUTS = {
+    "raw_text": None,
+    "cleaned_text": "raw_text",
+    "sentences": "cleaned_text",
+    "chunks": "cleaned_text"
+}
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _chunking_dependencies() -> dict:
+    """Everything besides code that changes the chunking output."""
+    from backend.config.prompts import DOMAIN_CHUNKING_PROMPT
+    from backend.config.schemas import DOMAIN_CHUNKING_SCHEMA
+    from backend.config.settings import CHUNKING_MODE, CHUNK_WINDOW_TOKENS, STRUCTURED_OUTPUT
+    from backend.llm.mistral_client import active_model_id, LLM_OPTIONS, SYSTEM_PROMPT
+
+    return {
+        "prompt": _sha256(SYSTEM_PROMPT + "\n" + DOMAIN_CHUNKING_PROMPT),
+        "schema": _sha256(json.dumps(DOMAIN_CHUNKING_SCHEMA, sort_keys=True)) if STRUCTURED_OUTPUT else None,
+        "model": active_model_id(),
+        "options": LLM_OPTIONS,
+        "mode": CHUNKING_MODE,
+        "window_tokens": CHUNK_WINDOW_TOKENS
+    }
+
+
+@lru_cache(maxsize=None)
+def stage_version(stage: str) -> str:
+    """
+    Version of a stage: its code version chained with the version of its
+    input stage (and, for chunks, the prompt/model/settings), so a change
+    anywhere upstream invalidates it too.
+    """
+    payload = {
+        "code": STAGE_CODE_VERSIONS[stage],
+        "input": stage_version(STAGE_INPUTS[stage]) if STAGE_INPUTS[stage] else None
+    }
+
+    if stage == "chunks":
+        payload["dependencies"] = _chunking_dependencies()
+
+    return _sha256(json.dumps(payload, sort_keys=True))[:16]
+
+
+class DocumentStore:
+    """
+    Content-addressed store for uploaded PDFs and their pipeline artifacts.
+
+    blobs/<aa>/<sha256>.pdf                     the uploaded bytes
+    artifacts/<sha256>/<stage>-<version>.json   one file per stage version
+
+    All writes go to a temporary file first and are renamed into place,
+    so concurrent uploads of the same document never see partial files.
+    """
+
+    def __init__(self, root: Path = DOCUMENT_STORE_DIR):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.artifact_dir = self.root / "artifacts"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.artifact_dir.mkdir(parents=True, exist_ok=True)
+
+        # (sha256, stage) → [lock, waiters]; entries are dropped once no
+        # caller holds or waits for them, so the map stays small
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    # -------- Blobs --------
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.blob_dir / sha256[:2] / f"{sha256}.pdf"
+
+    def has_blob(self, sha256: str) -> bool:
+        return self.blob_path(sha256).exists()
+
+    def put_stream(self, stream) -> str:
+        """
+        Copy a file-like object into the store while hashing it.
+
+        Returns:
+            The SHA-256 hex digest, which names the blob
+        """
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.blob_dir, suffix=".part")
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    chunk = stream.read(READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+
+            sha256 = digest.hexdigest()
+            target = self.blob_path(sha256)
+
+            if target.exists():
+                os.remove(tmp_path)
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, target)
+
+            return sha256
+
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    # -------- Artifacts --------
+
+    def artifact_path(self, sha256: str, stage: str) -> Path:
+        return self.artifact_dir / sha256 / f"{stage}-{stage_version(stage)}.json"
+
+    def get_artifact(self, sha256: str, stage: str):
+        path = self.artifact_path(sha256, stage)
+        if not path.exists():
+            return None
+
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def put_artifact(self, sha256: str, stage: str, value):
+        path = self.artifact_path(sha256, stage)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def _locked(self, sha256: str, stage: str):
+        key = (sha256, stage)
+
+        with self._locks_guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def get_or_compute(self, sha256: str, stage: str, compute, should_store=None):
+        """
+        Return the stored artifact for this stage version, or compute and
+        store it. Concurrent callers for the same document wait for the
+        first one instead of computing twice.
+
+        Args:
+            compute: Zero-argument function producing the artifact
+            should_store: Optional predicate; results failing it (e.g. an
+                          empty LLM result) are returned but not stored
+
+        Returns:
+            (value, cached) where cached tells whether it came from disk
+        """
+        value = self.get_artifact(sha256, stage)
+        if value is not None:
+            return value, True
+
+        with self._locked(sha256, stage):
+            value = self.get_artifact(sha256, stage)
+            if value is not None:
+                return value, True
+
+            value = compute()
+
+            if should_store is None or should_store(value):
+                self.put_artifact(sha256, stage, value)
+
+            return value, False
+
+    def stages(self, sha256: str) -> dict:
+        """Which stages have an artifact for the current stage versions."""
+        return {
+            stage: self.artifact_path(sha256, stage).exists()
+            for stage in STAGE_ORDER
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_document_store() -> DocumentStore:
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DocumentStore()
+
+    return _store
@@ -1,128 +1,262 @@
-import json
-import re
-from backend.config.prompts import GAP_ANALYSIS_PROMPT
-from backend.llm.mistral_client import call_llm
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from backend.config.settings import LLM_CONCURRENCY, PROMPT_TOKEN_BUDGET, RETRIEVAL_TOP_K
+from backend.config.schemas import GAP_ANALYSIS_SCHEMA
+from backend.llm.mistral_client import call_llm, stream_llm
 from backend.services.nist_retrieval import (
     fetch_similar_nist_records,
-    format_nist_chunks_for_prompt
+    fetch_similar_nist_records_batch
 )
+from backend.services.nist_digests import apply_digests, retrieval_granularity
+from backend.services.prompt_builder import build_gap_analysis_prompt
+from backend.services.result_cache import get_result_cache, build_cache_key
+from backend.utils.json_extractor import extract_json
+from backend.utils.json_stream import IncrementalArrayParser
+from backend.utils.metrics import bind, domain_var, span, submit_with_context
 
+logger = logging.getLogger(__name__)
 
-def extract_json(text: str):
-    """Safely extract JSON from LLM output."""
-    if not text:
+
+def empty_gap_result(domain: str, error: str = None) -> dict:
+    result = {
+        "domain": domain,
+        "subdomain": domain,
+        "gap_analysis": [],
+        "revised_policy": {
+            "introduction": "",
+            "statements": [],
+            "compliance_notes": ""
+        },
+        "implementation_roadmap": {
+            "short_term": [],
+            "mid_term": [],
+            "long_term": []
+        },
+        "nist_records_used": []
+    }
+
+    if error is not None:
+        result["error"] = error
+
+    return result
+
+
+def summarize_nist_records(nist_records: list) -> list:
+    return [
+        {
+            "id": r.get("id"),
+            "source": r.get("metadata", {}).get("source_file"),
+            "parent_id": r.get("metadata", {}).get("parent_id"),
+            "similarity": r.get("similarity"),
+            "rrf_score": r.get("rrf_score")
+        }
+        for r in nist_records
+    ]
+
+
+def prepare_gap_analysis(domain: str, text: str, nist_records: list = None):
+    """
+    Retrieve NIST context and build the prompt for one domain.
+    Retrieval is skipped when nist_records are already provided.
+
+    In NIST_PROMPT_MODE=digest the records are distinct documents
+    carrying their precomputed requirement digests instead of raw text.
+    The prompt is kept within PROMPT_TOKEN_BUDGET by extractive trimming.
+
+    Returns:
+        (nist_records, cache_key, prompt, prompt_metrics)
+    """
+    if nist_records is None:
+        with span("retrieval"):
+            nist_records = fetch_similar_nist_records(
+                policy_text=text,
+                subdomain=domain,
+                top_k=RETRIEVAL_TOP_K,
+                granularity=retrieval_granularity()
+            )
+
+    nist_records = apply_digests(nist_records)
+
+    cache_key = build_cache_key(domain, text, nist_records, PROMPT_TOKEN_BUDGET)
+
+    with span("prompt_build"):
+        prompt, prompt_metrics = build_gap_analysis_prompt(domain, text, nist_records)
+
+    if prompt_metrics["trimmed"]:
+        logger.info(
+            "✂️ Prompt for %s trimmed from %s to %s tokens",
+            domain, prompt_metrics["prompt_tokens_before"], prompt_metrics["prompt_tokens"]
+        )
+
+    return nist_records, cache_key, prompt, prompt_metrics
+
+
+def finalize_gap_result(domain: str, response: str, nist_records: list, cache_key: str,
+                        prompt_metrics: dict = None):
+    """
+    Parse the LLM response, fill in required fields and cache it.
+    Returns None when the response is not valid JSON.
+    """
+    result = extract_json(response, expect=dict)
+
+    if not result:
         return None
 
-    try:
-        # remove markdown json fences if present
-        text = text.replace("```json", "").replace("```", "").strip()
+    # Ensure required fields exist
+    result.setdefault("domain", domain)
+    result.setdefault("subdomain", domain)
+    result.setdefault("gap_analysis", [])
+    result.setdefault("revised_policy", {})
+    result.setdefault("implementation_roadmap", {})
 
-        match = re.search(r"\{.*\}", text, re.DOTALL)
-        if not match:
-            return None
+    result["nist_records_used"] = summarize_nist_records(nist_records)
 
-        json_text = match.group()
+    if prompt_metrics is not None:
+        result["prompt_metrics"] = prompt_metrics
 
-        # attempt to fix truncated JSON
-        open_braces = json_text.count("{")
-        close_braces = json_text.count("}")
+    cache = get_result_cache()
+    if cache is not None:
+        cache.set(cache_key, result)
 
-        if close_braces < open_braces:
-            json_text += "}" * (open_braces - close_braces)
+    return result
 
-        return json.loads(json_text)
 
-    except Exception as e:
-        print("JSON extraction error:", e)
+def _cached_result(domain: str, cache_key: str):
+    cache = get_result_cache()
+    if cache is None:
         return None
 
+    cached = cache.get(cache_key)
+    if cached is not None:
+        logger.info("⚡ Gap analysis cache hit for domain: %s", domain)
+
+    return cached
 
-def analyze_gap_for_domain(domain: str, text: str, use_semantic_search=True):
+
+def analyze_gap_for_domain(domain: str, text: str, use_semantic_search=True, nist_records: list = None):
     """
     FAST GAP ANALYSIS — ONE CALL PER DOMAIN
     """
 
+    with bind(domain=domain):
+        try:
+
+            nist_records, cache_key, prompt, prompt_metrics = prepare_gap_analysis(domain, text, nist_records)
+
+            cached = _cached_result(domain, cache_key)
+            if cached is not None:
+                return cached
+
+            response = call_llm(prompt, schema=GAP_ANALYSIS_SCHEMA)
+
+            logger.debug("\n===== LLM OUTPUT =====\n%s\n======================", response)
+
+            result = finalize_gap_result(domain, response, nist_records, cache_key, prompt_metrics)
+
+            if not result:
+                logger.warning("⚠️ Failed to parse JSON from LLM response")
+                return empty_gap_result(domain)
+
+            logger.info("✅ Gap analysis completed for domain: %s", domain)
+
+            return result
+
+        except Exception as e:
+            logger.error("❌ Gap analysis error: %s", e)
+            return empty_gap_result(domain, error=str(e))
+
+
+def stream_gap_analysis_for_domain(domain: str, text: str):
+    """
+    Streaming variant of analyze_gap_for_domain.
+
+    Yields event dictionaries:
+      {"event": "nist_records", "data": [...]}   once retrieval is done
+      {"event": "gap", "data": {...}}            per completed gap item
+      {"event": "result", "data": {...}}         the full parsed result
+      {"event": "error", "data": {...}}          on failure
+    """
+
+    # Generators cannot reset a context binding across yields safely;
+    # the route hook resets the domain for every request
+    domain_var.set(domain)
+
     try:
+        nist_records, cache_key, prompt, prompt_metrics = prepare_gap_analysis(domain, text)
 
-        # Retrieve relevant NIST records
-        nist_records = fetch_similar_nist_records(
-            policy_text=text,
-            subdomain=domain,
-            top_k=3
-        )
+        yield {"event": "nist_records", "data": summarize_nist_records(nist_records)}
 
-        formatted_nist_chunks = format_nist_chunks_for_prompt(nist_records)
+        cached = _cached_result(domain, cache_key)
+        if cached is not None:
+            for item in cached.get("gap_analysis", []):
+                yield {"event": "gap", "data": item}
+            yield {"event": "result", "data": cached}
+            return
 
-        prompt = GAP_ANALYSIS_PROMPT.format(
-            domain=domain,
-            subdomain=domain,
-            organization_policy=text,
-            nist_chunks=formatted_nist_chunks
-        )
+        parser = IncrementalArrayParser("gap_analysis")
+        pieces = []
 
-        response = call_llm(prompt)
+        for piece in stream_llm(prompt, schema=GAP_ANALYSIS_SCHEMA):
+            pieces.append(piece)
+            for item in parser.feed(piece):
+                yield {"event": "gap", "data": item}
 
-        print(f"\n===== LLM OUTPUT =====\n{response}\n======================")
+        response = "".join(pieces).strip()
+        logger.debug("\n===== LLM OUTPUT =====\n%s\n======================", response)
 
-        result = extract_json(response)
+        result = finalize_gap_result(domain, response, nist_records, cache_key, prompt_metrics)
 
         if not result:
-            print("⚠️ Failed to parse JSON from LLM response")
-
-            return {
-                "domain": domain,
-                "subdomain": domain,
-                "gap_analysis": [],
-                "revised_policy": {
-                    "introduction": "",
-                    "statements": [],
-                    "compliance_notes": ""
-                },
-                "implementation_roadmap": {
-                    "short_term": [],
-                    "mid_term": [],
-                    "long_term": []
-                },
-                "nist_records_used": []
-            }
-
-        # Ensure required fields exist
-        result.setdefault("domain", domain)
-        result.setdefault("subdomain", domain)
-        result.setdefault("gap_analysis", [])
-        result.setdefault("revised_policy", {})
-        result.setdefault("implementation_roadmap", {})
-
-        result["nist_records_used"] = [
-            {
-                "id": r.get("id"),
-                "source": r.get("metadata", {}).get("source_file"),
-                "similarity": r.get("similarity")
-            }
-            for r in nist_records
-        ]
+            logger.warning("⚠️ Failed to parse JSON from LLM response")
+            result = empty_gap_result(domain)
+
+        yield {"event": "result", "data": result}
+
+    except Exception as e:
+        logger.error("❌ Gap analysis error: %s", e)
+        yield {"event": "error", "data": empty_gap_result(domain, error=str(e))}
+
 
-        print(f"✅ Gap analysis completed for domain: {domain}")
+def analyze_policy(chunks: list, concurrency: int = None):
+    """
+    Gap analysis for every domain chunk of a policy.
+
+    Retrieval for all domains is done up front in one batch, then the LLM
+    calls run with at most `concurrency` in flight (defaults to
+    LLM_CONCURRENCY, which should match Ollama's OLLAMA_NUM_PARALLEL).
 
-        return result
+    Yields:
+        Per-domain results in completion order
+    """
+    chunks = [c for c in chunks if c.get("domain") and c.get("text")]
+    if not chunks:
+        return
 
+    try:
+        with span("retrieval"):
+            all_records = fetch_similar_nist_records_batch(
+                [c["text"] for c in chunks],
+                subdomains=[c["domain"] for c in chunks],
+                top_k=RETRIEVAL_TOP_K,
+                granularity=retrieval_granularity()
+            )
     except Exception as e:
-        print("❌ Gap analysis error:", str(e))
-
-        return {
-            "domain": domain,
-            "subdomain": domain,
-            "gap_analysis": [],
-            "revised_policy": {
-                "introduction": "",
-                "statements": [],
-                "compliance_notes": ""
-            },
-            "implementation_roadmap": {
-                "short_term": [],
-                "mid_term": [],
-                "long_term": []
-            },
-            "error": str(e),
-            "nist_records_used": []
-        }
\ No newline at end of file
+        logger.error("❌ Batched NIST retrieval failed: %s", e)
+        for chunk in chunks:
+            yield empty_gap_result(chunk["domain"], error=str(e))
+        return
+
+    with ThreadPoolExecutor(max_workers=concurrency or LLM_CONCURRENCY) as pool:
+        futures = [
+            submit_with_context(
+                pool,
+                analyze_gap_for_domain,
+                domain=chunk["domain"],
+                text=chunk["text"],
+                nist_records=records
+            )
+            for chunk, records in zip(chunks, all_records)
+        ]
+
+        for future in as_completed(futures):
+            yield future.result()
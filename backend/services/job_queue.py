@@ -0,0 +1,360 @@
+import json
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+from backend.config.settings import (
+    JOB_DB_PATH,
+    JOB_WORKERS,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETRY_DELAY,
+    JOB_POLL_INTERVAL
+)
+from backend.utils.metrics import bind
+
+TERMINAL_STATUSES = {"done", "failed"}
+
+
+class JobQueue:
+    """
+    Persistent job queue stored in SQLite.
+
+    Jobs move queued → running → done | failed. Every pipeline stage is
+    appended to job_events so clients can follow progress, and jobs left
+    'running' by a crashed process are requeued on the next start. Jobs
+    that hit a transient error go back to queued until JOB_MAX_ATTEMPTS.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " stage TEXT,"
+                " file_path TEXT NOT NULL,"
+                " sha256 TEXT,"
+                " options TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " run_after REAL,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_events ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " job_id TEXT NOT NULL,"
+                " stage TEXT NOT NULL,"
+                " data TEXT,"
+                " created_at REAL NOT NULL)"
+            )
+            # Databases created before uploads went to the document store
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "sha256" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN sha256 TEXT")
+            if "run_after" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN run_after REAL")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events(job_id, id)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+
+    def submit(self, file_path: str, options: dict = None, job_id: str = None,
+               sha256: str = None) -> str:
+        """
+        Queue a PDF. With sha256 the document is read from the document
+        store and its stored stage artifacts are reused.
+        """
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, stage, file_path, sha256, options, created_at, updated_at)"
+                " VALUES (?, 'queued', 'queued', ?, ?, ?, ?, ?)",
+                (job_id, file_path, sha256, json.dumps(options or {}), now, now)
+            )
+
+        self.add_event(job_id, "queued")
+        return job_id
+
+    def claim(self):
+        """
+        Atomically move the oldest queued job whose retry delay has passed
+        to running and return it.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, file_path, options, sha256, attempts FROM jobs"
+                " WHERE status = 'queued' AND (run_after IS NULL OR run_after <= ?)"
+                " ORDER BY created_at LIMIT 1",
+                (time.time(),)
+            ).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1,"
+                " updated_at = ? WHERE id = ?",
+                (time.time(), row[0])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        return {
+            "id": row[0],
+            "file_path": row[1],
+            "options": json.loads(row[2]),
+            "sha256": row[3],
+            "attempts": row[4] + 1
+        }
+
+    def add_event(self, job_id: str, stage: str, data: dict = None):
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO job_events (job_id, stage, data, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, stage, json.dumps(data) if data is not None else None, now)
+            )
+            conn.execute(
+                "UPDATE jobs SET stage = ?, updated_at = ? WHERE id = ?",
+                (stage, now, job_id)
+            )
+
+    def _transition(self, job_id: str, status: str, stage: str, data: dict = None, **fields):
+        """
+        Set the job status (plus fields) and append its event in one
+        transaction, so readers never see the status without the event.
+        """
+        now = time.time()
+        assignments = "".join(f", {name} = ?" for name in fields)
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                f"UPDATE jobs SET status = ?, stage = ?, updated_at = ?{assignments} WHERE id = ?",
+                (status, stage, now, *fields.values(), job_id)
+            )
+            conn.execute(
+                "INSERT INTO job_events (job_id, stage, data, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, stage, json.dumps(data) if data is not None else None, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, job_id: str, result):
+        self._transition(job_id, "done", "done", result=json.dumps(result))
+
+    def fail(self, job_id: str, error: str):
+        self._transition(job_id, "failed", "failed", {"error": error}, error=error)
+
+    def retry(self, job_id: str, error: str, delay: float):
+        """Put a job back in the queue, to be claimed again after delay seconds."""
+        self._transition(
+            job_id, "queued", "retrying", {"error": error, "delay": delay},
+            error=error, run_after=time.time() + delay
+        )
+
+    def recover(self, max_attempts: int = JOB_MAX_ATTEMPTS) -> int:
+        """
+        Requeue jobs that were running when the previous process died.
+        Jobs that already used up their attempts are marked failed.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Exceeded retry attempts'"
+                " WHERE status = 'running' AND attempts >= ?",
+                (max_attempts,)
+            )
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running'",
+                (time.time(),)
+            )
+            return cursor.rowcount
+
+    def get(self, job_id: str):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, status, stage, result, error, attempts, created_at, updated_at, sha256"
+                " FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return {
+            "id": row[0],
+            "status": row[1],
+            "stage": row[2],
+            "result": json.loads(row[3]) if row[3] else None,
+            "error": row[4],
+            "attempts": row[5],
+            "created_at": row[6],
+            "updated_at": row[7],
+            "sha256": row[8]
+        }
+
+    def events(self, job_id: str, after_id: int = 0) -> list:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, stage, data, created_at FROM job_events"
+                " WHERE job_id = ? AND id > ? ORDER BY id",
+                (job_id, after_id)
+            ).fetchall()
+
+        return [
+            {
+                "id": r[0],
+                "stage": r[1],
+                "data": json.loads(r[2]) if r[2] else None,
+                "created_at": r[3]
+            }
+            for r in rows
+        ]
+
+
+def run_pdf_job(queue: JobQueue, job: dict):
+    """Upload → extract → clean → chunk pipeline, optionally followed by gap analysis."""
+    # Imported lazily so the queue can be created without loading the ML stack
+    from backend.services.pdf_pipeline import process_pdf, process_stored_pdf
+    from backend.services.gap_analysis import analyze_gap_for_domain
+
+    job_id = job["id"]
+
+    # Jobs run outside any request: label them by job id instead
+    with bind(request_id=job_id, route="job"):
+        on_stage = lambda stage, data: queue.add_event(job_id, stage, data)
+
+        # Jobs queued before uploads went to the document store have no sha256
+        if job.get("sha256"):
+            chunks = process_stored_pdf(job["sha256"], on_stage=on_stage)
+        else:
+            chunks = process_pdf(job["file_path"], on_stage=on_stage)
+
+        result = {"domain_chunks": chunks}
+
+        if job["options"].get("analyze"):
+            analyses = []
+            for chunk in chunks:
+                analysis = analyze_gap_for_domain(
+                    domain=chunk["domain"],
+                    text=chunk["text"],
+                    use_semantic_search=True
+                )
+                analyses.append(analysis)
+                queue.add_event(job_id, "analyzed", {
+                    "domain": chunk["domain"],
+                    "gaps": len(analysis.get("gap_analysis", []))
+                })
+            result["gap_analysis"] = analyses
+
+        return result
+
+
+class JobWorkerPool:
+    """
+    Fixed-size pool of background threads that drain the job queue.
+    """
+
+    def __init__(self, queue: JobQueue, workers: int = JOB_WORKERS, handler=run_pdf_job):
+        self.queue = queue
+        self.workers = workers
+        self.handler = handler
+        self._wakeup = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self._threads:
+            return
+
+        recovered = self.queue.recover()
+        if recovered:
+            print(f"🔁 Requeued {recovered} interrupted job(s)")
+
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, name=f"job-worker-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self):
+        self._wakeup.set()
+
+    def _run(self):
+        from backend.llm.mistral_client import _is_transient
+
+        while True:
+            job = self.queue.claim()
+
+            if job is None:
+                self._wakeup.wait(JOB_POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+
+            print(f"▶️ Job {job['id']} started")
+            try:
+                result = self.handler(self.queue, job)
+                self.queue.complete(job["id"], result)
+                print(f"✅ Job {job['id']} completed")
+            except Exception as e:
+                traceback.print_exc()
+
+                if _is_transient(e) and job["attempts"] < JOB_MAX_ATTEMPTS:
+                    delay = JOB_RETRY_DELAY * 2 ** (job["attempts"] - 1)
+                    self.queue.retry(job["id"], str(e), delay)
+                    print(f"🔁 Job {job['id']} hit a transient error, retrying in {delay:.0f}s: {e}")
+                else:
+                    self.queue.fail(job["id"], str(e))
+                    print(f"❌ Job {job['id']} failed: {e}")
+
+
+_queue = None
+_pool = None
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+
+    if _queue is None:
+        _queue = JobQueue(JOB_DB_PATH)
+
+    return _queue
+
+
+def start_job_workers() -> JobWorkerPool:
+    global _pool
+
+    if _pool is None:
+        _pool = JobWorkerPool(get_job_queue())
+        _pool.start()
+
+    return _pool
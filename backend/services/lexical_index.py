@@ -0,0 +1,189 @@
+import json
+import re
+import time
+import numpy as np
+from pathlib import Path
+
+from backend.config.settings import BM25_K1, BM25_B
+from backend.services.vector_index import IndexMetadata, METADATA_FILE, _write_json
+
+LEXICAL_FORMAT_VERSION = 1
+
+POSTINGS_FILE = "bm25.npz"
+VOCABULARY_FILE = "bm25_vocab.json"
+LEXICAL_MANIFEST_FILE = "bm25_manifest.json"
+
+# Identifiers such as "800-53", "ac-2", "140-2" or "sha-256" stay one token
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or "
+    "that the their this to was were will with shall must should all any "
+    "be been such other".split()
+)
+
+
+def tokenize(text: str) -> list:
+    """
+    Lowercased word tokens without stopwords. Compound identifiers are
+    kept whole and also split into their parts, so "FIPS 140-2" matches
+    both "140-2" and "140".
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall((text or "").lower()):
+        if token in _STOPWORDS:
+            continue
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(p for p in re.split(r"[-./]", token) if p and p not in _STOPWORDS)
+    return tokens
+
+
+def build_lexical_index(index_dir: Path, k1: float = BM25_K1, b: float = BM25_B) -> dict:
+    """
+    Build a BM25 inverted index over the documents of an exported vector
+    index (same row numbering), stored next to it:
+
+      bm25_vocab.json      terms, in posting-list order
+      bm25.npz             CSR postings: offsets (V+1), rows, weights
+      bm25_manifest.json   format version, parameters and build time
+
+    Each posting stores the document-side BM25 term weight
+        idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))
+    so a query only sums the weights of its terms' postings.
+
+    Returns:
+        The manifest
+    """
+    index_dir = Path(index_dir)
+    with open(index_dir / METADATA_FILE, "r", encoding="utf-8") as f:
+        documents = json.load(f)["documents"]
+
+    term_rows = {}
+    lengths = np.zeros(len(documents), dtype=np.float32)
+
+    for row, text in enumerate(documents):
+        tokens = tokenize(text)
+        lengths[row] = len(tokens)
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, tf in counts.items():
+            term_rows.setdefault(token, []).append((row, tf))
+
+    count = len(documents)
+    avgdl = float(lengths.mean()) if count else 0.0
+
+    vocabulary = sorted(term_rows)
+    offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    rows, weights = [], []
+
+    for i, term in enumerate(vocabulary):
+        postings = term_rows[term]
+        df = len(postings)
+        idf = np.log(1 + (count - df + 0.5) / (df + 0.5))
+
+        for row, tf in postings:
+            norm = k1 * (1 - b + b * lengths[row] / max(avgdl, 1e-9))
+            rows.append(row)
+            weights.append(idf * tf * (k1 + 1) / (tf + norm))
+
+        offsets[i + 1] = len(rows)
+
+    tmp = index_dir / (POSTINGS_FILE + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            offsets=offsets,
+            rows=np.asarray(rows, dtype=np.int32),
+            weights=np.asarray(weights, dtype=np.float32)
+        )
+    tmp.replace(index_dir / POSTINGS_FILE)
+
+    _write_json(index_dir / VOCABULARY_FILE, vocabulary)
+
+    manifest = {
+        "version": LEXICAL_FORMAT_VERSION,
+        "count": count,
+        "terms": len(vocabulary),
+        "postings": len(rows),
+        "k1": k1,
+        "b": b,
+        "avgdl": avgdl,
+        "built_at": time.time()
+    }
+    _write_json(index_dir / LEXICAL_MANIFEST_FILE, manifest)
+
+    return manifest
+
+
+class LexicalIndex(IndexMetadata):
+    """
+    BM25 search over the precomputed inverted index. Shares row ids,
+    metadata and partitions with the vector index in the same directory.
+    """
+
+    def __init__(self, index_dir: Path):
+        super().__init__(index_dir)
+
+        with open(self.index_dir / LEXICAL_MANIFEST_FILE, "r", encoding="utf-8") as f:
+            self.lexical_manifest = json.load(f)
+
+        if self.lexical_manifest.get("version") != LEXICAL_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported BM25 index version {self.lexical_manifest.get('version')} "
+                f"(expected {LEXICAL_FORMAT_VERSION}); re-run nist_ingest.py"
+            )
+
+        with open(self.index_dir / VOCABULARY_FILE, "r", encoding="utf-8") as f:
+            self.term_ids = {term: i for i, term in enumerate(json.load(f))}
+
+        with np.load(self.index_dir / POSTINGS_FILE) as data:
+            self.offsets = data["offsets"]
+            self.posting_rows = data["rows"]
+            self.posting_weights = data["weights"]
+
+    def scores(self, text: str) -> np.ndarray:
+        """BM25 score of every row for the query text (unique terms)."""
+        ids = {self.term_ids[t] for t in tokenize(text) if t in self.term_ids}
+        if not ids:
+            return np.zeros(len(self), dtype=np.float32)
+
+        slices = [slice(self.offsets[i], self.offsets[i + 1]) for i in ids]
+        rows = np.concatenate([self.posting_rows[s] for s in slices])
+        weights = np.concatenate([self.posting_weights[s] for s in slices])
+
+        return np.bincount(rows, weights=weights, minlength=len(self)).astype(np.float32)
+
+    def search(self, texts: list, top_k: int = 3, where: dict = None) -> list:
+        """
+        Top-k BM25 matches per query text. Rows scoring zero are omitted.
+
+        Returns:
+            One list of (row, score) pairs per query, best first
+        """
+        rows = self.rows_for(where)
+        results = []
+
+        for text in texts:
+            scores = self.scores(text)
+            if rows is not None:
+                candidates, candidate_scores = rows, scores[rows]
+            else:
+                candidates, candidate_scores = np.arange(len(scores)), scores
+
+            if len(candidates) == 0:
+                results.append([])
+                continue
+
+            k = min(top_k, len(candidates))
+            top = np.argpartition(-candidate_scores, k - 1)[:k]
+            top = top[np.argsort(-candidate_scores[top])]
+
+            results.append([
+                (int(candidates[i]), float(candidate_scores[i]))
+                for i in top
+                if candidate_scores[i] > 0
+            ])
+
+        return results
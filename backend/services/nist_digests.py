@@ -0,0 +1,185 @@
+import hashlib
+import json
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from backend.config.settings import (
+    NIST_PROMPT_MODE,
+    NIST_DIGEST_PATH,
+    NIST_DIGEST_MAX_REQUIREMENTS,
+    VECTOR_INDEX_DIR
+)
+from backend.services.vector_index import IndexMetadata, METADATA_FILE, MANIFEST_FILE, _write_json
+
+# Bump whenever digest post-processing changes its output
+DIGEST_CODE_VERSION = 1
+
+_digests = None
+_digests_loaded = False
+_lock = threading.Lock()
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def digest_version() -> str:
+    """
+    Version of the digests: changes with the digest prompt, schema,
+    model or options, so a rebuild only redoes what became stale.
+    """
+    from backend.config.prompts import NIST_DIGEST_PROMPT
+    from backend.config.schemas import NIST_DIGEST_SCHEMA
+    from backend.llm.mistral_client import active_model_id, LLM_OPTIONS, SYSTEM_PROMPT
+
+    payload = {
+        "code": DIGEST_CODE_VERSION,
+        "prompt": _sha256(SYSTEM_PROMPT + "\n" + NIST_DIGEST_PROMPT),
+        "schema": _sha256(json.dumps(NIST_DIGEST_SCHEMA, sort_keys=True)),
+        "model": active_model_id(),
+        "options": LLM_OPTIONS,
+        "max_requirements": NIST_DIGEST_MAX_REQUIREMENTS
+    }
+    return _sha256(json.dumps(payload, sort_keys=True))[:16]
+
+
+def load_digests(path: Path = NIST_DIGEST_PATH) -> dict:
+    """
+    Read the digest checkpoint (JSONL, one digest per line, later lines
+    win) and keep the entries of the current digest version.
+
+    Returns:
+        Map of record id → {"id", "content_hash", "version", "requirements"}
+    """
+    path = Path(path)
+    digests = {}
+
+    if not path.exists():
+        return digests
+
+    version = digest_version()
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted build
+                continue
+            if entry.get("version") == version:
+                digests[entry["id"]] = entry
+
+    return digests
+
+
+def attach_digests(index_dir: Path = VECTOR_INDEX_DIR, path: Path = NIST_DIGEST_PATH) -> int:
+    """
+    Store the current digests in the index metadata as a "digest" column.
+    Only digests built from the indexed content (same content_hash) are
+    attached; other rows get None.
+
+    Returns:
+        Number of rows with a digest
+    """
+    index_dir = Path(index_dir)
+    digests = load_digests(path)
+
+    with open(index_dir / METADATA_FILE, "r", encoding="utf-8") as f:
+        columns = json.load(f)
+
+    column = []
+    for doc_id, content_hash in zip(columns["ids"], columns["content_hash"]):
+        entry = digests.get(doc_id)
+        matches = entry is not None and entry.get("content_hash") == content_hash
+        column.append(entry["requirements"] if matches else None)
+
+    columns["digest"] = column
+    _write_json(index_dir / METADATA_FILE, columns)
+
+    with open(index_dir / MANIFEST_FILE, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    attached = sum(1 for d in column if d)
+    manifest["digest_version"] = digest_version()
+    manifest["digests"] = attached
+    _write_json(index_dir / MANIFEST_FILE, manifest)
+
+    return attached
+
+
+def format_digest(requirements: list) -> str:
+    return "\n".join(f"{i}. {requirement}" for i, requirement in enumerate(requirements, 1))
+
+
+def get_digests() -> dict:
+    """Map of record id → requirements from the index metadata, loaded once."""
+    global _digests, _digests_loaded
+
+    if not _digests_loaded:
+        with _lock:
+            if not _digests_loaded:
+                try:
+                    index = IndexMetadata(VECTOR_INDEX_DIR)
+                    column = index.columns.get("digest") or []
+                    _digests = {
+                        doc_id: requirements
+                        for doc_id, requirements in zip(index.columns["ids"], column)
+                        if requirements
+                    }
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ NIST digests unavailable, using raw text: {e}")
+                    _digests = {}
+
+                if not _digests:
+                    print("⚠️ No NIST digests in the index; run backend/ingest/build_nist_digests.py")
+                _digests_loaded = True
+
+    return _digests
+
+
+def digests_active(mode: str = None) -> bool:
+    """Whether prompts will use digests (digest mode and digests built)."""
+    return (mode or NIST_PROMPT_MODE) == "digest" and bool(get_digests())
+
+
+def retrieval_granularity(mode: str = None):
+    """
+    Granularity to retrieve with for prompts. A digest summarizes a whole
+    document, so with digests retrieval returns distinct parent documents;
+    otherwise the configured granularity (None) applies.
+    """
+    return "parent" if digests_active(mode) else None
+
+
+def apply_digests(records: list, mode: str = None) -> list:
+    """
+    In "digest" mode, replace each record's text by the digest of its
+    document (its parent for passages). Records of the same document
+    collapse into one, since they share the digest. Records without a
+    digest keep their raw text.
+    """
+    if not digests_active(mode):
+        return records
+
+    digests = get_digests()
+
+    result = []
+    seen = set()
+
+    for record in records:
+        doc_id = (record.get("metadata") or {}).get("parent_id") or record.get("id")
+        requirements = digests.get(doc_id)
+
+        if requirements is None:
+            result.append(record)
+            continue
+
+        if doc_id in seen:
+            continue
+        seen.add(doc_id)
+
+        result.append({**record, "text": format_digest(requirements), "digest": True})
+
+    return result
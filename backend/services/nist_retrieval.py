@@ -1,19 +1,398 @@
+import threading
 from pathlib import Path
-from chromadb import PersistentClient
+from concurrent.futures import ThreadPoolExecutor
+from backend.config.settings import (
+    RETRIEVAL_ENGINE,
+    VECTOR_INDEX_DIR,
+    PASSAGE_INDEX_DIR,
+    RETRIEVAL_GRANULARITY,
+    RETRIEVAL_HYBRID,
+    HYBRID_CANDIDATES,
+    RRF_K,
+    RETRIEVAL_QUERY_MODE,
+    MULTI_VECTOR_AGGREGATION,
+    MULTI_VECTOR_TOP_N,
+    MULTI_VECTOR_MAX_SENTENCES
+)
+from backend.chunking.sentence_splitter import split_into_sentences
 from backend.embeddings.embedding_model import load_embedding_model
+from backend.utils.metrics import span, submit_with_context
 
 # Paths
 BASE_DIR = Path(__file__).resolve().parents[2]
 DB_PATH = BASE_DIR / "backend" / "db" / "chroma"
 COLLECTION_NAME = "nist_controls"
+PASSAGE_COLLECTION_NAME = "nist_passages"
 
-_client = PersistentClient(path=str(DB_PATH))
-_collection = _client.get_collection(name=COLLECTION_NAME)
+# Searchable corpora: whole documents and their token-bounded passages
+CORPORA = {
+    "documents": (COLLECTION_NAME, VECTOR_INDEX_DIR),
+    "passages": (PASSAGE_COLLECTION_NAME, PASSAGE_INDEX_DIR)
+}
+
+_collections = {}
+_engines = {}
+_lexical = {}
+_lock = threading.Lock()
+
+
+def get_collection(name: str = COLLECTION_NAME):
+    """Return a shared NIST Chroma collection, opening it on first use."""
+    if name not in _collections:
+        with _lock:
+            if name not in _collections:
+                from chromadb import PersistentClient
+
+                client = PersistentClient(path=str(DB_PATH))
+                _collections[name] = client.get_collection(name=name)
+
+    return _collections[name]
+
+
+def _query_results_to_records(results: dict, index: int = 0) -> list:
+    """Convert the index-th query of a Chroma query result into records."""
+    records = []
+    sim_ids = results.get("ids", [[]])[index]
+    sim_documents = results.get("documents", [[]])[index]
+    sim_metadatas = results.get("metadatas", [[]])[index]
+    sim_distances = results.get("distances", [[]])[index]
+    
+    for doc_id, doc, meta, dist in zip(sim_ids, sim_documents, sim_metadatas, sim_distances):
+        similarity = 1 - dist  # Convert distance to similarity
+        records.append({
+            "id": doc_id,
+            "text": doc,
+            "metadata": meta,
+            "similarity": similarity
+        })
+    
+    return records
+
+
+class ChromaEngine:
+    """Retrieval through the persistent Chroma collection."""
+
+    name = "chroma"
+
+    def __init__(self, collection_name: str = COLLECTION_NAME):
+        self.collection_name = collection_name
+        # Fail early when the collection has not been ingested
+        get_collection(collection_name)
+
+    def query(self, query_embeddings: list, where: dict = None, top_k: int = 3) -> list:
+        query_params = {
+            "query_embeddings": [list(map(float, e)) for e in query_embeddings],
+            "n_results": top_k,
+            "include": ["documents", "metadatas", "distances"]
+        }
+        
+        if where:
+            query_params["where"] = where
+        
+        with span("chroma_query"):
+            results = get_collection(self.collection_name).query(**query_params)
+        return [
+            _query_results_to_records(results, i)
+            for i in range(len(query_embeddings))
+        ]
+
+    def get(self, where: dict = None, limit: int = None, ids: list = None) -> list:
+        # Chroma rejects an empty id list (older versions return everything)
+        if ids is not None and not ids:
+            return []
+
+        results = get_collection(self.collection_name).get(
+            ids=ids,
+            where=where,
+            include=["documents", "metadatas"],
+            limit=limit
+        )
+        
+        # Format results
+        records = []
+        result_ids = results.get("ids", [])
+        documents = results.get("documents", [])
+        metadatas = results.get("metadatas", [])
+        
+        for doc_id, doc, meta in zip(result_ids, documents, metadatas):
+            records.append({
+                "id": doc_id,
+                "text": doc,
+                "metadata": meta
+            })
+        
+        # Chroma returns storage order; callers rely on the requested order
+        if ids is not None:
+            order = {doc_id: i for i, doc_id in enumerate(ids)}
+            records = [r for r in records if r["id"] in order]
+            records.sort(key=lambda r: order[r["id"]])
+        
+        return records
+
+
+class MmapEngine:
+    """
+    Retrieval through the in-process memory-mapped index. Similarity is
+    the exact cosine similarity.
+    """
+
+    name = "mmap"
+
+    def __init__(self, index_dir: Path = VECTOR_INDEX_DIR):
+        from backend.services.vector_index import MmapVectorIndex
+
+        self.index = MmapVectorIndex(index_dir)
+
+    def query(self, query_embeddings: list, where: dict = None, top_k: int = 3) -> list:
+        with span("mmap_query"):
+            hits = self.index.search(query_embeddings, top_k=top_k, where=where)
+        return [
+            [self.index.record(row, similarity) for row, similarity in query_hits]
+            for query_hits in hits
+        ]
+
+    def get(self, where: dict = None, limit: int = None, ids: list = None) -> list:
+        if ids is not None:
+            return self.index.get_by_ids(ids)
+        return self.index.get(where=where, limit=limit)
+
+
+def get_engine(corpus: str = "documents"):
+    """Return the retrieval engine selected by RETRIEVAL_ENGINE for a corpus."""
+    if corpus not in _engines:
+        with _lock:
+            if corpus not in _engines:
+                collection_name, index_dir = CORPORA[corpus]
+
+                if RETRIEVAL_ENGINE == "mmap":
+                    _engines[corpus] = MmapEngine(index_dir)
+                elif RETRIEVAL_ENGINE == "chroma":
+                    _engines[corpus] = ChromaEngine(collection_name)
+                else:
+                    raise ValueError(f"Unknown RETRIEVAL_ENGINE: {RETRIEVAL_ENGINE}")
+
+    return _engines[corpus]
+
+
+def get_lexical_index(corpus: str = "documents"):
+    """
+    Return the BM25 index written next to the corpus's vector index, or
+    None when hybrid retrieval is disabled or the index has not been built.
+    """
+    if not RETRIEVAL_HYBRID:
+        return None
+
+    if corpus not in _lexical:
+        with _lock:
+            if corpus not in _lexical:
+                from backend.services.lexical_index import LexicalIndex
+
+                try:
+                    _lexical[corpus] = LexicalIndex(CORPORA[corpus][1])
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ BM25 index for {corpus} unavailable, using dense retrieval only: {e}")
+                    _lexical[corpus] = None
+
+    return _lexical[corpus]
+
+
+_passages_available = None
+
+
+def _resolve_granularity(granularity: str = None) -> str:
+    """
+    The requested granularity, or "document" when the passage index has
+    not been built yet (checked once).
+    """
+    global _passages_available
+
+    granularity = granularity or RETRIEVAL_GRANULARITY
+    if granularity not in ("passage", "parent", "document"):
+        raise ValueError(f"Unknown retrieval granularity: {granularity}")
+
+    if granularity == "document":
+        return granularity
+
+    if _passages_available is None:
+        try:
+            get_engine("passages")
+            _passages_available = True
+        except Exception as e:
+            print(f"⚠️ Passage index unavailable, retrieving whole documents: {e}")
+            _passages_available = False
+
+    return granularity if _passages_available else "document"
+
+
+def expand_to_parents(passages: list, top_k: int = 3) -> list:
+    """
+    Replace ranked passages by their parent documents, deduplicated in
+    rank order. Each parent keeps the scores of its best passage and
+    lists the matched passages with their offsets.
+    """
+    parents = {}
+
+    for record in passages:
+        meta = record.get("metadata") or {}
+        parent_id = meta.get("parent_id", record["id"])
+
+        if parent_id not in parents:
+            if len(parents) == top_k:
+                continue
+            parents[parent_id] = {
+                key: record[key]
+                for key in ("similarity", "sum_top_n", "rrf_score")
+                if key in record
+            }
+            parents[parent_id]["passages"] = []
+
+        parents[parent_id]["passages"].append({
+            "id": record["id"],
+            "start": meta.get("start"),
+            "end": meta.get("end")
+        })
+
+    if not parents:
+        return []
+
+    documents = get_engine("documents").get(ids=list(parents))
+    return [{**document, **parents[document["id"]]} for document in documents]
+
+
+def reciprocal_rank_fusion(rankings: list, top_k: int = 3, k: int = RRF_K) -> list:
+    """
+    Merge ranked record lists by reciprocal rank fusion: a record scores
+    sum(1 / (k + rank)) over the rankings it appears in.
+
+    The first occurrence of a record is kept (so the dense "similarity"
+    survives when the dense ranking is passed first) and "rrf_score" is
+    added to it.
+    """
+    fused = {}
+
+    for ranking in rankings:
+        for rank, record in enumerate(ranking, 1):
+            if record["id"] not in fused:
+                fused[record["id"]] = {**record, "rrf_score": 0.0}
+            fused[record["id"]]["rrf_score"] += 1.0 / (k + rank)
+
+    return sorted(fused.values(), key=lambda r: r["rrf_score"], reverse=True)[:top_k]
+
+
+def _query_units(texts: list) -> list:
+    """
+    Texts to embed for each query. In multi-vector mode every sentence is
+    a query unit, since the embedder only reads the first 256 word pieces
+    of a text; otherwise the whole text is one unit.
+    """
+    if RETRIEVAL_QUERY_MODE != "multi":
+        return [[text] for text in texts]
+
+    return [
+        split_into_sentences(text)[:MULTI_VECTOR_MAX_SENTENCES] or [text]
+        for text in texts
+    ]
+
+
+def aggregate_sentence_hits(hit_lists: list, top_n: int = MULTI_VECTOR_TOP_N) -> list:
+    """
+    Combine per-sentence results into one ranking per control.
+
+    Each control gets "similarity" (max-sim: its best sentence match),
+    "sum_top_n" (sum of its top_n sentence similarities, rewarding
+    controls that match many sentences) and "matched_sentences".
+    Ranked by MULTI_VECTOR_AGGREGATION ("sum_top_n" or "max").
+    """
+    controls = {}
+
+    for hits in hit_lists:
+        for record in hits:
+            entry = controls.setdefault(record["id"], (record, []))
+            entry[1].append(record["similarity"])
+
+    records = []
+    for record, similarities in controls.values():
+        similarities.sort(reverse=True)
+        records.append({
+            **record,
+            "similarity": similarities[0],
+            "sum_top_n": sum(similarities[:top_n]),
+            "matched_sentences": len(similarities)
+        })
+
+    key = "similarity" if MULTI_VECTOR_AGGREGATION == "max" else "sum_top_n"
+    return sorted(records, key=lambda r: r[key], reverse=True)
+
+
+def _search(texts: list, embeddings: list, where: dict = None, top_k: int = 3,
+            granularity: str = None) -> list:
+    """
+    Top-k records per query text, where embeddings[i] holds the query
+    vectors of texts[i] (one, or one per sentence).
+
+    All vectors go to the engine in a single batched query. Multi-vector
+    results are aggregated per control; with a BM25 index the dense and
+    lexical rankings (HYBRID_CANDIDATES each) are then fused by RRF.
+    For "parent" granularity the ranked passages are then replaced by
+    their top_k distinct parent documents.
+    """
+    granularity = _resolve_granularity(granularity)
+    corpus = "documents" if granularity == "document" else "passages"
+    # Parents need a deeper passage ranking to find top_k distinct ones
+    limit = max(top_k, HYBRID_CANDIDATES) if granularity == "parent" else top_k
+
+    engine = get_engine(corpus)
+    lexical = get_lexical_index(corpus)
+    multi = any(len(vectors) > 1 for vectors in embeddings)
+    candidates = limit if lexical is None and not multi else max(limit, HYBRID_CANDIDATES)
+
+    flat = [vector for vectors in embeddings for vector in vectors]
+    hits = engine.query(flat, where=where, top_k=candidates)
+
+    dense = []
+    offset = 0
+    for vectors in embeddings:
+        query_hits = hits[offset:offset + len(vectors)]
+        offset += len(vectors)
+        dense.append(query_hits[0] if len(vectors) == 1 else aggregate_sentence_hits(query_hits))
+
+    if lexical is None:
+        ranked = [records[:limit] for records in dense]
+    else:
+        with span("bm25_query"):
+            lexical_hits = lexical.search(texts, top_k=candidates, where=where)
+
+        ranked = [
+            reciprocal_rank_fusion(
+                [dense_records, [lexical.record(row) for row, _ in query_hits]],
+                top_k=limit
+            )
+            for dense_records, query_hits in zip(dense, lexical_hits)
+        ]
+
+    if granularity == "parent":
+        return [expand_to_parents(records, top_k) for records in ranked]
+
+    return ranked
+
+
+def _encode_queries(embedder, texts: list) -> list:
+    """Embed the query units of all texts in one encode call."""
+    units = _query_units(texts)
+    vectors = embedder.encode([unit for text_units in units for unit in text_units])
+
+    embeddings = []
+    offset = 0
+    for text_units in units:
+        embeddings.append(list(vectors[offset:offset + len(text_units)]))
+        offset += len(text_units)
+
+    return embeddings
 
 
 def fetch_related_nist_records(subdomain: str, domain: str = None, top_k: int = 3):
     """
-    Fetch related NIST records from ChromaDB based on subdomain.
+    Fetch related NIST records based on subdomain.
     Uses metadata filtering to find exact subdomain matches.
     
     Args:
@@ -24,83 +403,94 @@ def fetch_related_nist_records(subdomain: str, domain: str = None, top_k: int =
     Returns:
         List of dictionaries with 'id', 'text', 'metadata'
     """
-    collection = _collection
-
-    
     # Build where clause
     where_clause = {"subdomain": subdomain}
     if domain:
-        where_clause["domain"] = domain
-    
-    results = collection.get(
-        where=where_clause,
-        include=["documents", "metadatas"],
-        limit=top_k
-    )
-    
-    # Format results
-    records = []
-    ids = results.get("ids", [])
-    documents = results.get("documents", [])
-    metadatas = results.get("metadatas", [])
-    
-    for i, (doc_id, doc, meta) in enumerate(zip(ids, documents, metadatas)):
-        records.append({
-            "id": doc_id,
-            "text": doc,
-            "metadata": meta
-        })
+        where_clause = {"$and": [{"subdomain": subdomain}, {"domain": domain}]}
     
-    return records
+    return get_engine().get(where=where_clause, limit=top_k)
 
 
-def fetch_similar_nist_records(policy_text: str, subdomain: str = None, top_k: int = 3):
+def fetch_similar_nist_records(policy_text: str, subdomain: str = None, top_k: int = 3,
+                               granularity: str = None):
     """
-    Fetch similar NIST records using semantic search.
+    Fetch similar NIST records using semantic search, fused with BM25
+    keyword matches when the lexical index is available.
     
     Args:
         policy_text: The organization policy text to compare
         subdomain: Optional subdomain filter
         top_k: Number of similar records to return
+        granularity: "passage" (matching passages, with parent_id and
+                     start/end offsets in their metadata), "parent" (the
+                     deduplicated parent documents of the matching
+                     passages) or "document"; defaults to RETRIEVAL_GRANULARITY
         
     Returns:
-        List of dictionaries with 'id', 'text', 'metadata', 'similarity'
+        List of dictionaries with 'id', 'text', 'metadata' and, where
+        available, 'similarity', 'sum_top_n' and 'rrf_score'
     """
     embedder = load_embedding_model()
-    collection = _collection
+    
+    # Embed the policy text (or, in multi-vector mode, its sentences)
+    query_embeddings = _encode_queries(embedder, [policy_text])
+    
+    where = {"subdomain": subdomain} if subdomain else None
+    
+    return _search([policy_text], query_embeddings, where=where, top_k=top_k,
+                   granularity=granularity)[0]
 
+
+def fetch_similar_nist_records_batch(policy_texts: list, subdomains: list = None, top_k: int = 3,
+                                     granularity: str = None):
+    """
+    Batched variant of fetch_similar_nist_records.
     
-    # Create embedding for the input policy text
-    query_embedding = embedder.encode(policy_text).tolist()
+    All texts (or all their sentences) are embedded in one encode call.
+    Queries sharing the same
+    subdomain filter go to the engine as a single multi-embedding query,
+    and the distinct filters are queried concurrently.
     
-    # Build query
-    query_params = {
-        "query_embeddings": [query_embedding],
-        "n_results": top_k,
-        "include": ["documents", "metadatas", "distances"]
-    }
+    Args:
+        policy_texts: Policy texts to compare
+        subdomains: Optional subdomain filter per text (None entries mean no filter)
+        top_k: Number of similar records to return per text
+        granularity: See fetch_similar_nist_records
+        
+    Returns:
+        List of record lists, aligned with policy_texts
+    """
+    if not policy_texts:
+        return []
     
-    # Optionally filter by subdomain
-    if subdomain:
-        query_params["where"] = {"subdomain": subdomain}
+    subdomains = subdomains or [None] * len(policy_texts)
+    embedder = load_embedding_model()
     
-    results = collection.query(**query_params)
+    embeddings = _encode_queries(embedder, list(policy_texts))
     
-    # Format results
-    records = []
-    sim_ids = results.get("ids", [[]])[0]
-    sim_documents = results.get("documents", [[]])[0]
-    sim_metadatas = results.get("metadatas", [[]])[0]
-    sim_distances = results.get("distances", [[]])[0]
+    groups = {}
+    for i, subdomain in enumerate(subdomains):
+        groups.setdefault(subdomain, []).append(i)
     
-    for doc_id, doc, meta, dist in zip(sim_ids, sim_documents, sim_metadatas, sim_distances):
-        similarity = 1 - dist  # Convert distance to similarity
-        records.append({
-            "id": doc_id,
-            "text": doc,
-            "metadata": meta,
-            "similarity": similarity
-        })
+    def run_group(subdomain, indices):
+        results = _search(
+            [policy_texts[i] for i in indices],
+            [embeddings[i] for i in indices],
+            where={"subdomain": subdomain} if subdomain else None,
+            top_k=top_k,
+            granularity=granularity
+        )
+        return indices, results
+    
+    records = [None] * len(policy_texts)
+    
+    with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+        futures = [submit_with_context(pool, run_group, sd, idx) for sd, idx in groups.items()]
+        
+        for future in futures:
+            indices, results = future.result()
+            for i, query_records in zip(indices, results):
+                records[i] = query_records
     
     return records
 
@@ -128,6 +518,11 @@ def format_nist_chunks_for_prompt(records: list) -> str:
         chunk += f"Domain: {meta.get('domain', 'N/A')}\n"
         chunk += f"Subdomain: {meta.get('subdomain', 'N/A')}\n"
         
+        # Passages point back into their source document; digests
+        # already summarize the whole document
+        if meta.get("parent_id") and not record.get("digest"):
+            chunk += f"Excerpt of: {meta['parent_id']}\n"
+        
         # Add similarity score if available
         if "similarity" in record:
             chunk += f"Similarity: {record['similarity']:.4f}\n"
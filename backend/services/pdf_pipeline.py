@@ -1,18 +1,143 @@
-from backend.ocr.pdf_loader import extract_text_from_pdf
+import logging
+
+from backend.ocr.pdf_loader import extract_pages_from_pdf, summarize_extraction
 from backend.ocr.text_cleaner import clean_text
 from backend.chunking.domain_chunker import chunk_by_domain
+from backend.chunking.sentence_splitter import split_into_sentences
+from backend.services.document_store import get_document_store
+from backend.utils.metrics import span
+
+logger = logging.getLogger(__name__)
+
 
-def process_pdf(pdf_path: str):
+def extract_pdf_text(pdf_path: str, workers: int = None):
     """
-    Complete PDF → OCR → Clean → Domain Chunk pipeline
+    PDF → OCR → Clean stages, without any LLM call.
+
+    Args:
+        pdf_path: Path to the PDF
+        workers: Cap on processes used for this document (default PDF_WORKERS)
+
+    Returns:
+        (extraction summary, cleaned text)
     """
-    raw_text = extract_text_from_pdf(pdf_path)
+    with span("pdf_extraction"):
+        pages = extract_pages_from_pdf(pdf_path, workers=workers)
+    summary = summarize_extraction(pages)
+    logger.info(
+        "Extracted %s pages (%s text layer, %s OCR)",
+        len(pages), summary["text_pages"], summary["ocr_pages"]
+    )
+    for page in summary["pages"]:
+        logger.debug("  page %s: %s", page["page"], page["method"])
+
+    raw_text = "\n".join(p["text"] for p in pages if p["text"])
 
     if not raw_text.strip():
         raise ValueError("No text extracted from PDF")
 
-    cleaned_text = clean_text(raw_text)
-    chunks = chunk_by_domain(cleaned_text)
-    print(f"Extracted {len(chunks)} domain-specific chunks from PDF")
-    print("pdf pipeline completed")
+    with span("cleaning"):
+        cleaned_text = clean_text(raw_text)
+
+    return summary, cleaned_text
+
+
+def process_pdf(pdf_path: str, on_stage=None):
+    """
+    Complete PDF → OCR → Clean → Domain Chunk pipeline
+
+    Args:
+        pdf_path: Path to the uploaded PDF
+        on_stage: Optional callback(stage, data) invoked after each stage
+    """
+    report = on_stage or (lambda stage, data: None)
+
+    summary, cleaned_text = extract_pdf_text(pdf_path)
+    report("extracted", summary)
+    report("cleaned", {"characters": len(cleaned_text)})
+
+    with span("chunking"):
+        chunks = chunk_by_domain(cleaned_text)
+    report("chunked", {"domains": [c["domain"] for c in chunks]})
+
+    logger.info("Extracted %s domain-specific chunks from PDF", len(chunks))
+    logger.info("pdf pipeline completed")
+    return chunks
+
+
+
+def extract_stored_text(sha256: str, store=None, workers: int = None):
+    """
+    Raw text, cleaned text and sentence artifacts for a stored document,
+    reused when they exist for the current stage versions.
+
+    Returns:
+        (extraction summary, cleaned text, cached)
+    """
+    store = store or get_document_store()
+    pdf_path = str(store.blob_path(sha256))
+
+    def extract():
+        with span("pdf_extraction"):
+            pages = extract_pages_from_pdf(pdf_path, workers=workers)
+        raw_text = "\n".join(p["text"] for p in pages if p["text"])
+
+        if not raw_text.strip():
+            raise ValueError("No text extracted from PDF")
+
+        return {"text": raw_text, "summary": summarize_extraction(pages)}
+
+    def clean():
+        with span("cleaning"):
+            return clean_text(raw["text"])
+
+    raw, raw_cached = store.get_or_compute(sha256, "raw_text", extract)
+    cleaned_text, cleaned_cached = store.get_or_compute(sha256, "cleaned_text", clean)
+    store.get_or_compute(sha256, "sentences", lambda: split_into_sentences(cleaned_text))
+
+    return raw["summary"], cleaned_text, raw_cached and cleaned_cached
+
+
+def chunk_stored_text(sha256: str, cleaned_text: str, store=None):
+    """
+    Domain chunks for a stored document, reused when they exist for the
+    current chunking version (code, prompt, model and settings).
+
+    Returns:
+        (chunks, cached)
+    """
+    store = store or get_document_store()
+
+    def chunk():
+        with span("chunking"):
+            return chunk_by_domain(cleaned_text)
+
+    # An empty result means the LLM output was unusable: do not keep it
+    return store.get_or_compute(sha256, "chunks", chunk, should_store=bool)
+
+
+def process_stored_pdf(sha256: str, on_stage=None, store=None):
+    """
+    Same pipeline as process_pdf for a document in the content-addressed
+    store. Each stage's artifact is reused when it exists for the current
+    stage version, so re-uploads of identical bytes skip OCR and the LLM.
+
+    Args:
+        sha256: Digest returned by DocumentStore.put_stream
+        on_stage: Optional callback(stage, data) invoked after each stage
+        store: DocumentStore (defaults to the shared one)
+    """
+    report = on_stage or (lambda stage, data: None)
+
+    summary, cleaned_text, cached = extract_stored_text(sha256, store)
+    report("extracted", {**summary, "cached": cached})
+    report("cleaned", {"characters": len(cleaned_text), "cached": cached})
+
+    chunks, cached = chunk_stored_text(sha256, cleaned_text, store)
+    report("chunked", {"domains": [c["domain"] for c in chunks], "cached": cached})
+
+    logger.info(
+        "%s %s domain-specific chunks for %s",
+        "Reused" if cached else "Extracted", len(chunks), sha256[:12]
+    )
     return chunks
@@ -0,0 +1,200 @@
+import math
+
+import numpy as np
+
+from backend.config.prompts import GAP_ANALYSIS_PROMPT
+from backend.config.settings import PROMPT_TOKEN_BUDGET, PROMPT_POLICY_SHARE, PROMPT_TOKEN_MARGIN
+from backend.chunking.sentence_splitter import split_into_sentences
+from backend.embeddings.embedding_model import load_embedding_model
+from backend.llm.mistral_client import token_counter
+from backend.services.nist_retrieval import format_nist_chunks_for_prompt
+from backend.utils.token_utils import estimate_tokens, CHARS_PER_TOKEN
+
+
+def _render(domain: str, policy_text: str, nist_records: list) -> str:
+    return GAP_ANALYSIS_PROMPT.format(
+        domain=domain,
+        subdomain=domain,
+        organization_policy=policy_text,
+        nist_chunks=format_nist_chunks_for_prompt(nist_records)
+    )
+
+
+def _token_counter():
+    """
+    Count with the backend tokenizer when there is one; otherwise with
+    the estimate plus PROMPT_TOKEN_MARGIN, so the budget still holds.
+    """
+    count = token_counter()
+    if count is not None:
+        return count
+
+    return lambda text: math.ceil(estimate_tokens(text) * (1 + PROMPT_TOKEN_MARGIN))
+
+
+def _cut(text: str, tokens: int) -> str:
+    """Drop roughly tokens tokens from the end of text, at a word boundary."""
+    keep = max(0, len(text) - tokens * CHARS_PER_TOKEN)
+    cut = text.rfind(" ", 0, keep + 1)
+    return text[:cut if cut > 0 else keep].rstrip()
+
+
+def _truncate(domain: str, policy_text: str, nist_records: list, budget: int, count) -> str:
+    """
+    Last resort when sentence selection cannot get under budget: cut the
+    longest of the policy and NIST texts by characters until it fits.
+    """
+    records = [dict(r) for r in nist_records]
+    prompt = _render(domain, policy_text, records)
+    overflow = count(prompt) - budget
+
+    while overflow > 0:
+        texts = [policy_text] + [r.get("text") or "" for r in records]
+        longest = max(range(len(texts)), key=lambda i: len(texts[i]))
+        if not texts[longest]:
+            break
+
+        shortened = _cut(texts[longest], overflow)
+        if longest == 0:
+            policy_text = shortened
+        else:
+            records[longest - 1]["text"] = shortened
+
+        prompt = _render(domain, policy_text, records)
+        overflow = count(prompt) - budget
+
+    return prompt
+
+
+def _select(sentences: list, scores: np.ndarray, budget: int, count) -> list:
+    """
+    Keep the highest-scoring sentences that fit in budget tokens.
+    Returns their indices in original order.
+    """
+    kept = []
+    used = 0
+
+    for i in np.argsort(-scores):
+        tokens = count(sentences[i])
+        if used + tokens <= budget:
+            kept.append(int(i))
+            used += tokens
+
+    return sorted(kept)
+
+
+def build_gap_analysis_prompt(domain: str, policy_text: str, nist_records: list,
+                              budget: int = PROMPT_TOKEN_BUDGET):
+    """
+    Render GAP_ANALYSIS_PROMPT within a token budget.
+
+    When the full prompt is over budget, the policy and NIST texts are
+    split into sentences and embedded in one batch; each policy sentence is
+    scored by its best match among NIST sentences and vice versa, and the
+    best-scoring sentences of each side are kept (in document order) until
+    the budget is filled.
+    Without NIST text (nothing retrieved) the policy sentences are scored
+    against the domain name and get the whole budget. If the result is
+    still over budget (or there are no sentences to select), the texts
+    are cut by characters.
+
+    Tokens are counted with the backend tokenizer when one is loaded
+    in-process (llama.cpp), else estimated with PROMPT_TOKEN_MARGIN.
+
+    Returns:
+        (prompt, metrics) where metrics describes what was trimmed
+    """
+    count = _token_counter()
+    prompt = _render(domain, policy_text, nist_records)
+    prompt_tokens = count(prompt)
+
+    metrics = {
+        "budget": budget,
+        "prompt_tokens_before": prompt_tokens,
+        "prompt_tokens": prompt_tokens,
+        "trimmed": False
+    }
+
+    if not budget or prompt_tokens <= budget:
+        return prompt, metrics
+
+    # Everything except the two variable texts: template, headers, metadata
+    skeleton = _render(domain, "", [dict(r, text="") for r in nist_records])
+    available = max(0, budget - count(skeleton))
+
+    policy_sentences = split_into_sentences(policy_text)
+    nist_sentences = [split_into_sentences(r.get("text") or "") for r in nist_records]
+    flat_nist = [s for sentences in nist_sentences for s in sentences]
+
+    if not policy_sentences:
+        prompt = _truncate(domain, policy_text, nist_records, budget, count)
+        metrics.update({"prompt_tokens": count(prompt), "trimmed": True, "truncated": True})
+        return prompt, metrics
+
+    embedder = load_embedding_model()
+    policy_tokens = sum(count(s) for s in policy_sentences)
+    nist_tokens = sum(count(s) for s in flat_nist)
+
+    if flat_nist:
+        vectors = np.asarray(
+            embedder.encode(policy_sentences + flat_nist, normalize_embeddings=True),
+            dtype=np.float32
+        )
+        similarity = vectors[:len(policy_sentences)] @ vectors[len(policy_sentences):].T
+
+        policy_scores = similarity.max(axis=1)
+        nist_scores = similarity.max(axis=0)
+
+        # Split the budget, handing any share one side does not need to the other
+        policy_budget = int(available * PROMPT_POLICY_SHARE)
+        nist_budget = available - policy_budget
+        if policy_tokens < policy_budget:
+            nist_budget += policy_budget - policy_tokens
+            policy_budget = policy_tokens
+        elif nist_tokens < nist_budget:
+            policy_budget += nist_budget - nist_tokens
+            nist_budget = nist_tokens
+    else:
+        # Nothing retrieved: score policy sentences against the domain
+        # name and give the policy the whole budget
+        vectors = np.asarray(
+            embedder.encode(policy_sentences + [domain], normalize_embeddings=True),
+            dtype=np.float32
+        )
+        policy_scores = vectors[:-1] @ vectors[-1]
+        nist_scores = np.zeros(0, dtype=np.float32)
+        policy_budget, nist_budget = available, 0
+
+    kept_policy = _select(policy_sentences, policy_scores, policy_budget, count)
+    kept_nist = set(_select(flat_nist, nist_scores, nist_budget, count))
+
+    trimmed_policy = " ".join(policy_sentences[i] for i in kept_policy)
+
+    trimmed_records = []
+    offset = 0
+    for record, sentences in zip(nist_records, nist_sentences):
+        kept = [s for j, s in enumerate(sentences) if offset + j in kept_nist]
+        offset += len(sentences)
+        trimmed_records.append(dict(record, text=" ".join(kept)))
+
+    prompt = _render(domain, trimmed_policy, trimmed_records)
+    truncated = count(prompt) > budget
+    if truncated:
+        # Sentences joined by spaces can still exceed the per-sentence sum
+        prompt = _truncate(domain, trimmed_policy, trimmed_records, budget, count)
+
+    metrics.update({
+        "prompt_tokens": count(prompt),
+        "trimmed": True,
+        "truncated": truncated,
+        "policy_sentences": len(policy_sentences),
+        "policy_sentences_kept": len(kept_policy),
+        "nist_sentences": len(flat_nist),
+        "nist_sentences_kept": len(kept_nist),
+        "policy_tokens_before": policy_tokens,
+        "policy_tokens_after": sum(count(policy_sentences[i]) for i in kept_policy),
+        "nist_tokens_before": nist_tokens,
+        "nist_tokens_after": sum(count(flat_nist[i]) for i in kept_nist)
+    })
+
+    return prompt, metrics
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from backend.config.prompts import GAP_ANALYSIS_PROMPT
+from backend.config.schemas import GAP_ANALYSIS_SCHEMA
+from backend.config.settings import (
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_PATH,
+    RESULT_CACHE_MAX_ENTRIES,
+    RESULT_CACHE_MAX_BYTES,
+    STRUCTURED_OUTPUT
+)
+from backend.llm.mistral_client import active_model_id, SYSTEM_PROMPT, LLM_OPTIONS
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# Any edit to the prompt template, system prompt or output schema produces
+# a new version, so stale results are never served after a prompt change.
+PROMPT_VERSION = _sha256("\n".join([
+    SYSTEM_PROMPT,
+    GAP_ANALYSIS_PROMPT,
+    json.dumps(GAP_ANALYSIS_SCHEMA, sort_keys=True) if STRUCTURED_OUTPUT else ""
+]))[:16]
+
+
+def normalize_policy_text(text: str) -> str:
+    """Collapse whitespace so cosmetic differences map to the same key."""
+    return " ".join((text or "").split())
+
+
+def build_cache_key(domain: str, text: str, nist_records: list, prompt_budget: int = 0) -> str:
+    """
+    Build a content-addressed key for one gap analysis request.
+
+    The retrieved NIST records contribute both their ids and a hash of
+    their text, so re-ingesting the NIST index invalidates affected entries.
+    The prompt token budget is included since it changes what the model sees.
+    """
+    payload = {
+        "domain": domain,
+        "policy": normalize_policy_text(text),
+        "nist": [
+            [r.get("id"), _sha256(r.get("text") or "")]
+            for r in nist_records
+        ],
+        "prompt_version": PROMPT_VERSION,
+        "model": active_model_id(),
+        "options": LLM_OPTIONS,
+        "prompt_budget": prompt_budget
+    }
+    return _sha256(json.dumps(payload, sort_keys=True))
+
+
+class ResultCache:
+    """
+    Persistent SQLite-backed result cache with size-bounded LRU eviction.
+    """
+
+    def __init__(self, path, max_entries: int, max_bytes: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_results_last_access"
+                " ON results(last_access)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(str(self.path), timeout=10)
+
+    def get(self, key: str):
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            conn.execute(
+                "UPDATE results SET last_access = ? WHERE key = ?",
+                (time.time(), key)
+            )
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, key: str, value: dict):
+        data = json.dumps(value)
+        now = time.time()
+
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results"
+                " (key, value, size, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """Drop least recently used entries until both bounds are met."""
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        rows = conn.execute(
+            "SELECT key, size FROM results ORDER BY last_access ASC"
+        ).fetchall()
+
+        stale = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((key,))
+            count -= 1
+            total -= size
+
+        conn.executemany("DELETE FROM results WHERE key = ?", stale)
+        self.evictions += len(stale)
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM results")
+
+    def stats(self) -> dict:
+        with self._lock, self._connect() as conn:
+            count, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "prompt_version": PROMPT_VERSION
+        }
+
+
+_cache = None
+
+
+def get_result_cache():
+    """Return the shared cache, or None when caching is disabled."""
+    global _cache
+
+    if not RESULT_CACHE_ENABLED:
+        return None
+
+    if _cache is None:
+        _cache = ResultCache(
+            RESULT_CACHE_PATH,
+            max_entries=RESULT_CACHE_MAX_ENTRIES,
+            max_bytes=RESULT_CACHE_MAX_BYTES
+        )
+
+    return _cache
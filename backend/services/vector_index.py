@@ -0,0 +1,218 @@
+import json
+import time
+import numpy as np
+from pathlib import Path
+
+INDEX_FORMAT_VERSION = 1
+
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.json"
+PARTITIONS_FILE = "partitions.json"
+MANIFEST_FILE = "manifest.json"
+
+# Metadata fields stored as columns; every row has a value in each
+METADATA_COLUMNS = ["domain", "subdomain", "source", "content_hash"]
+# Passages also point back into their parent document
+PASSAGE_METADATA_COLUMNS = METADATA_COLUMNS + ["parent_id", "start", "end"]
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _write_json(path: Path, data):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    tmp.replace(path)
+
+
+def build_vector_index(collection, index_dir: Path, columns: list = METADATA_COLUMNS) -> dict:
+    """
+    Export a Chroma collection into the memory-mapped index format:
+
+      embeddings.npy   float32 (N x D), L2-normalized rows
+      metadata.json    columnar ids, documents and metadata fields
+      partitions.json  row ids per domain and per subdomain
+      manifest.json    format version, shape, columns and build time
+
+    Returns:
+        The manifest
+    """
+    stored = collection.get(include=["embeddings", "documents", "metadatas"])
+
+    ids = list(stored.get("ids", []))
+    order = sorted(range(len(ids)), key=lambda i: ids[i])
+
+    embeddings = np.asarray(stored.get("embeddings"), dtype=np.float32)[order]
+    documents = [stored["documents"][i] for i in order]
+    metadatas = [stored["metadatas"][i] or {} for i in order]
+    ids = [ids[i] for i in order]
+
+    stored_columns = {"ids": ids, "documents": documents}
+    for column in columns:
+        stored_columns[column] = [meta.get(column) for meta in metadatas]
+
+    partitions = {"domain": {}, "subdomain": {}}
+    for row, meta in enumerate(metadatas):
+        for field in partitions:
+            value = meta.get(field)
+            if value is not None:
+                partitions[field].setdefault(value, []).append(row)
+
+    index_dir.mkdir(parents=True, exist_ok=True)
+
+    tmp = index_dir / (EMBEDDINGS_FILE + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, _normalize_rows(embeddings).astype(np.float32))
+    tmp.replace(index_dir / EMBEDDINGS_FILE)
+
+    _write_json(index_dir / METADATA_FILE, stored_columns)
+    _write_json(index_dir / PARTITIONS_FILE, partitions)
+
+    manifest = {
+        "version": INDEX_FORMAT_VERSION,
+        "count": len(ids),
+        "dim": int(embeddings.shape[1]) if len(ids) else 0,
+        "columns": list(columns),
+        "built_at": time.time()
+    }
+    # Written last so a half-built index is never picked up
+    _write_json(index_dir / MANIFEST_FILE, manifest)
+
+    return manifest
+
+
+class IndexMetadata:
+    """
+    Row metadata and partitions of an exported index. Rows are shared by
+    every index built in the same directory (vector and lexical).
+    """
+
+    def __init__(self, index_dir: Path):
+        self.index_dir = Path(index_dir)
+
+        with open(self.index_dir / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+        if self.manifest.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported vector index version {self.manifest.get('version')} "
+                f"(expected {INDEX_FORMAT_VERSION}); re-run nist_ingest.py"
+            )
+
+        with open(self.index_dir / METADATA_FILE, "r", encoding="utf-8") as f:
+            self.columns = json.load(f)
+
+        self.metadata_columns = self.manifest.get("columns", METADATA_COLUMNS)
+        self.row_of = {doc_id: row for row, doc_id in enumerate(self.columns["ids"])}
+
+        with open(self.index_dir / PARTITIONS_FILE, "r", encoding="utf-8") as f:
+            partitions = json.load(f)
+
+        self.partitions = {
+            field: {value: np.asarray(rows, dtype=np.int64) for value, rows in groups.items()}
+            for field, groups in partitions.items()
+        }
+
+    def __len__(self):
+        return len(self.columns["ids"])
+
+    def rows_for(self, where: dict = None):
+        """
+        Row ids matching an equality filter such as {"subdomain": "..."}
+        or a Chroma-style {"$and": [{...}, {...}]}.
+        Returns None when there is no filter (all rows).
+        """
+        if not where:
+            return None
+
+        conditions = {}
+        for field, value in where.items():
+            if field == "$and":
+                for clause in value:
+                    conditions.update(clause)
+            else:
+                conditions[field] = value
+
+        rows = None
+        for field, value in conditions.items():
+            if field in self.partitions:
+                matched = self.partitions[field].get(value, np.empty(0, dtype=np.int64))
+            else:
+                column = self.columns.get(field, [])
+                matched = np.asarray(
+                    [i for i, v in enumerate(column) if v == value], dtype=np.int64
+                )
+            rows = matched if rows is None else np.intersect1d(rows, matched)
+
+        return rows
+
+    def record(self, row: int, similarity: float = None) -> dict:
+        record = {
+            "id": self.columns["ids"][row],
+            "text": self.columns["documents"][row],
+            "metadata": {
+                column: self.columns[column][row]
+                for column in self.metadata_columns
+                if column in self.columns
+            }
+        }
+
+        if similarity is not None:
+            record["similarity"] = similarity
+
+        return record
+
+    def get(self, where: dict = None, limit: int = None) -> list:
+        rows = self.rows_for(where)
+        rows = range(len(self)) if rows is None else rows.tolist()
+        return [self.record(row) for row in list(rows)[:limit]]
+
+    def get_by_ids(self, ids: list) -> list:
+        """Records for the given ids, in that order; unknown ids are skipped."""
+        return [self.record(self.row_of[doc_id]) for doc_id in ids if doc_id in self.row_of]
+
+
+class MmapVectorIndex(IndexMetadata):
+    """
+    Exact top-k search over a memory-mapped float32 embedding matrix.
+
+    Filters use the precomputed partitions, so a subdomain query only
+    touches that subdomain's rows.
+    """
+
+    def __init__(self, index_dir: Path):
+        super().__init__(index_dir)
+        self.embeddings = np.load(self.index_dir / EMBEDDINGS_FILE, mmap_mode="r")
+
+    def search(self, query_vectors, top_k: int = 3, where: dict = None) -> list:
+        """
+        Exact cosine top-k for a batch of query vectors.
+
+        Returns:
+            One list of (row, similarity) pairs per query, best first
+        """
+        queries = _normalize_rows(np.atleast_2d(np.asarray(query_vectors, dtype=np.float32)))
+        rows = self.rows_for(where)
+
+        candidates = self.embeddings if rows is None else self.embeddings[rows]
+        if len(candidates) == 0:
+            return [[] for _ in range(len(queries))]
+
+        scores = queries @ np.asarray(candidates).T
+        k = min(top_k, scores.shape[1])
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+
+        for q in range(len(queries)):
+            best = top[q][np.argsort(-scores[q, top[q]])]
+            row_ids = best if rows is None else rows[best]
+            results.append([
+                (int(row), float(scores[q, col]))
+                for row, col in zip(row_ids, best)
+            ])
+
+        return results
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+
+
+def _process_start_time() -> float:
+    """
+    Wall-clock time the process started, so cold-start figures include
+    interpreter start-up and imports, not just the time since this module
+    was loaded. Falls back to the import time where it cannot be read.
+    """
+    try:
+        import psutil
+
+        return psutil.Process().create_time()
+    except Exception:
+        pass
+
+    try:
+        with open("/proc/self/stat", "r") as f:
+            # comm (field 2) may contain spaces; fields after it are fixed
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+
+        with open("/proc/stat", "r") as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+
+        return boot_time + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return time.time()
+
+
+_boot_started = _process_start_time()
+_lock = threading.Lock()
+_started = False
+
+# component → {"state": "pending" | "loading" | "ready" | "failed", ...}
+_components = {
+    "embedder": {"state": "pending"},
+    "index": {"state": "pending"},
+    "llm": {"state": "pending"},
+}
+_ready_after = None
+
+
+def _warm_embedder():
+    from backend.embeddings.embedding_model import load_embedding_model
+
+    load_embedding_model().encode("warm-up")
+
+
+def _warm_index():
+    from backend.services.nist_retrieval import get_engine
+
+    get_engine().get(limit=1)
+
+
+def _warm_llm():
+    from backend.llm.mistral_client import get_llm_backend
+
+    get_llm_backend().preload()
+
+
+_WARMERS = {
+    "embedder": _warm_embedder,
+    "index": _warm_index,
+    "llm": _warm_llm,
+}
+
+
+def _run(name: str):
+    global _ready_after
+
+    with _lock:
+        _components[name] = {"state": "loading"}
+
+    started = time.perf_counter()
+    try:
+        _WARMERS[name]()
+        status = {"state": "ready"}
+    except Exception as e:
+        status = {"state": "failed", "error": str(e)}
+        print(f"❌ Warm-up of {name} failed: {e}")
+
+    status["load_seconds"] = round(time.perf_counter() - started, 3)
+
+    with _lock:
+        _components[name] = status
+        all_ready = all(c["state"] == "ready" for c in _components.values())
+        if all_ready and _ready_after is None:
+            _ready_after = time.time() - _boot_started
+            print(f"🚀 Cold start to ready: {_ready_after:.2f}s")
+
+
+def start_warmup():
+    """
+    Preload the embedder, retrieval index and Ollama model in background
+    threads so the first user request does not pay for them.
+    """
+    global _started
+
+    with _lock:
+        if _started:
+            return
+        _started = True
+
+    for name in _WARMERS:
+        threading.Thread(target=_run, args=(name,), name=f"warmup-{name}", daemon=True).start()
+
+
+def readiness() -> dict:
+    with _lock:
+        components = {name: dict(status) for name, status in _components.items()}
+        ready_after = _ready_after
+
+    return {
+        "ready": all(c["state"] == "ready" for c in components.values()),
+        "components": components,
+        "cold_start_seconds": round(ready_after, 3) if ready_after is not None else None,
+        "uptime_seconds": round(time.time() - _boot_started, 3)
+    }
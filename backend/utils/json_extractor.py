@@ -1,38 +1,230 @@
 import json
-import re
 
-def extract_json(text: str):
+from backend.utils.metrics import LLM_JSON_PARSE
+
+_decoder = json.JSONDecoder()
+
+# Give up looking for a JSON start after this many candidates
+MAX_CANDIDATES = 32
+
+
+def _strip_fences(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+    if text.rstrip().endswith("```"):
+        text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def _closers(stack: list) -> str:
+    return "".join("}" if c == "{" else "]" for c in reversed(stack))
+
+
+class JsonTokenizer:
+    """
+    Character-at-a-time JSON state machine shared by repair_json and the
+    streaming json_stream.IncrementalArrayParser.
+
+    step(ch) returns the events the character produces, in order:
+      "string_start" / "string_end"   a string value opens / closes
+      "key_start" / "key_end"         an object key opens / closes
+      "string_char"                   any other character inside a string
+      "scalar_char" / "scalar_end"    number or literal characters; the end
+                                      is reported on the delimiter after it
+      "open" / "close"                { [ / } ] (stack already updated)
+      "stray_close"                   } or ] with nothing open
+      "comma", "colon", "space"
+    finish() reports a scalar still open at end of input.
+    """
+
+    def __init__(self):
+        self.stack = []
+        # per open container: True while an object expects a key
+        self.expect_key = []
+        self.in_string = False
+        self.escape = False
+        self.string_is_key = False
+        self.in_scalar = False
+
+    def step(self, ch: str) -> list:
+        if self.in_string:
+            if self.escape:
+                self.escape = False
+            elif ch == "\\":
+                self.escape = True
+            elif ch == '"':
+                self.in_string = False
+                return ["key_end" if self.string_is_key else "string_end"]
+            return ["string_char"]
+
+        events = []
+
+        if self.in_scalar:
+            if ch not in ",}] \t\r\n":
+                return ["scalar_char"]
+            self.in_scalar = False
+            events.append("scalar_end")
+
+        if ch in " \t\r\n":
+            events.append("space")
+        elif ch == '"':
+            self.string_is_key = bool(self.stack) and self.stack[-1] == "{" and self.expect_key[-1]
+            self.in_string = True
+            events.append("key_start" if self.string_is_key else "string_start")
+        elif ch in "{[":
+            self.stack.append(ch)
+            self.expect_key.append(ch == "{")
+            events.append("open")
+        elif ch in "}]":
+            if not self.stack:
+                events.append("stray_close")
+            else:
+                self.stack.pop()
+                self.expect_key.pop()
+                events.append("close")
+        elif ch == ",":
+            if self.stack and self.stack[-1] == "{":
+                self.expect_key[-1] = True
+            events.append("comma")
+        elif ch == ":":
+            if self.stack and self.stack[-1] == "{":
+                self.expect_key[-1] = False
+            events.append("colon")
+        else:
+            self.in_scalar = True
+            events.append("scalar_char")
+
+        return events
+
+    def finish(self) -> list:
+        if self.in_scalar:
+            self.in_scalar = False
+            return ["scalar_end"]
+        return []
+
+
+def repair_json(text: str, start: int = 0):
     """
-    Extracts the first valid JSON object or array from LLM output.
-    Works even if extra text or code fences are present.
+    Single pass over text[start:] (which must begin with '{' or '[')
+    with JsonTokenizer.
+
+    Returns the first complete JSON document as text, or for truncated
+    input a repaired version: an open string value is closed, a number
+    or literal running to the end counts as complete, otherwise the text
+    is cut back to the last complete value (or the last opened
+    container). Then the open containers are closed. Trailing commas are
+    dropped along the way. Returns None when nothing usable was found.
     """
+    tokenizer = JsonTokenizer()
+    out = []
+    # (length of out, open containers) at points where closing is valid
+    safe_points = []
+
+    def mark_safe():
+        safe_points.append((len(out), list(tokenizer.stack)))
 
+    for ch in text[start:]:
+        events = tokenizer.step(ch)
+
+        if "scalar_end" in events:
+            mark_safe()
+
+        if "close" in events:
+            while out and out[-1] in " \t\r\n":
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            out.append(ch)
+            if not tokenizer.stack:
+                return "".join(out)
+            mark_safe()
+            continue
+
+        if "stray_close" in events:
+            break
+
+        out.append(ch)
+
+        if "string_end" in events or "open" in events:
+            mark_safe()
+
+    # Truncated: keep a partial string value if we stopped inside one
+    if tokenizer.in_string and not tokenizer.string_is_key and not tokenizer.escape:
+        return "".join(out) + '"' + _closers(tokenizer.stack)
+
+    if tokenizer.finish():
+        mark_safe()
+
+    # Latest safe point first; a scalar cut mid-literal ("tr") is invalid,
+    # so fall back to earlier points
+    for length, open_stack in reversed(safe_points):
+        candidate = "".join(out[:length]) + _closers(open_stack)
+        try:
+            json.loads(candidate)
+            return candidate
+        except json.JSONDecodeError:
+            continue
+
+    return None
+
+
+def extract_json(text: str, expect: type = None):
+    """
+    Extract the first JSON object or array from LLM output.
+
+    Handles code fences and surrounding prose, drops trailing commas and
+    recovers truncated output (e.g. when generation hit num_predict).
+
+    Args:
+        text: Raw LLM output
+        expect: dict or list to only accept that top-level type
+
+    Returns:
+        The parsed value, or None
+    """
     if not text:
+        LLM_JSON_PARSE.inc(outcome="failed")
         return None
 
-    # Remove markdown code fences if present
-    text = re.sub(r"```(json)?", "", text, flags=re.IGNORECASE).strip()
+    text = _strip_fences(text)
+    accepted = (expect,) if expect else (dict, list)
+    openers = "{" if expect is dict else "[" if expect is list else "{["
 
-    # Try direct JSON parse
+    # Fast path: structured output is the whole response
     try:
-        return json.loads(text)
+        value = json.loads(text)
+        if isinstance(value, accepted):
+            LLM_JSON_PARSE.inc(outcome="ok")
+            return value
     except json.JSONDecodeError:
         pass
 
-    # Try to extract JSON array
-    match = re.search(r"(\[\s*{.*?}\s*\])", text, re.DOTALL)
-    if match:
+    starts = [i for i, ch in enumerate(text) if ch in openers][:MAX_CANDIDATES]
+
+    # Outermost candidate first, so a truncated document is repaired
+    # rather than one of its complete inner objects being returned
+    for start in starts:
         try:
-            return json.loads(match.group(1))
+            value, _ = _decoder.raw_decode(text, start)
+            if isinstance(value, accepted):
+                LLM_JSON_PARSE.inc(outcome="ok")
+                return value
         except json.JSONDecodeError:
             pass
 
-    # Try to extract JSON object
-    match = re.search(r"(\{\s*.*?\s*\})", text, re.DOTALL)
-    if match:
+        repaired = repair_json(text, start)
+        if repaired is None:
+            continue
         try:
-            return json.loads(match.group(1))
+            value = json.loads(repaired)
         except json.JSONDecodeError:
-            pass
+            continue
+        if isinstance(value, accepted):
+            print("⚠️ Recovered malformed or truncated JSON from LLM output")
+            LLM_JSON_PARSE.inc(outcome="repaired")
+            return value
 
+    print("JSON extraction error: no valid JSON found in LLM output")
+    LLM_JSON_PARSE.inc(outcome="failed")
     return None
@@ -0,0 +1,82 @@
+import json
+
+from backend.utils.json_extractor import JsonTokenizer
+
+
+class IncrementalArrayParser:
+    """
+    Incremental JSON scanner that emits the items of one top-level array
+    (e.g. "gap_analysis") as soon as each item is complete.
+
+    Feed it the LLM output chunk by chunk; text before the first '{'
+    (markdown fences, preamble) is ignored. Uses the same JsonTokenizer
+    as repair_json, so both agree on strings, escapes and structure.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.buffer = ""
+        self._pos = 0
+        self._tokenizer = JsonTokenizer()
+        self._key_start = None
+        self._last_key = None
+        self._array_depth = None
+        self._item_start = None
+
+    def feed(self, chunk: str) -> list:
+        """Consume a chunk and return the items completed by it."""
+        self.buffer += chunk
+        items = []
+        tokenizer = self._tokenizer
+
+        while self._pos < len(self.buffer):
+            i = self._pos
+            ch = self.buffer[i]
+            self._pos += 1
+
+            if not tokenizer.stack and not tokenizer.in_string and ch != "{":
+                continue
+
+            depth_before = len(tokenizer.stack)
+
+            for event in tokenizer.step(ch):
+                if event == "key_start":
+                    self._key_start = i
+                elif event == "key_end":
+                    self._last_key = self._decode_key(i)
+                elif event == "open":
+                    self._start_item(i, depth_before)
+                    if ch == "[" and depth_before == 1 and self._last_key == self.key:
+                        self._array_depth = len(tokenizer.stack)
+                elif event == "close" and self._array_depth is not None:
+                    depth = len(tokenizer.stack)
+                    if depth == self._array_depth and self._item_start is not None:
+                        item = self._parse_item(self._item_start, i + 1)
+                        if item is not None:
+                            items.append(item)
+                        self._item_start = None
+                    elif depth < self._array_depth:
+                        self._array_depth = None
+
+        return items
+
+    def _start_item(self, i: int, depth: int):
+        """Remember where an array item begins when at the target array level."""
+        if (
+            self._array_depth is not None
+            and depth == self._array_depth
+            and self._item_start is None
+        ):
+            self._item_start = i
+
+    def _decode_key(self, end: int):
+        try:
+            return json.loads(self.buffer[self._key_start:end + 1])
+        except json.JSONDecodeError:
+            return None
+
+    def _parse_item(self, start: int, end: int):
+        try:
+            return json.loads(self.buffer[start:end])
+        except json.JSONDecodeError:
+            return None
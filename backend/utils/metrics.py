@@ -0,0 +1,262 @@
+"""
+In-process metrics in Prometheus text format, plus request-scoped context.
+
+- Counter / Histogram with labels, rendered by render_metrics() for
+  /api/metrics (no prometheus_client dependency)
+- span(stage) times a block into pipeline_stage_seconds, labeled with the
+  current route and domain
+- request id, route and domain live in contextvars; RequestIdFilter puts
+  the request id on every log record
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("backend.metrics")
+
+request_id_var = contextvars.ContextVar("request_id", default="-")
+route_var = contextvars.ContextVar("route", default="none")
+domain_var = contextvars.ContextVar("domain", default="none")
+
+# Seconds; LLM calls can take minutes on CPU
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_number(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram:
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_number(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_number(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+_registry = []
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+HTTP_REQUEST_SECONDS = _register(Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency (until the response object is returned)",
+    labels=("route", "method", "status")
+))
+STAGE_SECONDS = _register(Histogram(
+    "pipeline_stage_seconds",
+    "Time spent in each pipeline stage",
+    labels=("route", "domain", "stage")
+))
+STAGE_ERRORS = _register(Counter(
+    "pipeline_stage_errors_total",
+    "Pipeline stages that raised",
+    labels=("route", "domain", "stage")
+))
+LLM_PROMPT_TOKENS = _register(Counter(
+    "llm_prompt_tokens_total",
+    "Prompt tokens evaluated by the LLM (Ollama prompt_eval_count)",
+    labels=("route", "domain")
+))
+LLM_COMPLETION_TOKENS = _register(Counter(
+    "llm_completion_tokens_total",
+    "Tokens generated by the LLM (Ollama eval_count)",
+    labels=("route", "domain")
+))
+LLM_PROMPT_EVAL_SECONDS = _register(Histogram(
+    "llm_prompt_eval_seconds",
+    "Prompt evaluation time reported by Ollama (prompt_eval_duration)",
+    labels=("route", "domain")
+))
+LLM_EVAL_SECONDS = _register(Histogram(
+    "llm_eval_seconds",
+    "Generation time reported by Ollama (eval_duration)",
+    labels=("route", "domain")
+))
+LLM_JSON_PARSE = _register(Counter(
+    "llm_json_parse_total",
+    "JSON extraction from LLM output by outcome (ok, repaired, failed)",
+    labels=("outcome",)
+))
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def current_labels() -> dict:
+    return {"route": route_var.get(), "domain": domain_var.get()}
+
+
+@contextmanager
+def bind(**values):
+    """Set request_id / route / domain for the enclosed block."""
+    variables = {"request_id": request_id_var, "route": route_var, "domain": domain_var}
+    tokens = [(variables[name], variables[name].set(value)) for name, value in values.items()]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+@contextmanager
+def span(stage: str, **labels):
+    """
+    Time a pipeline stage. Labels default to the current route and domain.
+    """
+    labels = {**current_labels(), **labels, "stage": stage}
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(**labels)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, **labels)
+        logger.info("%s took %.3fs (domain=%s)", stage, elapsed, labels["domain"])
+
+
+def record_llm_stats(response):
+    """
+    Record the token counts and durations (ns) Ollama returns with the
+    final chat response. Missing fields are skipped.
+    """
+    labels = current_labels()
+
+    def field(name):
+        try:
+            return response.get(name)
+        except AttributeError:
+            return getattr(response, name, None)
+
+    prompt_tokens = field("prompt_eval_count")
+    completion_tokens = field("eval_count")
+    prompt_eval_ns = field("prompt_eval_duration")
+    eval_ns = field("eval_duration")
+
+    if prompt_tokens is not None:
+        LLM_PROMPT_TOKENS.inc(prompt_tokens, **labels)
+    if completion_tokens is not None:
+        LLM_COMPLETION_TOKENS.inc(completion_tokens, **labels)
+    if prompt_eval_ns is not None:
+        LLM_PROMPT_EVAL_SECONDS.observe(prompt_eval_ns / 1e9, **labels)
+    if eval_ns is not None:
+        LLM_EVAL_SECONDS.observe(eval_ns / 1e9, **labels)
+
+    logger.info(
+        "llm prompt_tokens=%s (%.2fs) completion_tokens=%s (%.2fs)",
+        prompt_tokens, (prompt_eval_ns or 0) / 1e9,
+        completion_tokens, (eval_ns or 0) / 1e9
+    )
+
+
+def submit_with_context(executor, fn, *args, **kwargs):
+    """executor.submit that carries the caller's request id, route and domain."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds record.request_id so log formats can include %(request_id)s."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+def configure_logging(level=logging.INFO):
+    root = logging.getLogger()
+    if any(isinstance(f, RequestIdFilter) for h in root.handlers for f in h.filters):
+        return
+
+    handler = logging.StreamHandler()
+    handler.addFilter(RequestIdFilter())
+    handler.setFormatter(logging.Formatter(
+        "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+    ))
+
+    root.addHandler(handler)
+    root.setLevel(level)
@@ -0,0 +1,14 @@
+import re
+
+# Mistral's tokenizer averages roughly four characters per token on English
+# policy text; this is close enough for budgeting without loading a tokenizer.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for window and prompt budgeting."""
+    if not text:
+        return 0
+
+    words = len(re.findall(r"\S+", text))
+    return max(words, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
@@ -0,0 +1,111 @@
+"""
+Compare embedding backends (torch, onnx, onnx-int8) on latency, throughput,
+memory and parity with the torch vectors on the NIST corpus.
+
+Each backend runs in its own subprocess so memory numbers are not mixed.
+
+Usage:
+    python scripts/benchmark_embeddings.py
+    python scripts/benchmark_embeddings.py --backends torch onnx-int8 --queries 200
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import subprocess
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+JSON_PATH = BASE_DIR / "backend" / "data" / "cis_policy_chunks_clean.json"
+BACKENDS = ["torch", "onnx", "onnx-int8"]
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+    except ImportError:
+        import psutil
+
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+
+
+def run_worker(backend: str, queries: int) -> dict:
+    """Benchmark one backend inside this process."""
+    from backend.embeddings.embedding_model import load_backend_model
+
+    with open(JSON_PATH, "r", encoding="utf-8") as f:
+        texts = [item["text"] for item in json.load(f)]
+
+    baseline_rss = peak_rss_mb()
+
+    started = time.perf_counter()
+    model = load_backend_model(backend)
+    load_seconds = time.perf_counter() - started
+
+    model.encode("warm-up")
+
+    latencies = []
+    for i in range(queries):
+        text = texts[i % len(texts)][:500]
+        started = time.perf_counter()
+        model.encode(text)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+
+    started = time.perf_counter()
+    model.encode(texts, batch_size=32)
+    corpus_seconds = time.perf_counter() - started
+
+    report = {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 3),
+        "single_p50_ms": round(latencies[len(latencies) // 2], 3),
+        "single_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        "throughput_per_s": round(len(texts) / corpus_seconds, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "model_rss_mb": round(peak_rss_mb() - baseline_rss, 1)
+    }
+
+    if backend != "torch":
+        from backend.embeddings.onnx_backend import parity_check
+
+        reference = load_backend_model("torch")
+        report["parity"] = parity_check(reference, model, texts)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--worker", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.queries)))
+        return
+
+    reports = []
+    for backend in args.backends:
+        print(f"🔄 Benchmarking {backend}...", file=sys.stderr)
+        output = subprocess.run(
+            [sys.executable, __file__, "--worker", backend, "--queries", str(args.queries)],
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
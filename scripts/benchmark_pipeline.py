@@ -0,0 +1,248 @@
+"""
+Offline, stage-level benchmark of the PDF → gap analysis pipeline.
+
+Every LLM call goes to a local fake Ollama server (scripts/fake_ollama.py)
+with a configurable simulated latency, so runs need no model and are
+repeatable. Each stage is timed over policies/*.pdf:
+
+    extract_text_from_pdf, clean_text, split_into_sentences, embedding,
+    retrieval, prompt_build, json_extraction, process_pdf (end to end)
+
+Results are written as JSON. Passing --baseline compares the median of
+every stage with an earlier results file and exits with status 1 when a
+stage got slower than the tolerance allows.
+
+Usage:
+    python scripts/benchmark_pipeline.py --output bench/results.json
+    python scripts/benchmark_pipeline.py --baseline bench/results.json --tolerance 0.2
+"""
+import sys
+import os
+import json
+import time
+import glob
+import platform
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from fake_ollama import start_fake_ollama, canned_response
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+RESULTS_VERSION = 1
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR,
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def time_stage(fn, inputs: list, repeat: int) -> dict:
+    """
+    Run fn over every input `repeat` times (after one untimed warm-up pass)
+    and summarize the per-call latency in milliseconds.
+    """
+    for item in inputs:
+        fn(item)
+
+    timings = []
+    for _ in range(repeat):
+        for item in inputs:
+            started = time.perf_counter()
+            fn(item)
+            timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "calls": len(timings),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.mean(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3)
+    }
+
+
+def run_benchmarks(pdfs: list, repeat: int, top_k: int, skip: set) -> dict:
+    # Backend modules read their settings at import time, so they are
+    # imported only after the environment points at the fake server.
+    from backend.ocr.pdf_loader import extract_text_from_pdf
+    from backend.ocr.text_cleaner import clean_text
+    from backend.chunking.sentence_splitter import split_into_sentences
+
+    stages = {}
+
+    def record(name, fn, inputs, n=repeat):
+        if name in skip:
+            stages[name] = {"skipped": "excluded on the command line"}
+            return
+        print(f"⏱️  {name}...")
+        try:
+            stages[name] = time_stage(fn, inputs, n)
+        except Exception as e:
+            print(f"⚠️ {name} failed: {e}")
+            stages[name] = {"error": str(e)}
+
+    raw_texts = [extract_text_from_pdf(p) for p in pdfs]
+    cleaned = [clean_text(t) for t in raw_texts]
+    sentences = [s for text in cleaned for s in split_into_sentences(text)]
+
+    record("extract_text_from_pdf", extract_text_from_pdf, pdfs)
+    record("clean_text", clean_text, raw_texts)
+    record("split_into_sentences", split_into_sentences, cleaned)
+
+    from backend.embeddings.embedding_model import load_embedding_model
+    from backend.services.nist_retrieval import fetch_similar_nist_records
+    from backend.services.prompt_builder import build_gap_analysis_prompt
+    from backend.config.prompts import DOMAIN_CHUNKING_PROMPT
+    from backend.utils.json_extractor import extract_json
+
+    embedder = load_embedding_model()
+    record("embedding", lambda batch: embedder.encode(batch), [sentences])
+
+    queries = [text[:2000] for text in cleaned]
+    record("retrieval", lambda q: fetch_similar_nist_records(q, top_k=top_k), queries)
+
+    records = [fetch_similar_nist_records(q, top_k=top_k) for q in queries]
+    record(
+        "prompt_build",
+        lambda pair: build_gap_analysis_prompt("ISMS", pair[0], pair[1]),
+        list(zip(cleaned, records))
+    )
+
+    responses = [canned_response(DOMAIN_CHUNKING_PROMPT.format(policy_text=t)) for t in cleaned]
+    responses += [
+        canned_response(build_gap_analysis_prompt("ISMS", t, r)[0])
+        for t, r in zip(cleaned, records)
+    ]
+    record("json_extraction", extract_json, responses)
+
+    from backend.services.pdf_pipeline import process_pdf
+    record("process_pdf", process_pdf, pdfs, n=1)
+
+    return stages
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list:
+    """
+    Stages whose median exceeds the baseline by more than `tolerance`
+    (a fraction) and by more than min_delta_ms. Returns readable lines.
+    """
+    regressions = []
+
+    for name, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(name)
+        if not previous or "median_ms" not in previous or "median_ms" not in current:
+            continue
+
+        before, after = previous["median_ms"], current["median_ms"]
+        if after > before * (1 + tolerance) and after - before > min_delta_ms:
+            regressions.append(
+                f"{name}: {before:.3f} ms → {after:.3f} ms "
+                f"(+{(after / before - 1) * 100 if before else float('inf'):.1f}%)"
+            )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages against a fake Ollama")
+    parser.add_argument("--pdfs", default=str(BASE_DIR / "policies" / "*.pdf"), help="Glob of input PDFs")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated LLM time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Simulated LLM generation speed")
+    parser.add_argument("--replay", help="JSONL of recorded LLM responses for the fake server")
+    parser.add_argument("--skip", action="append", default=[], help="Stage to skip (repeatable)")
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    pdfs = sorted(glob.glob(args.pdfs))
+    if not pdfs:
+        print(f"❌ No PDFs match {args.pdfs}")
+        sys.exit(2)
+
+    server, fake, url = start_fake_ollama(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        replay_path=args.replay
+    )
+    print(f"✅ Fake Ollama on {url}")
+
+    os.environ["OLLAMA_HOST"] = url
+    os.environ["LLM_BACKEND"] = "ollama"
+    # Measure real work, not cache hits
+    os.environ["RESULT_CACHE_ENABLED"] = "0"
+    os.environ["EMBEDDING_CACHE_ENABLED"] = "0"
+
+    try:
+        stages = run_benchmarks(pdfs, args.repeat, args.top_k, set(args.skip))
+    finally:
+        server.shutdown()
+
+    results = {
+        "version": RESULTS_VERSION,
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "platform": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count()
+        },
+        "config": {
+            "pdfs": [os.path.basename(p) for p in pdfs],
+            "repeat": args.repeat,
+            "top_k": args.top_k,
+            "latency": args.latency,
+            "tokens_per_second": args.tokens_per_second
+        },
+        "llm_calls": fake.calls,
+        "stages": stages
+    }
+
+    print(json.dumps(results["stages"], indent=2))
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+    failed = [name for name, stage in stages.items() if "error" in stage]
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        if baseline.get("config") != results["config"]:
+            print("⚠️ Baseline was recorded with a different configuration")
+
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"❌ {len(regressions)} stage(s) regressed vs {baseline.get('commit')}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+
+        print(f"✅ No regressions vs {baseline.get('commit')}")
+
+    if failed:
+        print(f"❌ Stages failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark the Chroma and memory-mapped retrieval engines against each other.
+
+Uses the corpus texts themselves (truncated) as queries, reports latency
+percentiles per engine and how often the mmap top-k matches Chroma's.
+
+Usage:
+    python scripts/benchmark_retrieval.py --queries 100 --top-k 3
+"""
+import sys
+import os
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.embeddings.embedding_model import load_embedding_model
+from backend.services.nist_retrieval import ChromaEngine, MmapEngine
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+JSON_PATH = BASE_DIR / "backend" / "data" / "cis_policy_chunks_clean.json"
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def time_engine(engine, embeddings: list, wheres: list, top_k: int):
+    timings = []
+    results = []
+
+    for embedding, where in zip(embeddings, wheres):
+        started = time.perf_counter()
+        results.append(engine.query([embedding], where=where, top_k=top_k)[0])
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return timings, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retrieval engines")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--filtered", action="store_true", help="Filter each query by its subdomain")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(JSON_PATH, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    random.seed(args.seed)
+    sample = [random.choice(corpus) for _ in range(args.queries)]
+
+    embedder = load_embedding_model()
+    embeddings = embedder.encode([item["text"][:500] for item in sample])
+    wheres = [
+        {"subdomain": item["subdomain"]} if args.filtered else None
+        for item in sample
+    ]
+
+    engines = [ChromaEngine(), MmapEngine()]
+    report = {}
+    all_results = {}
+
+    for engine in engines:
+        # Warm up (opens the DB / maps the file)
+        engine.query([embeddings[0]], where=wheres[0], top_k=args.top_k)
+
+        timings, results = time_engine(engine, embeddings, wheres, args.top_k)
+        all_results[engine.name] = results
+        report[engine.name] = {
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "mean_ms": round(sum(timings) / len(timings), 3)
+        }
+
+    overlap = [
+        len({r["id"] for r in a} & {r["id"] for r in b}) / max(1, len(a))
+        for a, b in zip(all_results["chroma"], all_results["mmap"])
+    ]
+    report["topk_agreement"] = round(sum(overlap) / len(overlap), 4)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
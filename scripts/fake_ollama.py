@@ -0,0 +1,357 @@
+"""
+Deterministic stand-in for the Ollama HTTP API, for offline benchmarks.
+
+Serves GET /, /api/chat (plain and streaming) and /api/generate. Replies
+come from a replay file when the prompt is known, otherwise from canned
+responses shaped like the app's prompts (domain chunking, batch
+classification, gap analysis). Each reply is delayed by a fixed latency
+plus a per-output-token cost, so timings resemble a real model.
+
+Replay files are JSONL with one {"prompt_sha256": ..., "response": ...}
+per line. To capture real model replies, run with --proxy pointing at a
+real Ollama server and --record: unknown prompts are forwarded upstream
+and the replies appended to the record file.
+
+Usage:
+    python scripts/fake_ollama.py --port 11435 --latency 0.2 --tokens-per-second 40
+    python scripts/fake_ollama.py --proxy http://localhost:11434 --record replies.jsonl
+    OLLAMA_HOST=http://127.0.0.1:11435 python backend/app.py
+"""
+import sys
+import os
+import re
+import json
+import time
+import hashlib
+import argparse
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.utils.token_utils import estimate_tokens
+
+DOMAINS = [
+    "ISMS",
+    "Data Privacy and Security",
+    "Patch Management",
+    "Risk Management"
+]
+
+CLASSIFICATION_DOMAINS = [
+    "Information Security Management System (ISMS)",
+    "Data Privacy and Security",
+    "Patch Management",
+    "Risk Management"
+]
+
+DOMAIN_SUBDOMAINS = {
+    "Information Security Management System (ISMS)": "Information Security Policy",
+    "Data Privacy and Security": "Encryption",
+    "Patch Management": "Patch Management",
+    "Risk Management": "Risk Assessment Policy"
+}
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def _between(text: str, start: str, end: str) -> str:
+    match = re.search(re.escape(start) + r"(.*?)" + re.escape(end), text, re.DOTALL)
+    return match.group(1).strip() if match else ""
+
+
+def _chunking_response(prompt: str) -> str:
+    """Deal the policy's lines round-robin across the four domains."""
+    lines = [l.strip() for l in prompt.split("Policy Text:", 1)[-1].splitlines() if l.strip()]
+    result = {domain: {"text": [], "subdomains": []} for domain in DOMAINS}
+
+    for i, line in enumerate(lines):
+        domain = DOMAINS[i % len(DOMAINS)]
+        result[domain]["text"].append(line)
+
+    for domain, value in zip(DOMAINS, DOMAIN_SUBDOMAINS.values()):
+        if result[domain]["text"]:
+            result[domain]["subdomains"].append(value)
+
+    return json.dumps(result, indent=2)
+
+
+def _classification_response(prompt: str) -> str:
+    block = _between(prompt, "Sentences:", "Return JSON ONLY")
+    ids = [int(m) for m in re.findall(r"^(\d+)\.", block, re.MULTILINE)]
+
+    return json.dumps([
+        {
+            "sentence_id": sentence_id,
+            "domain": CLASSIFICATION_DOMAINS[(sentence_id - 1) % 4],
+            "subdomain": DOMAIN_SUBDOMAINS[CLASSIFICATION_DOMAINS[(sentence_id - 1) % 4]]
+        }
+        for sentence_id in ids
+    ], indent=2)
+
+
+def _gap_response(prompt: str) -> str:
+    domain = _between(prompt, "Domain:", "\n")
+    references = [f"NIST Control #{n}" for n in re.findall(r"--- NIST Control #(\d+) ---", prompt)] or ["N/A"]
+
+    gaps = [
+        {
+            "gap_id": f"GAP-{i:03d}",
+            "description": f"Policy does not fully address control {reference}",
+            "nist_reference": reference,
+            "severity": ["High", "Medium", "Low"][i % 3],
+            "impact": "Control objective may not be met"
+        }
+        for i, reference in enumerate(references[:3], start=1)
+    ]
+
+    return json.dumps({
+        "domain": domain,
+        "subdomain": domain,
+        "gap_analysis": gaps,
+        "revised_policy": {
+            "introduction": f"This policy defines {domain} requirements aligned with NIST.",
+            "statements": [f"The organization shall implement {g['nist_reference']}." for g in gaps],
+            "compliance_notes": "Statements map one-to-one to the identified gaps."
+        },
+        "implementation_roadmap": {
+            "short_term": [{"action": g["description"], "timeline": "0-3 months", "priority": g["severity"]} for g in gaps[:1]],
+            "mid_term": [{"action": g["description"], "timeline": "3-6 months", "priority": g["severity"]} for g in gaps[1:2]],
+            "long_term": [{"action": g["description"], "timeline": "6-12 months", "priority": g["severity"]} for g in gaps[2:]]
+        }
+    }, indent=2)
+
+
+def canned_response(prompt: str) -> str:
+    if "Relevant NIST Policy Extracts" in prompt:
+        return _gap_response(prompt)
+    if "For EACH sentence below" in prompt:
+        return _classification_response(prompt)
+    if "Policy Text:" in prompt:
+        return _chunking_response(prompt)
+    return "{}"
+
+
+class FakeOllama:
+    """Response source, latency model and call counters shared by all handlers."""
+
+    def __init__(self, latency: float = 0.0, tokens_per_second: float = 0.0,
+                 replay_path: str = None, record_path: str = None,
+                 proxy_url: str = None, proxy_timeout: float = 600.0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.replay = {}
+        self.record_path = record_path
+        self.proxy_url = proxy_url.rstrip("/") if proxy_url else None
+        self.proxy_timeout = proxy_timeout
+        self.calls = 0
+        self.replayed = 0
+        self.proxied = 0
+        self._lock = threading.Lock()
+
+        if replay_path and os.path.exists(replay_path):
+            with open(replay_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.replay[entry["prompt_sha256"]] = entry["response"]
+
+    def forward(self, body: dict) -> str:
+        """Send a chat request to the real Ollama server and return its reply."""
+        request = urllib.request.Request(
+            f"{self.proxy_url}/api/chat",
+            data=json.dumps({**body, "stream": False}).encode("utf-8"),
+            headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=self.proxy_timeout) as reply:
+            return json.loads(reply.read())["message"]["content"]
+
+    def respond(self, prompt: str, body: dict = None) -> str:
+        """
+        Reply from the replay file, else from the upstream server in proxy
+        mode, else a canned response. New replies are recorded.
+        """
+        key = prompt_hash(prompt)
+
+        with self._lock:
+            self.calls += 1
+            if key in self.replay:
+                self.replayed += 1
+                return self.replay[key]
+
+        if self.proxy_url:
+            response = self.forward(body or {"messages": [{"role": "user", "content": prompt}]})
+            with self._lock:
+                self.proxied += 1
+                self.replay[key] = response
+        else:
+            response = canned_response(prompt)
+
+        if self.record_path:
+            with self._lock, open(self.record_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"prompt_sha256": key, "response": response}) + "\n")
+
+        return response
+
+    def generation_delay(self, response: str) -> float:
+        if not self.tokens_per_second:
+            return 0.0
+        return estimate_tokens(response) / self.tokens_per_second
+
+
+def _make_handler(fake: FakeOllama):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, body: dict, status: int = 200):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path in ("/", "/api/version"):
+                data = b"Ollama is running"
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            else:
+                self._send_json({"error": "not found"}, status=404)
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            model = body.get("model", "mistral")
+
+            if self.path == "/api/generate":
+                # Only used for preloading the model
+                time.sleep(fake.latency)
+                self._send_json({"model": model, "response": "", "done": True})
+                return
+
+            if self.path != "/api/chat":
+                self._send_json({"error": "not found"}, status=404)
+                return
+
+            messages = body.get("messages", [])
+            prompt = messages[-1]["content"] if messages else ""
+            started = time.perf_counter()
+
+            time.sleep(fake.latency)
+            response = fake.respond(prompt, body)
+            stats = {
+                "prompt_eval_count": estimate_tokens("".join(m.get("content", "") for m in messages)),
+                "eval_count": estimate_tokens(response)
+            }
+
+            if body.get("stream", True):
+                self._stream(model, response, stats, started)
+            else:
+                time.sleep(fake.generation_delay(response))
+                self._send_json(self._final(model, response, stats, started))
+
+        def _final(self, model: str, content: str, stats: dict, started: float) -> dict:
+            total = int((time.perf_counter() - started) * 1e9)
+            return {
+                "model": model,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "message": {"role": "assistant", "content": content},
+                "done": True,
+                "done_reason": "stop",
+                "total_duration": total,
+                "load_duration": 0,
+                "prompt_eval_count": stats["prompt_eval_count"],
+                "prompt_eval_duration": int(fake.latency * 1e9),
+                "eval_count": stats["eval_count"],
+                "eval_duration": max(0, total - int(fake.latency * 1e9))
+            }
+
+        def _stream(self, model: str, response: str, stats: dict, started: float):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            pieces = re.findall(r"\S+\s*|\s+", response)
+            delay = fake.generation_delay(response) / max(1, len(pieces))
+
+            def write_line(obj):
+                data = (json.dumps(obj) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            for piece in pieces:
+                time.sleep(delay)
+                write_line({
+                    "model": model,
+                    "message": {"role": "assistant", "content": piece},
+                    "done": False
+                })
+
+            final = self._final(model, "", stats, started)
+            write_line(final)
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+
+def start_fake_ollama(host: str = "127.0.0.1", port: int = 0, **kwargs):
+    """
+    Start the server on a background thread.
+
+    Returns:
+        (server, fake, url) — call server.shutdown() when done
+    """
+    fake = FakeOllama(**kwargs)
+    server = ThreadingHTTPServer((host, port), _make_handler(fake))
+    server.daemon_threads = True
+
+    thread = threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True)
+    thread.start()
+
+    url = f"http://{host}:{server.server_address[1]}"
+    return server, fake, url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Simulated generation speed (0 = instant)")
+    parser.add_argument("--replay", help="JSONL file of recorded responses")
+    parser.add_argument("--proxy", help="Forward unknown prompts to this real Ollama server (e.g. http://localhost:11434)")
+    parser.add_argument("--record", help="Append replies (real ones with --proxy) to this JSONL file")
+    args = parser.parse_args()
+
+    server, fake, url = start_fake_ollama(
+        args.host,
+        args.port,
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        replay_path=args.replay,
+        record_path=args.record,
+        proxy_url=args.proxy
+    )
+    print(f"✅ Fake Ollama listening on {url}")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("httpx")
+pytest.importorskip("ollama")
+
+import numpy as np
+
+from backend.services import gap_analysis, nist_digests, nist_retrieval
+
+
+class FakeEmbedder:
+    def encode(self, texts, normalize_embeddings=False):
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+class EmptyEngine:
+    """An engine whose filter matches no record."""
+
+    def __init__(self):
+        self.get_calls = []
+
+    def query(self, query_embeddings, where=None, top_k=3):
+        return [[] for _ in query_embeddings]
+
+    def get(self, where=None, limit=None, ids=None):
+        self.get_calls.append(ids)
+        return []
+
+
+@pytest.fixture
+def digest_mode(monkeypatch):
+    engine = EmptyEngine()
+    monkeypatch.setattr(nist_retrieval, "load_embedding_model", lambda: FakeEmbedder())
+    monkeypatch.setattr(nist_retrieval, "get_engine", lambda corpus="documents": engine)
+    monkeypatch.setattr(nist_retrieval, "get_lexical_index", lambda corpus="documents": None)
+    monkeypatch.setattr(nist_retrieval, "_passages_available", True)
+    monkeypatch.setattr(nist_retrieval, "RETRIEVAL_QUERY_MODE", "single")
+    monkeypatch.setattr(nist_digests, "NIST_PROMPT_MODE", "digest")
+    monkeypatch.setattr(nist_digests, "get_digests", lambda: {"AC-1": ["Review access yearly"]})
+    return engine
+
+
+def test_digest_mode_retrieves_parents(digest_mode):
+    assert nist_digests.retrieval_granularity() == "parent"
+
+
+def test_digest_path_with_unmatched_filter_builds_prompt(digest_mode):
+    nist_records, cache_key, prompt, metrics = gap_analysis.prepare_gap_analysis(
+        "ISMS", "All servers must be patched within 30 days."
+    )
+
+    assert nist_records == []
+    assert digest_mode.get_calls == []
+    assert "All servers must be patched within 30 days." in prompt
+    assert cache_key
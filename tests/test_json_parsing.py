@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from backend.utils.json_extractor import extract_json, repair_json
+from backend.utils.json_stream import IncrementalArrayParser
+
+
+def test_extract_json_plain_object():
+    assert extract_json('{"domain": "ISMS", "gap_analysis": []}') == {
+        "domain": "ISMS",
+        "gap_analysis": []
+    }
+
+
+def test_extract_json_strips_fences_and_prose():
+    text = 'Here is the result:\n```json\n{"a": [1, 2]}\n```\nDone.'
+    assert extract_json(text) == {"a": [1, 2]}
+
+
+def test_extract_json_drops_trailing_commas():
+    assert extract_json('{"a": [1, 2,], "b": 3,}') == {"a": [1, 2], "b": 3}
+
+
+def test_extract_json_respects_expected_type():
+    assert extract_json('[{"a": 1}]', expect=list) == [{"a": 1}]
+    assert extract_json('[{"a": 1}]', expect=dict) == {"a": 1}
+
+
+def test_extract_json_without_json():
+    assert extract_json("") is None
+    assert extract_json("no json here") is None
+
+
+def test_extract_json_repairs_truncated_document():
+    text = '{"domain": "ISMS", "gap_analysis": [{"gap_id": "GAP-001"}, {"gap_id": "GAP'
+    result = extract_json(text)
+    assert result["domain"] == "ISMS"
+    assert result["gap_analysis"][0] == {"gap_id": "GAP-001"}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 12', {"a": 12}),
+    ('{"a": tr', {}),
+    ('{"a": [', {"a": []}),
+    ('{"a": "unterminated', {"a": "unterminated"}),
+    ('{"a": {"b": 1}, "c": [1, 2', {"a": {"b": 1}, "c": [1, 2]}),
+    ('{"a": "brace } in string", "b": 1', {"a": "brace } in string", "b": 1}),
+    ('{"a": "escaped \\" quote", "b"', {"a": 'escaped " quote'}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+OUTPUT = (
+    "```json\n"
+    '{"domain": "ISMS", "gap_analysis": ['
+    '{"gap_id": "GAP-001", "description": "No [review] of {access}", "tags": ["a", "b"]}, '
+    '{"gap_id": "GAP-002", "description": "Escaped \\" quote", "nested": {"gap_analysis": [1]}}'
+    '], "revised_policy": {"statements": ["x"]}}\n'
+    "```"
+)
+
+
+def _stream(parser, text, size):
+    items = []
+    for i in range(0, len(text), size):
+        items.extend(parser.feed(text[i:i + size]))
+    return items
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, len(OUTPUT)])
+def test_incremental_parser_is_chunk_size_invariant(size):
+    items = _stream(IncrementalArrayParser("gap_analysis"), OUTPUT, size)
+
+    assert [item["gap_id"] for item in items] == ["GAP-001", "GAP-002"]
+    assert items[0]["description"] == "No [review] of {access}"
+    assert items[1]["nested"] == {"gap_analysis": [1]}
+
+
+def test_incremental_parser_ignores_other_keys():
+    parser = IncrementalArrayParser("gap_analysis")
+    assert parser.feed('{"other": [{"a": 1}], "gap_analysis": []}') == []
+
+
+def test_incremental_parser_waits_for_complete_items():
+    parser = IncrementalArrayParser("gap_analysis")
+    assert parser.feed('{"gap_analysis": [{"gap_id": "GAP-001", "severity": "Hi') == []
+    assert parser.feed('gh"}, {"gap_id"') == [{"gap_id": "GAP-001", "severity": "High"}]
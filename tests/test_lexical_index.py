@@ -0,0 +1,93 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.services.lexical_index import LexicalIndex, build_lexical_index, tokenize
+from backend.services.vector_index import build_vector_index
+
+
+class FakeCollection:
+    """Stands in for a Chroma collection in build_vector_index."""
+
+    def __init__(self, records):
+        self.records = records
+
+    def get(self, include=None):
+        return {
+            "ids": [r["id"] for r in self.records],
+            "documents": [r["text"] for r in self.records],
+            "metadatas": [r["metadata"] for r in self.records],
+            "embeddings": [[1.0, float(i)] for i in range(len(self.records))]
+        }
+
+
+RECORDS = [
+    {"id": "AC-2", "text": "Review user accounts every 90 days.",
+     "metadata": {"domain": "ISMS", "subdomain": "Access Control Policy"}},
+    {"id": "SC-13", "text": "Use FIPS 140-2 validated encryption for data at rest.",
+     "metadata": {"domain": "Data Privacy & Security", "subdomain": "Encryption"}},
+    {"id": "SI-2", "text": "Apply critical patches within 30 days; patches are tested first.",
+     "metadata": {"domain": "Patch Management", "subdomain": "Patch Management"}},
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    build_vector_index(FakeCollection(RECORDS), tmp_path)
+    build_lexical_index(tmp_path, k1=1.2, b=0.75)
+    return LexicalIndex(tmp_path)
+
+
+def test_tokenize_drops_stopwords_and_lowercases():
+    assert tokenize("The Policy SHALL be reviewed") == ["policy", "reviewed"]
+
+
+def test_tokenize_keeps_identifiers_whole_and_split():
+    assert tokenize("NIST SP 800-53 AC-2") == ["nist", "sp", "800-53", "800", "53", "ac-2", "ac", "2"]
+
+
+def test_tokenize_empty():
+    assert tokenize("") == []
+    assert tokenize(None) == []
+
+
+def _bm25(query, documents, row, k1=1.2, b=0.75):
+    """Textbook BM25 over unique query terms, for comparison."""
+    tokenized = [tokenize(d) for d in documents]
+    avgdl = sum(len(t) for t in tokenized) / len(tokenized)
+    score = 0.0
+
+    for term in set(tokenize(query)):
+        df = sum(1 for t in tokenized if term in t)
+        if not df:
+            continue
+        tf = tokenized[row].count(term)
+        idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+        score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokenized[row]) / avgdl))
+
+    return score
+
+
+@pytest.mark.parametrize("query", ["patches", "140-2 encryption", "review accounts patches", "unknown"])
+def test_scores_match_bm25(index, query):
+    documents = [index.columns["documents"][row] for row in range(len(index))]
+    expected = [_bm25(query, documents, row) for row in range(len(index))]
+
+    assert index.scores(query) == pytest.approx(expected, rel=1e-5)
+
+
+def test_search_ranks_and_omits_zero_scores(index):
+    [hits] = index.search(["critical patches"], top_k=3)
+
+    assert [index.columns["ids"][row] for row, _ in hits] == ["SI-2"]
+    assert hits[0][1] > 0
+
+
+def test_search_respects_filter(index):
+    [hits] = index.search(["patches encryption"], top_k=3, where={"subdomain": "Encryption"})
+    assert [index.columns["ids"][row] for row, _ in hits] == ["SC-13"]
+
+    [hits] = index.search(["patches"], top_k=3, where={"subdomain": "No Such Subdomain"})
+    assert hits == []
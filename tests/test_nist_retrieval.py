@@ -0,0 +1,126 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from backend.services import nist_retrieval
+from backend.services.nist_retrieval import expand_to_parents, reciprocal_rank_fusion
+
+
+class FakeEngine:
+    """Documents engine returning records for the requested ids, in order."""
+
+    def __init__(self, records):
+        self.records = {r["id"]: r for r in records}
+        self.requested = []
+
+    def get(self, where=None, limit=None, ids=None):
+        self.requested.append(ids)
+        return [self.records[i] for i in ids if i in self.records]
+
+
+def _passage(passage_id, parent_id, similarity, start=0, end=10):
+    return {
+        "id": passage_id,
+        "text": "passage",
+        "metadata": {"parent_id": parent_id, "start": start, "end": end},
+        "similarity": similarity
+    }
+
+
+@pytest.fixture
+def documents(monkeypatch):
+    engine = FakeEngine([
+        {"id": "AC-1", "text": "Access control", "metadata": {}},
+        {"id": "AC-2", "text": "Account management", "metadata": {}},
+        {"id": "SI-2", "text": "Flaw remediation", "metadata": {}}
+    ])
+    monkeypatch.setattr(nist_retrieval, "get_engine", lambda corpus="documents": engine)
+    return engine
+
+
+def test_expand_to_parents_without_passages_returns_nothing(documents):
+    assert expand_to_parents([], top_k=3) == []
+    assert documents.requested == []
+
+
+def test_expand_to_parents_dedupes_in_rank_order(documents):
+    passages = [
+        _passage("AC-2#0", "AC-2", 0.9, 0, 40),
+        _passage("AC-1#3", "AC-1", 0.8),
+        _passage("AC-2#1", "AC-2", 0.7, 40, 80),
+        _passage("SI-2#0", "SI-2", 0.6)
+    ]
+
+    parents = expand_to_parents(passages, top_k=2)
+
+    assert [p["id"] for p in parents] == ["AC-2", "AC-1"]
+    assert parents[0]["similarity"] == 0.9
+    assert parents[0]["text"] == "Account management"
+    assert parents[0]["passages"] == [
+        {"id": "AC-2#0", "start": 0, "end": 40},
+        {"id": "AC-2#1", "start": 40, "end": 80}
+    ]
+    assert documents.requested == [["AC-2", "AC-1"]]
+
+
+def _ranking(*ids, **extra):
+    return [{"id": doc_id, **extra} for doc_id in ids]
+
+
+def test_reciprocal_rank_fusion_scores():
+    fused = reciprocal_rank_fusion([_ranking("A", "B"), _ranking("B", "C")], top_k=3, k=60)
+
+    assert [r["id"] for r in fused] == ["B", "A", "C"]
+    assert fused[0]["rrf_score"] == pytest.approx(1 / 62 + 1 / 61)
+    assert fused[1]["rrf_score"] == pytest.approx(1 / 61)
+    assert fused[2]["rrf_score"] == pytest.approx(1 / 62)
+
+
+def test_reciprocal_rank_fusion_keeps_first_occurrence():
+    dense = _ranking("A", similarity=0.8)
+    lexical = _ranking("A")
+
+    [fused] = reciprocal_rank_fusion([dense, lexical], top_k=1)
+
+    assert fused["similarity"] == 0.8
+    assert "rrf_score" not in dense[0]
+
+
+def test_reciprocal_rank_fusion_truncates_and_handles_empty():
+    assert len(reciprocal_rank_fusion([_ranking("A", "B", "C")], top_k=2)) == 2
+    assert reciprocal_rank_fusion([[], []], top_k=3) == []
+
+
+def _hit(doc_id, similarity):
+    return {"id": doc_id, "text": doc_id, "metadata": {}, "similarity": similarity}
+
+
+SENTENCE_HITS = [
+    [_hit("AC-1", 0.9), _hit("AC-2", 0.6)],
+    [_hit("AC-2", 0.7), _hit("SI-2", 0.5)],
+    [_hit("AC-2", 0.65), _hit("AC-1", 0.2)]
+]
+
+
+def test_aggregate_sentence_hits_sum_top_n(monkeypatch):
+    monkeypatch.setattr(nist_retrieval, "MULTI_VECTOR_AGGREGATION", "sum_top_n")
+
+    records = nist_retrieval.aggregate_sentence_hits(SENTENCE_HITS, top_n=2)
+
+    assert [r["id"] for r in records] == ["AC-2", "AC-1", "SI-2"]
+    assert records[0]["similarity"] == 0.7
+    assert records[0]["sum_top_n"] == pytest.approx(0.7 + 0.65)
+    assert records[0]["matched_sentences"] == 3
+    assert records[1]["sum_top_n"] == pytest.approx(0.9 + 0.2)
+
+
+def test_aggregate_sentence_hits_max(monkeypatch):
+    monkeypatch.setattr(nist_retrieval, "MULTI_VECTOR_AGGREGATION", "max")
+
+    records = nist_retrieval.aggregate_sentence_hits(SENTENCE_HITS, top_n=2)
+
+    assert [r["id"] for r in records] == ["AC-1", "AC-2", "SI-2"]
+
+
+def test_aggregate_sentence_hits_empty():
+    assert nist_retrieval.aggregate_sentence_hits([[], []]) == []
@@ -0,0 +1,72 @@
+import pytest
+
+from backend.chunking.passage_splitter import split_into_passages
+from backend.utils.token_utils import estimate_tokens
+
+TEXT = (
+    "Access to systems must be approved by the owner. "
+    "Accounts are reviewed every 90 days.\n"
+    "Privileged accounts use multi-factor authentication; "
+    "shared accounts are not permitted.\n"
+    "________\n"
+    "Patches are applied within 30 days. Critical patches are applied within 7 days."
+)
+
+
+def test_passages_are_offsets_into_the_text():
+    for passage in split_into_passages(TEXT, max_tokens=20):
+        assert passage["text"] == TEXT[passage["start"]:passage["end"]]
+
+
+@pytest.mark.parametrize("max_tokens", [5, 12, 20, 1000])
+def test_passages_respect_the_token_bound(max_tokens):
+    for passage in split_into_passages(TEXT, max_tokens=max_tokens):
+        assert estimate_tokens(passage["text"]) <= max_tokens
+
+
+def test_passages_cover_every_sentence_in_order():
+    passages = split_into_passages(TEXT, max_tokens=12)
+
+    starts = [p["start"] for p in passages]
+    assert starts == sorted(starts)
+    joined = " ".join(p["text"] for p in passages)
+    for sentence in ("owner.", "90 days.", "not permitted.", "within 7 days."):
+        assert sentence in joined
+
+
+def test_short_text_is_one_passage():
+    text = "Accounts are reviewed every 90 days."
+    assert split_into_passages(text, max_tokens=128) == [{"text": text, "start": 0, "end": len(text)}]
+
+
+def test_section_rules_separate_sentences():
+    for passage in split_into_passages(TEXT, max_tokens=12):
+        assert not passage["text"].startswith("_")
+        assert not passage["text"].endswith("_")
+
+
+def test_overlap_repeats_trailing_sentences():
+    plain = split_into_passages(TEXT, max_tokens=20)
+    overlapped = split_into_passages(TEXT, max_tokens=20, overlap_sentences=1)
+
+    assert all(a["end"] <= b["start"] for a, b in zip(plain, plain[1:]))
+    assert any(b["start"] < a["end"] for a, b in zip(overlapped, overlapped[1:]))
+    # Every passage still moves forward, so splitting terminates
+    assert all(a["start"] < b["start"] for a, b in zip(overlapped, overlapped[1:]))
+    assert overlapped[-1]["end"] == plain[-1]["end"]
+
+
+def test_long_sentence_is_cut_at_whitespace():
+    text = " ".join(f"word{i}" for i in range(200))
+    passages = split_into_passages(text, max_tokens=16)
+
+    assert len(passages) > 1
+    for passage in passages:
+        assert estimate_tokens(passage["text"]) <= 16
+        assert not passage["text"].startswith(" ")
+        assert passage["text"].split()[0].startswith("word")
+
+
+def test_empty_text():
+    assert split_into_passages("") == []
+    assert split_into_passages(None) == []
@@ -0,0 +1,76 @@
+import itertools
+import json
+import types
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("ollama")
+
+from backend.services import result_cache
+from backend.services.result_cache import ResultCache, build_cache_key
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    """Strictly increasing timestamps, so LRU order never ties."""
+    ticks = itertools.count(1)
+    monkeypatch.setattr(result_cache, "time", types.SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def make_cache(tmp_path, max_entries=100, max_bytes=10**6):
+    return ResultCache(tmp_path / "results.sqlite", max_entries=max_entries, max_bytes=max_bytes)
+
+
+def test_get_returns_what_was_set(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("k", {"domain": "ISMS", "gap_analysis": []})
+
+    assert cache.get("k") == {"domain": "ISMS", "gap_analysis": []}
+    assert cache.get("missing") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_evicts_least_recently_used_by_count(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.get("a")
+    cache.set("c", {"v": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.get("c") == {"v": 3}
+    assert cache.evictions == 1
+
+
+def test_evicts_until_within_byte_bound(tmp_path):
+    value = {"text": "x" * 100}
+    size = len(json.dumps(value))
+    cache = make_cache(tmp_path, max_bytes=size * 2)
+
+    for key in "abc":
+        cache.set(key, value)
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= size * 2
+    assert cache.get("a") is None
+
+
+def test_replacing_a_key_does_not_evict(tmp_path):
+    cache = make_cache(tmp_path, max_entries=1)
+    cache.set("a", {"v": 1})
+    cache.set("a", {"v": 2})
+
+    assert cache.get("a") == {"v": 2}
+    assert cache.evictions == 0
+
+
+def test_cache_key_ignores_whitespace_but_not_records():
+    records = [{"id": "AC-1", "text": "Access control"}]
+
+    assert build_cache_key("ISMS", "a  b\n", records) == build_cache_key("ISMS", "a b", records)
+    assert build_cache_key("ISMS", "a b", records) != build_cache_key(
+        "ISMS", "a b", [{"id": "AC-1", "text": "Access control, revised"}]
+    )